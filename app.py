@@ -1,26 +1,70 @@
 import os
 import json
+import time
 import logging
-from flask import Flask, render_template, request, session, redirect, url_for
+from datetime import datetime, timezone
+from flask import (
+    Flask, Response, render_template, request, session, redirect, url_for, jsonify,
+    stream_with_context,
+)
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-logging.basicConfig(level=logging.INFO)
+from profile_store import ProfileStore
+from background import TaskQueue, PENDING, DONE
+import match_table
+import job_search
+import precomputed_recommendations
+import rag_engine
+from circuit_breaker import CircuitOpenError
+from assessment_writer import AssessmentWriter
+from session_store import build_session_interface
+from render_cache import RenderCache, cached_response, PAGE_MAX_AGE, FRAGMENT_TTL
+from metrics import registry, render_prometheus, timed, timed_function
 
 # Flask App Setup
 class Base(DeclarativeBase): pass
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "default_secret_key")
-app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///app.db")
+
+# Questionnaire answers live server-side; the cookie only carries a session id
+session_interface = build_session_interface(app)
+if session_interface is not None:
+    app.session_interface = session_interface
+database_url = os.getenv("DATABASE_URL", "sqlite:///app.db")
+if database_url.startswith("postgres://"):
+    database_url = database_url.replace("postgres://", "postgresql://", 1)
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+if not database_url.startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
 
 db = SQLAlchemy(model_class=Base)
 db.init_app(app)
 
+# Completed assessments are batched and inserted by a background thread
+assessment_writer = AssessmentWriter(app, db)
+registry.gauge("assessment_queue_size", assessment_writer.pending)
+
+# Profiles are parsed and rendered once, then hot-reloaded when the file changes
+profile_store = ProfileStore()
+
+# "sync" waits for Bedrock inside /results; "async" renders the analysis
+# immediately and lets the page poll for the recommendations; "stream" renders
+# the analysis and streams the recommendation text as it is generated
+RESULTS_MODE = os.getenv("RESULTS_MODE", "sync")
+recommendation_queue = TaskQueue()
+
+# Welcome/question pages and per-profile fragments are rendered once and served with ETags
+render_cache = RenderCache()
+
 # Question Definitions
 questions = [
     {
@@ -62,8 +106,10 @@ questions = [
 
 @app.route("/")
 def welcome():
-    session.clear()
-    return render_template("welcome.html")
+    if session:
+        session.clear()
+    # Revalidate every time so the visit still clears the session server-side
+    return cached_response(welcome_page(), "no-cache")
 
 @app.route("/question/<int:question_id>", methods=["GET", "POST"])
 def question(question_id):
@@ -78,84 +124,374 @@ def question(question_id):
                 return redirect(url_for("question", question_id=question_id + 1))
             return redirect(url_for("results"))
 
-    question_obj = questions[question_id - 1]
-    progress = (question_id / len(questions)) * 100
-    return render_template("question.html", question=question_obj, progress=progress)
+    return cached_response(question_page(question_id), f"public, max-age={PAGE_MAX_AGE}")
+
+def welcome_page():
+    return render_cache.get((request.script_root, "welcome"), lambda: render_template("welcome.html"))
+
+def question_page(question_id):
+    def render():
+        question_obj = questions[question_id - 1]
+        progress = (question_id / len(questions)) * 100
+        return render_template("question.html", question=question_obj, progress=progress)
+
+    return render_cache.get((request.script_root, "question", question_id), render)
+
+def profile_fragment(profile):
+    """Analysis and matching jobs for a profile, re-rendered when profiles reload or the TTL lapses"""
+    def render():
+        with timed("job_matches"):
+            job_matches = fetch_job_matches(profile.key)
+        return render_template(
+            "_results_profile.html", analysis=profile.analysis_html, job_matches=job_matches
+        )
+
+    return render_cache.get(
+        (request.script_root, "profile", profile.key), render, version=profile_store.version, ttl=FRAGMENT_TTL
+    )
+
+@app.route("/profiles/<profile_key>")
+def profile_page(profile_key):
+    """The cacheable, session-independent part of the results page"""
+    profile = profile_store.get(profile_key)
+    if not profile:
+        return jsonify({"status": "unknown"}), 404
+    return cached_response(profile_fragment(profile), f"public, max-age={PAGE_MAX_AGE}")
 
 @app.route("/results")
+@timed_function("results")
 def results():
     if not all(f"q{i+1}" in session for i in range(len(questions))):
         return redirect(url_for("welcome"))
 
     try:
-        profile_key = "-".join(session[f"q{i+1}"] for i in range(4))
-
-        with open("personality_analyses.json") as f:
-            profiles = json.load(f)
+        started = time.perf_counter()
+        answers = {f"q{i+1}": session[f"q{i+1}"] for i in range(len(questions))}
+        profile_key = "-".join(answers[f"q{i+1}"] for i in range(4))
 
-        profile_data = profiles.get(profile_key)
-        if not profile_data:
+        with timed("profile_lookup"):
+            profile = profile_store.get(profile_key)
+        if not profile:
             raise ValueError(f"Missing profile for key: {profile_key}")
 
-        analysis_html = format_analysis_html(profile_data["analysis"])
-
-        from rag_engine import get_semantic_matches_bedrock
-        query = f"Match this user description to appropriate job roles: {session['q5']}"
-        bedrock_output = get_semantic_matches_bedrock(query)
-
-        if "sorry" in bedrock_output.lower():
-            # Fallback job if Claude Haiku can't help
-            recommendations = [{
-                "title": "Research Assistant – Entry Level",
-                "company": "Vanderbilt University",
-                "location": "Nashville, TN",
-                "match_score": 75,
-                "reasoning": "Based on your preferences, this role offers structure, independent work, and learning opportunities.",
-                "url": "https://www.vanderbilt.edu/"
-            }]
-        else:
-            recommendations = [{
-                "title": "Job Matches Based on Your Preferences",
-                "company": "Generated by AWS Bedrock",
-                "location": "Remote or Hybrid",
-                "match_score": None,
-                "reasoning": bedrock_output,
-                "url": "#"
-            }]
-
-        return render_template("results.html", analysis=analysis_html, recommendations=recommendations)
+        analysis_html = profile.analysis_html
+        fragment = profile_fragment(profile).body.decode("utf-8")
+
+        # Short or generic answers are served from the offline batch without calling Bedrock
+        recommendations = fetch_precomputed_recommendations(profile_key, answers["q5"])
+        if recommendations is not None:
+            record_assessment(answers, profile_key, analysis_html, recommendations, started)
+            with timed("render_results"):
+                return render_template(
+                    "results.html",
+                    profile_fragment=fragment,
+                    recommendations=recommendations,
+                )
+
+        if RESULTS_MODE == "async":
+            task_id = recommendation_queue.submit(
+                fetch_and_record_recommendations, answers, profile_key, analysis_html, started
+            )
+            session["recommendation_task"] = task_id
+            return render_template(
+                "results.html",
+                profile_fragment=fragment,
+                recommendations=None,
+                recommendations_url=url_for("results_recommendations", task_id=task_id),
+            )
+
+        if RESULTS_MODE == "stream":
+            return render_template(
+                "results.html",
+                profile_fragment=fragment,
+                recommendations=None,
+                recommendations_stream_url=url_for("results_stream"),
+            )
+
+        recommendations = fetch_recommendations(session["q5"])
+        record_assessment(answers, profile_key, analysis_html, recommendations, started)
+        with timed("render_results"):
+            return render_template(
+                "results.html",
+                profile_fragment=fragment,
+                recommendations=recommendations,
+            )
 
     except Exception as e:
         logging.error(f"Error generating results: {e}")
         return "Something went wrong generating your results. Please try again."
 
-def format_analysis_html(analysis):
-    return f"""
-    <div class='analysis-section'>
-        <h3>Work Style</h3>
-        <p><strong>{analysis['work_style']['description']}</strong></p>
-        <p>{analysis['work_style']['explanation']}</p>
-
-        <h3>Ideal Environment</h3>
-        <p><strong>{analysis['environment']['description']}</strong></p>
-        <p>{analysis['environment']['explanation']}</p>
-
-        <h3>Interaction Level</h3>
-        <p><strong>{analysis['interaction_level']['description']}</strong></p>
-        <p>{analysis['interaction_level']['explanation']}</p>
-
-        <h3>Task Preferences</h3>
-        <p><strong>{analysis['task_preference']['description']}</strong></p>
-        <p>{analysis['task_preference']['explanation']}</p>
-
-        <h3>Accommodations</h3>
-        <p><strong>{analysis['accommodations']['description']}</strong></p>
-        <p>{analysis['accommodations']['explanation']}</p>
-    </div>
+@app.route("/results/recommendations/<task_id>")
+def results_recommendations(task_id):
+    if session.get("recommendation_task") != task_id or "q5" not in session:
+        return jsonify({"status": "unknown"}), 404
+
+    state, value = recommendation_queue.status(task_id)
+    if state is None:
+        # The task was queued by another worker process; recompute and record it here
+        answers = {f"q{i+1}": session.get(f"q{i+1}") for i in range(len(questions))}
+        profile_key = "-".join(str(answers[f"q{i+1}"]) for i in range(4))
+        profile = profile_store.get(profile_key)
+        recommendation_queue.submit(
+            fetch_and_record_recommendations,
+            answers,
+            profile_key,
+            profile.analysis_html if profile else None,
+            time.perf_counter(),
+            task_id=task_id,
+        )
+        state = PENDING
+
+    if state == PENDING:
+        return jsonify({"status": PENDING}), 202
+    if state == DONE:
+        return jsonify({"status": DONE, "recommendations": value})
+    return jsonify({"status": "error"}), 500
+
+@app.route("/results/stream")
+def results_stream():
+    """Server-sent events: "chunk" events carry generated text, "done" the final cards"""
+    if "q5" not in session:
+        return redirect(url_for("welcome"))
+
+    started = time.perf_counter()
+    answers = {f"q{i+1}": session.get(f"q{i+1}") for i in range(len(questions))}
+    profile_key = "-".join(str(answers[f"q{i+1}"]) for i in range(4))
+    query = recommendation_query(answers["q5"])
+
+    def events():
+        chunks = []
+        try:
+            for chunk in rag_engine.stream_semantic_matches_bedrock(query):
+                chunks.append(chunk)
+                yield f"event: chunk\ndata: {json.dumps(chunk)}\n\n"
+            recommendations = build_recommendations("".join(chunks))
+            yield f"event: done\ndata: {json.dumps(recommendations)}\n\n"
+            profile = profile_store.get(profile_key)
+            record_assessment(
+                answers, profile_key, profile.analysis_html if profile else None, recommendations, started
+            )
+        except CircuitOpenError:
+            yield f"event: done\ndata: {json.dumps(FALLBACK_RECOMMENDATIONS)}\n\n"
+        except Exception as e:
+            logging.error(f"Error streaming recommendations: {e}")
+            yield "event: error\ndata: {}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+_job_search_unavailable = False
+
+@app.route("/api/jobs/search")
+def api_job_search():
+    """Local hybrid search: ?q=<text>&profile=A-B-C-A&limit=10&cursor=<next_cursor>
+
+    Without explicit parameters the questionnaire answers in the session are used.
     """
+    text = request.args.get("q", session.get("q5"))
+    profile_key = request.args.get("profile")
+    if profile_key is None and all(f"q{i+1}" in session for i in range(4)):
+        profile_key = "-".join(session[f"q{i+1}"] for i in range(4))
+    try:
+        limit = int(request.args.get("limit", "10"))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if profile_key and not match_table.normalize_profile_key(profile_key):
+        return jsonify({"error": f"invalid profile: {profile_key}"}), 400
+    if not text and not profile_key:
+        return jsonify({"error": "provide q and/or profile"}), 400
+
+    global _job_search_unavailable
+    try:
+        with timed("job_search"):
+            page = job_search.search_jobs(text, profile_key, limit, request.args.get("cursor"))
+    except job_search.InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        # Say so once rather than on every search until the job database is fixed
+        if not _job_search_unavailable:
+            logging.error(f"Error searching jobs: {e}")
+        _job_search_unavailable = True
+        return jsonify({"error": "search is unavailable"}), 503
+    _job_search_unavailable = False
+    return jsonify(page)
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+def record_assessment(answers, profile_key, analysis_html, recommendations, started):
+    """Queue a completed assessment for the write-behind writer"""
+    assessment_writer.enqueue(
+        q1_answer=answers["q1"],
+        q2_answer=answers["q2"],
+        q3_answer=answers["q3"],
+        q4_answer=answers["q4"],
+        q5_answer=answers["q5"],
+        profile_key=profile_key,
+        analysis=analysis_html,
+        recommendation="\n\n".join(r["reasoning"] for r in recommendations),
+        latency_ms=(time.perf_counter() - started) * 1000,
+        created_at=datetime.now(timezone.utc).replace(tzinfo=None),
+    )
+
+def fetch_and_record_recommendations(answers, profile_key, analysis_html, started):
+    recommendations = fetch_recommendations(answers["q5"])
+    record_assessment(answers, profile_key, analysis_html, recommendations, started)
+    return recommendations
+
+_job_matches_unavailable = False
+
+def fetch_job_matches(profile_key):
+    """Precomputed, scored jobs for the profile; empty if the match table is unavailable"""
+    global _job_matches_unavailable
+    try:
+        matches = match_table.top_matches(profile_key)
+        _job_matches_unavailable = False
+        return matches
+    except Exception as e:
+        # Say so once rather than for every profile and request until it is fixed
+        if not _job_matches_unavailable:
+            logging.error(f"Error loading job matches: {e}")
+        _job_matches_unavailable = True
+        return []
+
+_precomputed_unavailable = False
+
+def fetch_precomputed_recommendations(profile_key, free_response):
+    """Stored recommendations when the answer maps to a precomputed intent, else None"""
+    global _precomputed_unavailable
+    intent = precomputed_recommendations.match_intent(free_response)
+    if intent is None:
+        return None
+    try:
+        with timed("precomputed_lookup"):
+            text = precomputed_recommendations.stored_recommendation(profile_key, intent)
+    except Exception as e:
+        if not _precomputed_unavailable:
+            logging.error(f"Error loading precomputed recommendations: {e}")
+        _precomputed_unavailable = True
+        return None
+    # Only a successful read shows the table is back
+    _precomputed_unavailable = False
+    if text is None:
+        return None
+    registry.inc("precomputed_recommendations_served_total")
+    return build_recommendations(text)
+
+def recommendation_query(free_response):
+    return f"Match this user description to appropriate job roles: {free_response}"
+
+def fetch_recommendations(free_response):
+    """Run the Bedrock RAG query for the free-form answer and shape it for results.html"""
+    try:
+        bedrock_output = rag_engine.get_semantic_matches_bedrock(recommendation_query(free_response))
+    except CircuitOpenError:
+        # Bedrock is failing or too slow right now; don't make the user wait on it
+        return FALLBACK_RECOMMENDATIONS
+    return build_recommendations(bedrock_output)
+
+# Fallback job if Claude Haiku can't help
+FALLBACK_RECOMMENDATIONS = [{
+    "title": "Research Assistant – Entry Level",
+    "company": "Vanderbilt University",
+    "location": "Nashville, TN",
+    "match_score": 75,
+    "reasoning": "Based on your preferences, this role offers structure, independent work, and learning opportunities.",
+    "url": "https://www.vanderbilt.edu/"
+}]
+
+def build_recommendations(bedrock_output):
+    if rag_engine.is_fallback_answer(bedrock_output):
+        return FALLBACK_RECOMMENDATIONS
+
+    return [{
+        "title": "Job Matches Based on Your Preferences",
+        "company": "Generated by AWS Bedrock",
+        "location": "Remote or Hybrid",
+        "match_score": None,
+        "reasoning": bedrock_output,
+        "url": "#"
+    }]
+
+def warm_render_cache():
+    """Render the static pages and every profile fragment before the first request"""
+    with app.test_request_context("/"):
+        welcome_page()
+        for q in questions:
+            question_page(q["id"])
+        for key in list(profile_store.keys()):
+            profile_fragment(profile_store.get(key))
+    logging.info(f"Pre-rendered {len(render_cache)} pages and fragments")
+
+def warm_up():
+    """Pay Bedrock client, retrieval and page rendering costs before the first request.
+
+    Importing this module stays cheap; entry points call this once the worker is up.
+    """
+    try:
+        rag_engine.warm_up()
+    except Exception as e:
+        logging.error(f"Bedrock warm-up failed: {e}")
+    try:
+        warm_render_cache()
+    except Exception as e:
+        logging.error(f"Render cache warm-up failed: {e}")
+
+import models  # noqa: E402 - registers the tables with db before create_all
+
+def init_db():
+    """Create missing tables and columns; run once per deploy rather than on every import"""
+    with app.app_context():
+        db.create_all()
+        models.upgrade_schema(db.engine)
+    init_job_db()
+
+def init_job_db(path=None):
+    """Migrate job_profiles.db to the current schema and rank its jobs for every profile"""
+    import job_schema
+    from job_profile_analyzer import create_database
+
+    conn = create_database(path or job_schema.DB_PATH)
+    try:
+        precomputed_recommendations.create_table(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+def refresh_precomputed_recommendations(path=None):
+    """Regenerate the precomputed recommendations whose profile, intent or corpus changed
+
+    Unchanged rows are skipped, so this only calls Bedrock after a change.
+    Set PRECOMPUTE_ON_START=false to leave it to `python precomputed_recommendations.py`.
+    """
+    if os.getenv("PRECOMPUTE_ON_START", "true").lower() != "true":
+        return
+    import job_schema
+
+    conn = job_schema.connect(path or job_schema.DB_PATH)
+    try:
+        precomputed_recommendations.precompute(conn)
+    except Exception as e:
+        logging.error(f"Refreshing precomputed recommendations failed: {e}")
+    finally:
+        conn.close()
 
-with app.app_context():
-    db.create_all()
+@app.cli.command("init-db")
+def init_db_command():
+    init_db()
+    print("Database tables created")
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    from dotenv import load_dotenv
+    load_dotenv()
+    # The app reads its configuration at import; serve a copy imported after .env is loaded
+    import app as configured
+    logging.basicConfig(level=logging.INFO)
+    configured.init_db()
+    configured.refresh_precomputed_recommendations()
+    configured.warm_up()
+    configured.app.run(host="0.0.0.0", port=5001, debug=True)
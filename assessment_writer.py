@@ -0,0 +1,101 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("ASSESSMENT_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = float(os.getenv("ASSESSMENT_FLUSH_INTERVAL", "2"))
+MAX_QUEUE = int(os.getenv("ASSESSMENT_MAX_QUEUE", "10000"))
+
+_STOP = object()
+
+
+class AssessmentWriter:
+    """Write-behind queue that inserts completed assessments in bulk off the request path.
+
+    Requests only enqueue a dict of column values. A daemon thread flushes
+    whenever `batch_size` rows are waiting or `flush_interval` seconds have
+    passed since the first unflushed row. If the queue is full, rows are
+    dropped with a warning rather than slowing requests down.
+    """
+
+    def __init__(self, app, db, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE):
+        self.app = app
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def enqueue(self, **row):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Assessment queue is full; dropping assessment")
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="assessment-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            self.flush(batch)
+            if stopping:
+                return
+
+    def flush(self, rows):
+        from sqlalchemy import insert
+        from models import Assessment
+
+        with self.app.app_context():
+            try:
+                self.db.session.execute(insert(Assessment), rows)
+                self.db.session.commit()
+                logger.info(f"Stored {len(rows)} assessments")
+            except Exception as e:
+                self.db.session.rollback()
+                logger.error(f"Error storing {len(rows)} assessments: {e}")
+
+    def stop(self, timeout=10):
+        """Flush whatever is queued and stop the writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def reset(self):
+        """Forget the writer thread and queued rows, e.g. in a freshly forked worker"""
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = None
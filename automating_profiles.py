@@ -1,21 +1,35 @@
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import product
 import json
-from openai import OpenAI
 import logging
 from pprint import pprint
-from dotenv import load_dotenv
-# Load environment variables from .env file
-load_dotenv()
+from rate_limit import retry_with_backoff
 # llm call 1, generate the 36 profiles, profile id = combinarion (AAAA)
 # llm call 2, generate structured output for each profile
 # boto3 to create dynamodb to interact with aws
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# OpenAI client, created on first use so importing this module stays cheap
+client = None
 
+OUTPUT_FILE = "personality_analyses.json"
+# Each finished combination is appended here so an interrupted run can resume
+CHECKPOINT_FILE = os.getenv("PROFILE_CHECKPOINT_FILE", "personality_analyses.checkpoint.jsonl")
+MAX_WORKERS = int(os.getenv("PROFILE_GEN_WORKERS", "6"))
+# Requests per analysis when GPT-4 returns malformed or incomplete JSON
+RESPONSE_ATTEMPTS = int(os.getenv("PROFILE_RESPONSE_ATTEMPTS", "3"))
+# Sections every analysis needs; profile_store renders each of them
+ANALYSIS_SECTIONS = ("work_style", "environment", "interaction_level", "task_preference", "accommodations")
+# Compositional mode: one analysis per answer and per answer pair instead of per combination
+FRAGMENTS_FILE = os.getenv("PROFILE_FRAGMENTS_PATH", "profile_fragments.json")
+FRAGMENT_CHECKPOINT_FILE = os.getenv("PROFILE_FRAGMENT_CHECKPOINT_FILE", "profile_fragments.checkpoint.jsonl")
+# Dimension pairs whose interaction gets its own accommodations fragment
+FRAGMENT_PAIRS = [
+    tuple(pair.split(":")) for pair in
+    os.getenv("PROFILE_FRAGMENT_PAIRS", "work_style:task_preference,environment:interaction_level").split(",") if pair
+]
+# Combinations that still get a full analysis because the composed one reads poorly
+FULL_COMBINATIONS = [key for key in os.getenv("PROFILE_FULL_COMBINATIONS", "").split(",") if key]
 
 #### Precisionists Questions
 questions = [
@@ -73,12 +87,46 @@ def generate_all_combinations():
     return list(product(*options_per_question))
 def format_combination_for_analysis(combination):
     """Format a combination of answers into a readable format for analysis"""
-    formatted_answers = []
-    for q_idx, answer in enumerate(combination):
-        question = questions[q_idx]
-        answer_text = next(opt[1] for opt in question["options"] if opt[0] == answer)
-        formatted_answers.append(f"Q: {question['text']}\nA: {answer_text}")
-    return formatted_answers
+    return [format_answer(q_idx, answer) for q_idx, answer in enumerate(combination)]
+def get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        # retry_with_backoff owns retries
+        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+    return client
+def is_section(value):
+    """A {description, explanation} object with non-empty text in both"""
+    return isinstance(value, dict) and all(
+        isinstance(value.get(field), str) and value[field].strip() for field in ("description", "explanation")
+    )
+def is_valid_analysis(analysis):
+    return isinstance(analysis, dict) and all(is_section(analysis.get(s)) for s in ANALYSIS_SECTIONS)
+def is_valid_option_fragment(fragment):
+    return is_section(fragment) and ("accommodation" not in fragment or is_section(fragment["accommodation"]))
+def complete_json(prompt, is_valid=is_section, attempts=RESPONSE_ATTEMPTS):
+    """Send one prompt to GPT-4 and parse its JSON answer, asking again while the answer
+    is malformed or fails `is_valid`; None if no attempt succeeds"""
+    from openai import RateLimitError, APITimeoutError, APIConnectionError
+    for attempt in range(1, attempts + 1):
+        try:
+            response = retry_with_backoff(
+                get_client().chat.completions.create,
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                retry_on=(RateLimitError, APITimeoutError, APIConnectionError)
+            )
+            value = json.loads(response.choices[0].message.content)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Malformed JSON from OpenAI (attempt {attempt}/{attempts}): {e}")
+            continue
+        except Exception as e:
+            logger.error(f"Error in OpenAI API call: {e}")
+            return None
+        if is_valid(value):
+            return value
+        logger.warning(f"OpenAI response is missing required fields (attempt {attempt}/{attempts})")
+    return None
 def analyze_combination(answers):
     """Analyze a specific combination of answers using OpenAI API"""
     prompt = "\n".join([
@@ -109,42 +157,206 @@ def analyze_combination(answers):
         "Here are the responses:",
         *answers
     ])
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        logger.error(f"Error in OpenAI API call: {e}")
-        return None
-def main():
-    """Main function to generate and analyze all combinations"""
+    return complete_json(prompt, is_valid_analysis)
+def dimension_name(question):
+    """Analysis section a question feeds, e.g. work-style -> work_style"""
+    return question["task-id"].replace("-", "_")
+def format_answer(q_idx, option):
+    question = questions[q_idx]
+    answer_text = next(opt[1] for opt in question["options"] if opt[0] == option)
+    return f"Q: {question['text']}\nA: {answer_text}"
+def analyze_option(q_idx, option):
+    """Analyze one answer to one question; its section of any profile containing it"""
+    dimension = dimension_name(questions[q_idx]).replace("_", " ")
+    prompt = "\n".join([
+        f"Based on this assessment response, describe the candidate's {dimension}.",
+        "Your response MUST be valid JSON with these fields:",
+        f"- description: brief description of their {dimension},",
+        "- explanation: how this connects to their assessment answer,",
+        "- accommodation: {",
+        "    description: any specific need this answer implies,",
+        "    explanation: reasoning behind this accommodation",
+        "  }",
+        "",
+        "Here is the response:",
+        format_answer(q_idx, option)
+    ])
+    return complete_json(prompt, is_valid_option_fragment)
+def analyze_pair(first, second):
+    """Analyze how two answers ((q_idx, option) each) interact; feeds the accommodations section"""
+    prompt = "\n".join([
+        "Based on these two assessment responses, describe the workplace accommodations",
+        "their combination calls for. Your response MUST be valid JSON with these fields:",
+        "- description: brief description of the accommodations,",
+        "- explanation: reasoning behind these accommodations",
+        "",
+        "Here are the responses:",
+        format_answer(*first),
+        format_answer(*second)
+    ])
+    return complete_json(prompt)
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """Read completed analyses from the JSONL checkpoint, ignoring a torn last line"""
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping incomplete checkpoint line in {path}")
+                continue
+            completed[record["key"]] = record["value"]
+    return completed
+def repair_checkpoint(path):
+    """Drop a torn last line left by a crash mid-write, so the next append starts on its own line"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            logger.warning(f"Truncating incomplete last line of {path}")
+            f.truncate(data.rfind(b"\n") + 1)
+def append_checkpoint(f, key, value):
+    """Durably append one finished combination to the open checkpoint file"""
+    f.write(json.dumps({"key": key, "value": value}) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+def write_atomic(path, data):
+    """Write JSON to a temp file and rename it over `path` so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+def run_checkpointed(jobs, checkpoint_path, max_workers=MAX_WORKERS, resume=True):
+    """Run {key: zero-argument callable} on a worker pool, checkpointing each result as it
+    finishes; returns (completed, failed keys). A None result counts as a failure."""
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    repair_checkpoint(checkpoint_path)
+    completed = load_checkpoint(checkpoint_path)
+    remaining = [key for key in jobs if key not in completed]
+    logger.info(f"{len(jobs) - len(remaining)} already checkpointed, {len(remaining)} to analyze")
+    failed = []
+    with open(checkpoint_path, "a") as checkpoint, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(jobs[key]): key for key in remaining}
+        for future in as_completed(futures):
+            key = futures[future]
+            value = future.result()
+            if value is None:
+                failed.append(key)
+                continue
+            append_checkpoint(checkpoint, key, value)
+            completed[key] = value
+    return completed, failed
+def generate_combination(combo):
+    combo_key = "-".join(combo)
+    logger.info(f"Analyzing combination: {combo_key}")
+    formatted_answers = format_combination_for_analysis(combo)
+    analysis = analyze_combination(formatted_answers)
+    if not analysis:
+        return combo_key, None
+    return combo_key, {
+        "combination": combo,
+        "formatted_answers": formatted_answers,
+        "analysis": analysis
+    }
+def main(max_workers=MAX_WORKERS, resume=True, combinations=None, merge=False):
+    """Generate and analyze all (or the given) combinations on a worker pool, resuming from
+    the checkpoint; with merge, existing profiles in the output file are kept"""
     # Generate all possible combinations
-    combinations = generate_all_combinations()
+    if combinations is None:
+        combinations = generate_all_combinations()
     logger.info(f"Generated {len(combinations)} possible combinations")
-    # Create a dictionary to store all analyses
+    # Analyze the remaining combinations, checkpointing each as it finishes
+    jobs = {"-".join(c): (lambda c=c: generate_combination(c)[1]) for c in combinations}
+    completed, failed = run_checkpointed(jobs, CHECKPOINT_FILE, max_workers, resume)
+    if failed:
+        # A partial file would replace the complete one, and the app hot-reloads it;
+        # the checkpoint keeps the finished combinations for the next run
+        logger.error(f"Analysis failed for {len(failed)} combinations: {failed}. "
+                     f"Re-run to retry them; {OUTPUT_FILE} was left unchanged.")
+        return
+    # Assemble the results in combination order and save them atomically
     all_analyses = {}
-    # Analyze each combination
-    for combo in combinations:
-        combo_key = "-".join(combo)
-        logger.info(f"Analyzing combination: {combo_key}")
-        formatted_answers = format_combination_for_analysis(combo)
-        analysis = analyze_combination(formatted_answers)
-        if analysis:
-            all_analyses[combo_key] = {
-                "combination": combo,
-                "formatted_answers": formatted_answers,
-                "analysis": analysis
-            }
-    # Save results to a JSON file
-    output_file = "personality_analyses.json"
-    with open(output_file, "w") as f:
-        json.dump(all_analyses, f, indent=2)
-    logger.info(f"Analysis complete. Results saved to {output_file}")
+    if merge and os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE) as f:
+            all_analyses = json.load(f)
+    all_analyses.update({
+        "-".join(c): completed["-".join(c)] for c in combinations if "-".join(c) in completed
+    })
+    write_atomic(OUTPUT_FILE, all_analyses)
+    logger.info(f"Analysis complete. Results saved to {OUTPUT_FILE}")
+    os.remove(CHECKPOINT_FILE)
     # Print a sample analysis
-    sample_key = list(all_analyses.keys())[0]
-    logger.info("\nSample Analysis:")
-    pprint(all_analyses[sample_key])
+    if all_analyses:
+        sample_key = list(all_analyses.keys())[0]
+        logger.info("\nSample Analysis:")
+        pprint(all_analyses[sample_key])
+def fragment_jobs():
+    """{fragment key: callable} for every answer and every answer pair in FRAGMENT_PAIRS"""
+    index = {dimension_name(q): i for i, q in enumerate(questions)}
+    jobs = {}
+    for i, question in enumerate(questions):
+        for option, _ in question["options"]:
+            jobs[f"{dimension_name(question)}={option}"] = (lambda i=i, o=option: analyze_option(i, o))
+    for first, second in FRAGMENT_PAIRS:
+        i, j = index[first], index[second]
+        for a, _ in questions[i]["options"]:
+            for b, _ in questions[j]["options"]:
+                jobs[f"{first}={a}|{second}={b}"] = (lambda i=i, a=a, j=j, b=b: analyze_pair((i, a), (j, b)))
+    return jobs
+def assemble_fragments(completed):
+    """Lay out checkpointed fragments the way profile_store.compose_analysis reads them"""
+    fragments = {"dimensions": [dimension_name(q) for q in questions], "options": {}, "pairs": {}}
+    for key, value in completed.items():
+        parts = [part.split("=") for part in key.split("|")]
+        if len(parts) == 1:
+            (dimension, option), = parts
+            fragments["options"].setdefault(dimension, {})[option] = value
+        else:
+            (first, a), (second, b) = parts
+            fragments["pairs"].setdefault(f"{first}|{second}", {})[f"{a}-{b}"] = value
+    return fragments
+def generate_fragments(max_workers=MAX_WORKERS, resume=True, full_combinations=FULL_COMBINATIONS):
+    """Compositional mode: analyze each answer and configured answer pair once, so the cost
+    grows with the number of options rather than their product. Profiles are composed
+    from the fragments at request time; only `full_combinations` get a whole analysis."""
+    jobs = fragment_jobs()
+    logger.info(f"Compositional mode: {len(jobs)} fragment analyses instead of "
+                f"{len(generate_all_combinations())} full combinations")
+    completed, failed = run_checkpointed(jobs, FRAGMENT_CHECKPOINT_FILE, max_workers, resume)
+    if failed:
+        # Profiles cannot be composed from a file missing some answers; keep the checkpoint instead
+        logger.error(f"Analysis failed for {len(failed)} fragments: {failed}. "
+                     f"Re-run to retry them; {FRAGMENTS_FILE} was left unchanged.")
+    else:
+        write_atomic(FRAGMENTS_FILE, assemble_fragments({k: v for k, v in completed.items() if k in jobs}))
+        logger.info(f"Fragments saved to {FRAGMENTS_FILE}")
+        os.remove(FRAGMENT_CHECKPOINT_FILE)
+    if full_combinations:
+        main(max_workers, resume, [tuple(key.split("-")) for key in full_combinations], merge=True)
+def cli():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--compose", action="store_true",
+                        help="generate per-answer and pairwise fragments instead of every combination")
+    parser.add_argument("--full", nargs="*", default=FULL_COMBINATIONS,
+                        help="with --compose, combinations (e.g. A-B-C-A) that still get a full analysis")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--restart", action="store_true", help="ignore existing checkpoints")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.compose:
+        generate_fragments(args.workers, not args.restart, args.full)
+    else:
+        main(args.workers, not args.restart)
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from dotenv import load_dotenv
+    load_dotenv()
+    # Import afresh so OUTPUT_FILE, the checkpoints and PROFILE_* settings see .env
+    import automating_profiles
+    automating_profiles.cli()
\ No newline at end of file
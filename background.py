@@ -0,0 +1,80 @@
+import os
+import time
+import secrets
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "16"))
+RESULT_TTL = float(os.getenv("BACKGROUND_RESULT_TTL", "600"))
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+
+class TaskQueue:
+    """Runs slow calls (e.g. Bedrock) on a thread pool so request workers return immediately.
+
+    Results are kept for `result_ttl` seconds so the browser can poll for them.
+    The executor is created on first use, which keeps the queue safe to build
+    before a pre-fork server forks its workers.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, result_ttl: float = RESULT_TTL):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self._executor = None
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="background"
+            )
+        return self._executor
+
+    def submit(self, fn, *args, task_id: str = None) -> str:
+        task_id = task_id or secrets.token_urlsafe(16)
+        with self._lock:
+            self._purge_expired()
+            future = self._get_executor().submit(fn, *args)
+            self._tasks[task_id] = (future, time.monotonic())
+        return task_id
+
+    def status(self, task_id: str):
+        """Return (state, value) for a task, or (None, None) if it is unknown here"""
+        with self._lock:
+            entry = self._tasks.get(task_id)
+        if entry is None:
+            return None, None
+
+        future, _ = entry
+        if not future.done():
+            return PENDING, None
+        exc = future.exception()
+        if exc is not None:
+            logger.error(f"Background task {task_id} failed: {exc}")
+            return ERROR, exc
+        return DONE, future.result()
+
+    def _purge_expired(self):
+        cutoff = time.monotonic() - self.result_ttl
+        expired = [k for k, (f, t) in self._tasks.items() if f.done() and t < cutoff]
+        for k in expired:
+            del self._tasks[k]
+
+    def reset(self):
+        """Drop the executor and task table, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._executor = None
+            self._tasks = {}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
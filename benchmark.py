@@ -0,0 +1,358 @@
+# benchmark.py
+"""Reproducible benchmarks for the questionnaire flow, job ingestion and profile generation.
+
+Bedrock and OpenAI are replaced by the local servers in stub_servers, so runs
+need no credentials and upstream latency/error rates are under our control.
+
+    python benchmark.py flow --users 200 --concurrency 20 --bedrock-latency 1.5
+    python benchmark.py flow --url http://localhost:5000 --users 100
+    python benchmark.py ingest --jobs 500 --openai-latency 0.2
+    python benchmark.py profiles --openai-latency 0.5
+    python benchmark.py importtime --module app
+
+Pass --max-p95-ms / --min-throughput to exit non-zero on a regression, and
+--json to emit a machine-readable report. importtime always checks its p95,
+against IMPORTTIME_MAX_P95_MS unless --max-p95-ms is given.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import resource
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_servers import start_bedrock_stub, start_openai_stub
+
+# Number of options for Q1-Q4; users are spread across every profile key
+OPTION_COUNTS = [2, 2, 3, 2]
+FREE_RESPONSES = [
+    "I need a quiet place",
+    "quiet place please",
+    "Remote work with flexible hours and little small talk",
+    "",
+    "I like working with data and clear instructions",
+]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def max_rss_mb():
+    """Peak resident memory of this process (the in-process worker)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def configure_stubs(args):
+    """Start the stand-in servers and point the SDKs at them before the app is imported"""
+    bedrock = start_bedrock_stub(latency=args.bedrock_latency, error_rate=args.error_rate)
+    openai = start_openai_stub(latency=args.openai_latency, error_rate=args.error_rate)
+    os.environ.update({
+        "BEDROCK_ENDPOINT_URL": bedrock.url,
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "OPENAI_API_KEY": "stub",
+        "AWS_ACCESS_KEY_ID": "stub",
+        "AWS_SECRET_ACCESS_KEY": "stub",
+        "AWS_REGION": "us-east-1",
+        "BEDROCK_KB_ID": "stub-kb",
+    })
+    return bedrock, openai
+
+
+class LocalClient:
+    """Drives the app in-process through Flask's test client"""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data(as_text=True)
+
+    def post(self, path, data):
+        response = self.client.post(path, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class RemoteClient:
+    """Drives a running server over HTTP"""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path, allow_redirects=False, timeout=120)
+        return response.status_code, response.text
+
+    def post(self, path, data):
+        response = self.session.post(self.base_url + path, data=data, allow_redirects=False, timeout=120)
+        return response.status_code, response.text
+
+
+def run_user(client, user_id, timings, errors, lock):
+    """One simulated user: welcome, five questions, results (and any polling/stream)"""
+    def timed_request(stage, method, path, data=None):
+        start = time.perf_counter()
+        status, body = client.get(path) if method == "GET" else client.post(path, data)
+        elapsed = time.perf_counter() - start
+        with lock:
+            timings.setdefault(stage, []).append(elapsed)
+            if status >= 400 or "Something went wrong" in body:
+                errors.append((stage, status))
+        return status, body
+
+    flow_start = time.perf_counter()
+    timed_request("welcome", "GET", "/")
+    for question_id in range(1, 6):
+        timed_request("question_get", "GET", f"/question/{question_id}")
+        if question_id == 5:
+            answer = FREE_RESPONSES[user_id % len(FREE_RESPONSES)] or "no preference"
+        else:
+            answer = "ABC"[(user_id // (question_id + 1)) % OPTION_COUNTS[question_id - 1]]
+        timed_request("question_post", "POST", f"/question/{question_id}", {"answer": answer})
+    _, body = timed_request("results", "GET", "/results")
+
+    poll = re.search(r'data-url="([^"]+)"', body)
+    stream = re.search(r'data-stream-url="([^"]+)"', body)
+    if poll:
+        while True:
+            status, _ = timed_request("results_poll", "GET", poll.group(1))
+            if status != 202:
+                break
+            time.sleep(0.05)
+    elif stream:
+        timed_request("results_stream", "GET", stream.group(1))
+
+    with lock:
+        timings.setdefault("flow", []).append(time.perf_counter() - flow_start)
+
+
+def bench_flow(args):
+    if args.url:
+        make_client = lambda: RemoteClient(args.url)  # noqa: E731
+    else:
+        configure_stubs(args)
+        # Keep benchmark assessments out of the real database
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='wayfinder-bench-')}/app.db")
+        from app import app as flask_app, init_db, warm_up
+        init_db()
+        warm_up()
+        make_client = lambda: LocalClient(flask_app)  # noqa: E731
+
+    timings, errors, lock = {}, [], threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(run_user, make_client(), user_id, timings, errors, lock)
+            for user_id in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "benchmark": "flow",
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 2),
+        "flows_per_second": round(args.users / elapsed, 2),
+        "errors": len(errors),
+        "stages": {stage: summarize(values) for stage, values in sorted(timings.items())},
+    }
+    if not args.url:
+        report["max_rss_mb"] = max_rss_mb()
+    return report, timings.get("results", [])
+
+
+def bench_ingest(args):
+    configure_stubs(args)
+    import job_profile_analyzer
+
+    workdir = tempfile.mkdtemp(prefix="wayfinder-bench-")
+    cwd = os.getcwd()
+    try:
+        # create_database works on job_profiles.db in the current directory
+        os.chdir(workdir)
+        conn = job_profile_analyzer.create_database()
+        jobs = [
+            {"title": f"Analyst {i}", "company": "Bench Co", "description": f"Detail-oriented role number {i}"}
+            for i in range(args.jobs)
+        ]
+        start = time.perf_counter()
+        cold = job_profile_analyzer.analyze_and_store_jobs(
+            conn, jobs, max_in_flight=args.concurrency, requests_per_minute=args.requests_per_minute
+        )
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = job_profile_analyzer.analyze_and_store_jobs(conn, jobs, max_in_flight=args.concurrency)
+        warm_seconds = time.perf_counter() - start
+        conn.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "benchmark": "ingest",
+        "jobs": args.jobs,
+        "cold": dict(cold, seconds=round(cold_seconds, 2)),
+        "warm": dict(warm, seconds=round(warm_seconds, 2)),
+        "flows_per_second": round(args.jobs / cold_seconds, 2),
+        "max_rss_mb": max_rss_mb(),
+    }
+    return report, [cold_seconds]
+
+
+def bench_profiles(args):
+    configure_stubs(args)
+    workdir = tempfile.mkdtemp(prefix="wayfinder-bench-")
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        import automating_profiles
+        automating_profiles.OUTPUT_FILE = os.path.join(workdir, "personality_analyses.json")
+        automating_profiles.CHECKPOINT_FILE = os.path.join(workdir, "checkpoint.jsonl")
+        start = time.perf_counter()
+        automating_profiles.main(max_workers=args.concurrency, resume=False)
+        elapsed = time.perf_counter() - start
+        with open(automating_profiles.OUTPUT_FILE) as f:
+            generated = len(json.load(f))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "benchmark": "profiles",
+        "profiles": generated,
+        "seconds": round(elapsed, 2),
+        "flows_per_second": round(generated / elapsed, 2),
+        "max_rss_mb": max_rss_mb(),
+    }
+    return report, [elapsed]
+
+
+# Cold-import budget for importtime when --max-p95-ms is not given
+IMPORTTIME_MAX_P95_MS = float(os.getenv("IMPORTTIME_MAX_P95_MS", "1500"))
+
+# Heavy SDKs that must only load on first use, never while importing the web app
+DEFERRED_IMPORTS = ("boto3", "botocore", "openai", "bs4", "lxml", "numpy")
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from `python -X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def bench_importtime(args):
+    """Cold-import the module in fresh interpreters and report what it pulled in"""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    totals, modules = [], {}
+    for _ in range(args.repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+            capture_output=True, text=True, env=env,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {args.module} failed:\n{result.stderr[-2000:]}")
+        modules = parse_importtime(result.stderr)
+        totals.append(modules[args.module][1] / 1e6)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    deferred = sorted({name.split(".")[0] for name in modules} & set(DEFERRED_IMPORTS))
+    report = {
+        "benchmark": "importtime",
+        "module": args.module,
+        "runs": args.repeat,
+        "import_ms": summarize(totals),
+        "slowest_self_ms": {name: round(self_us / 1000, 2) for name, (self_us, _) in slowest},
+        "deferred_imports_loaded": deferred,
+    }
+    return report, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=["flow", "ingest", "profiles", "importtime"])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--bedrock-latency", type=float, default=0.5)
+    parser.add_argument("--openai-latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=float, default=6000)
+    parser.add_argument("--max-p95-ms", type=float, help="fail if the p95 of the headline stage exceeds this")
+    parser.add_argument("--min-throughput", type=float, help="fail if throughput falls below this")
+    parser.add_argument("--module", default="app", help="module to cold-import for importtime")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters for importtime")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list for importtime")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.benchmark == "importtime" and args.max_p95_ms is None:
+        args.max_p95_ms = IMPORTTIME_MAX_P95_MS
+
+    runners = {
+        "flow": bench_flow,
+        "ingest": bench_ingest,
+        "profiles": bench_profiles,
+        "importtime": bench_importtime,
+    }
+    report, headline = runners[args.benchmark](args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            if isinstance(value, dict):
+                print(f"{key}:")
+                for stage, stats in value.items():
+                    print(f"  {stage}: {stats}")
+            else:
+                print(f"{key}: {value}")
+
+    failed = False
+    p95_ms = percentile(headline, 0.95) * 1000
+    if args.max_p95_ms is not None and p95_ms > args.max_p95_ms:
+        print(f"REGRESSION: p95 {p95_ms:.1f}ms > {args.max_p95_ms}ms", file=sys.stderr)
+        failed = True
+    throughput = report.get("flows_per_second")
+    if args.min_throughput is not None and throughput is not None and throughput < args.min_throughput:
+        print(f"REGRESSION: throughput {throughput}/s < {args.min_throughput}/s", file=sys.stderr)
+        failed = True
+    if report.get("deferred_imports_loaded"):
+        print(f"REGRESSION: importing {args.module} loaded {report['deferred_imports_loaded']}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
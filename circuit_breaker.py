@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency that is currently failing or too slow"""
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for an external dependency.
+
+    Calls that raise or take longer than `slow_call_seconds` count as failures.
+    Once at least `min_calls` of the last `window` calls are recorded and the
+    failure rate reaches `failure_rate`, the circuit opens for `reset_seconds`;
+    after that a single trial call decides whether it closes again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+        slow_call_seconds: float = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "15")),
+        window: int = int(os.getenv("CIRCUIT_WINDOW", "20")),
+        min_calls: int = int(os.getenv("CIRCUIT_MIN_CALLS", "5")),
+        reset_seconds: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._results = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through right now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record(self, success: bool, seconds: float = 0.0):
+        ok = success and seconds <= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_in_flight = False
+                if ok:
+                    self._close()
+                else:
+                    self._open()
+                return
+            self._results.append(ok)
+            failures = self._results.count(False)
+            if (self.state == CLOSED and len(self._results) >= self.min_calls
+                    and failures / len(self._results) >= self.failure_rate):
+                self._open()
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def _open(self):
+        logger.warning(f"Opening {self.name} circuit")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+
+    def _close(self):
+        logger.info(f"Closing {self.name} circuit")
+        self.state = CLOSED
+        self._results.clear()
@@ -0,0 +1,99 @@
+# fake_bedrock.py
+"""Local stand-in for the Bedrock agent-runtime and runtime clients.
+
+Set BEDROCK_FAKE=true to run the app and tests without AWS credentials or
+network access. Only the calls rag_engine makes are implemented; the same
+fake serves as both the bedrock-agent-runtime and bedrock-runtime client.
+"""
+
+import os
+import time
+import uuid
+
+FAKE_LATENCY = float(os.getenv("BEDROCK_FAKE_LATENCY", "0"))
+FAKE_CHUNK_SIZE = int(os.getenv("BEDROCK_FAKE_CHUNK_SIZE", "24"))
+
+DEFAULT_ANSWER = (
+    "Based on your description, roles such as Data Quality Analyst, Research Assistant "
+    "and Technical Writer are a good fit. They offer focused, independent work with "
+    "predictable schedules and quiet workspaces."
+)
+
+
+class ValidationException(Exception):
+    """Carries a botocore-style `response` so callers can check the error code"""
+
+    def __init__(self, message="Validation error"):
+        super().__init__(message)
+        self.response = {"Error": {"Code": "ValidationException", "Message": message}}
+
+
+class _Exceptions:
+    ValidationException = ValidationException
+
+
+class FakeBedrockClient:
+    exceptions = _Exceptions
+
+    def __init__(self, answer=DEFAULT_ANSWER, latency=FAKE_LATENCY, chunk_size=FAKE_CHUNK_SIZE):
+        self.answer = answer
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def _answer_for(self, input):
+        if callable(self.answer):
+            return self.answer(input["text"])
+        return self.answer
+
+    def _chunks(self, text):
+        chunk_size = max(1, self.chunk_size)
+        return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def get_knowledge_base(self, knowledgeBaseId):
+        return {"status": "ACTIVE", "storageConfiguration": {"type": "FAKE"}}
+
+    def retrieve_and_generate(self, input, retrieveAndGenerateConfiguration, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "sessionId": str(uuid.uuid4()),
+            "output": {"text": self._answer_for(input)},
+            "citations": [],
+        }
+
+    def retrieve_and_generate_stream(self, input, retrieveAndGenerateConfiguration, **kwargs):
+        self.calls += 1
+        chunks = self._chunks(self._answer_for(input))
+        delay = self.latency / max(1, len(chunks))
+
+        def events():
+            for chunk in chunks:
+                time.sleep(delay)
+                yield {"output": {"text": chunk}}
+            yield {"citation": {"generatedResponsePart": {}, "retrievedReferences": []}}
+
+        return {"sessionId": str(uuid.uuid4()), "stream": events()}
+
+    def converse(self, modelId, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        text = self._answer_for({"text": messages[-1]["content"][0]["text"]})
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": "end_turn",
+        }
+
+    def converse_stream(self, modelId, messages, **kwargs):
+        self.calls += 1
+        chunks = self._chunks(self._answer_for({"text": messages[-1]["content"][0]["text"]}))
+        delay = self.latency / max(1, len(chunks))
+
+        def events():
+            yield {"messageStart": {"role": "assistant"}}
+            for chunk in chunks:
+                time.sleep(delay)
+                yield {"contentBlockDelta": {"delta": {"text": chunk}, "contentBlockIndex": 0}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+
+        return {"stream": events()}
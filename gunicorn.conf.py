@@ -0,0 +1,115 @@
+# gunicorn.conf.py
+"""Production server: `gunicorn -c gunicorn.conf.py`.
+
+The app is imported once in the master (preload_app), which also migrates the
+databases, refreshes precomputed recommendations and warms the profile index,
+rendered pages and retrieval data, so workers share them copy-on-write. Each worker then drops anything
+that must not cross a fork (boto3 clients, SQLAlchemy and SQLite connections,
+background threads) and recreates it for itself.
+
+`kill -HUP <master>` gracefully replaces the workers and re-reads this file;
+with preloading, new application code needs a full restart (or USR2 + WINCH).
+Profile data does not: ProfileStore reloads personality_analyses.json and
+profile_fragments.json itself.
+"""
+
+import gc
+import os
+import glob
+import logging
+import tempfile
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Sessions must be visible to every worker, so the per-process store is not an option
+if int(os.getenv("WEB_CONCURRENCY", "2")) > 1:
+    os.environ.setdefault("SESSION_BACKEND", "sqlite")
+# Workers write metric snapshots here so /metrics reports the whole server, not one worker
+os.environ.setdefault("METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"wayfinder-metrics-{os.getpid()}"))
+
+wsgi_app = "app:app"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+# Requests mostly wait on Bedrock/OpenAI, so each worker serves several at once
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+# Synchronous /results waits on Bedrock, which can take tens of seconds
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+_snapshot_writer = None
+
+
+def on_starting(server):
+    logging.basicConfig(level=logging.INFO)
+    # Snapshots left by an earlier server would be counted as live workers
+    directory = os.environ["METRICS_MULTIPROC_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded, before any worker forks"""
+    from app import init_db, refresh_precomputed_recommendations, warm_up
+    init_db()
+    refresh_precomputed_recommendations()
+    warm_up()
+    # Keep the warmed objects out of GC passes so children don't copy their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Give the new worker its own clients, connections and background threads"""
+    global _snapshot_writer
+    import app
+    import metrics
+    import rag_engine
+    import match_table
+    import job_search
+    import precomputed_recommendations
+
+    rag_engine.reset_clients()
+    if hasattr(rag_engine.cache, "reset_connections"):
+        rag_engine.cache.reset_connections()
+    if hasattr(app.app.session_interface, "reset_connections"):
+        app.app.session_interface.reset_connections()
+    match_table.reset_connections()
+    job_search.reset_connections()
+    precomputed_recommendations.reset_connections()
+    app.recommendation_queue.reset()
+    app.assessment_writer.reset()
+    with app.app.app_context():
+        # Leave the master's pooled connections open for it; just stop using them here
+        app.db.engine.dispose(close=False)
+    # The master's warm-up timings would otherwise be counted once per worker
+    metrics.registry.reset()
+    _snapshot_writer = metrics.SnapshotWriter()
+    _snapshot_writer.start()
+    try:
+        rag_engine.warm_up()
+    except Exception as e:
+        server.log.error(f"Bedrock warm-up failed in worker {worker.pid}: {e}")
+
+
+def worker_exit(server, worker):
+    """Flush queued assessments and metrics before the worker goes away"""
+    import app
+    app.assessment_writer.stop()
+    if _snapshot_writer is not None:
+        _snapshot_writer.stop()
+
+
+def child_exit(server, worker):
+    """Runs in the master: keep the exited worker's totals, drop its gauges"""
+    import metrics
+    metrics.archive_snapshot(worker.pid)
@@ -0,0 +1,245 @@
+# job_index.py
+"""Local vector index over the jobs table, an offline alternative to the Bedrock Knowledge Base.
+
+Any callable mapping a list of texts to an (n, dim) float32 array of
+L2-normalized rows can be used as the embedder. The default HashingEmbedder
+needs no network or model download.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("JOB_DB_PATH", "job_profiles.db")
+INDEX_DIR = os.getenv("JOB_INDEX_DIR", "job_index")
+EMBEDDING_DIM = int(os.getenv("JOB_INDEX_DIM", "4096"))
+# How often a worker checks whether the jobs table changed since the index was built
+CHECK_INTERVAL = float(os.getenv("JOB_INDEX_CHECK_INTERVAL", "60"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Feature-hashed bag of words and bigrams with sublinear TF and optional IDF weighting"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, idf: np.ndarray = None):
+        self.dim = dim
+        self.idf = idf
+
+    def _features(self, text: str):
+        tokens = _TOKEN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(feature.encode("utf-8"))
+            yield h % self.dim, 1.0 if h & 0x80000000 else -1.0
+
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for column, sign in self._features(text or ""):
+                matrix[row, column] += sign
+        return matrix
+
+    def fit(self, texts: List[str]) -> "HashingEmbedder":
+        """Learn IDF weights for each hash bucket from the corpus"""
+        document_frequency = np.count_nonzero(self._counts(texts), axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        matrix = self._counts(texts)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def job_text(job: Dict) -> str:
+    return f"{job['title']} {job['company']} {job['description']}"
+
+
+def corpus_fingerprint(conn: sqlite3.Connection) -> str:
+    """Changes whenever jobs are added, removed, reclassified or edited"""
+    digest = hashlib.sha256()
+    for row in conn.execute(
+        "SELECT job_id, content_hash, profile_id, length(title), length(description) FROM jobs ORDER BY job_id"
+    ):
+        digest.update(repr(row).encode())
+    return digest.hexdigest()
+
+
+def _replace_file(path: str, write):
+    """Write through a temp file so a concurrent load never sees a half-written file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class JobIndex:
+    """Row-normalized job vectors searched with a single matrix-vector product"""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        jobs: List[Dict],
+        embed: Callable[[List[str]], np.ndarray],
+        fingerprint: str = None,
+    ):
+        self.vectors = vectors
+        self.jobs = jobs
+        self.embed = embed
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, embed: Callable = None) -> "JobIndex":
+        rows = conn.execute(
+            "SELECT job_id, title, company, description, profile_id FROM jobs ORDER BY job_id"
+        ).fetchall()
+        jobs = [
+            {"job_id": r[0], "title": r[1], "company": r[2], "description": r[3], "profile_id": r[4]}
+            for r in rows
+        ]
+        texts = [job_text(j) for j in jobs]
+        if embed is None:
+            embed = HashingEmbedder().fit(texts)
+        vectors = embed(texts) if texts else np.zeros((0, getattr(embed, "dim", EMBEDDING_DIM)), np.float32)
+        logger.info(f"Built job index with {len(jobs)} jobs")
+        return cls(np.ascontiguousarray(vectors, dtype=np.float32), jobs, embed, corpus_fingerprint(conn))
+
+    def save(self, directory: str = INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+
+        def save_array(array):
+            def write(path):
+                with open(path, "wb") as f:
+                    np.save(f, array)
+            return write
+
+        def save_json(data):
+            def write(path):
+                with open(path, "w") as f:
+                    json.dump(data, f)
+            return write
+
+        _replace_file(os.path.join(directory, "vectors.npy"), save_array(self.vectors))
+        if isinstance(self.embed, HashingEmbedder) and self.embed.idf is not None:
+            _replace_file(os.path.join(directory, "idf.npy"), save_array(self.embed.idf))
+        _replace_file(os.path.join(directory, "jobs.json"), save_json(self.jobs))
+        # Written last: a fingerprint on disk means the files before it are complete
+        _replace_file(os.path.join(directory, "meta.json"), save_json({"fingerprint": self.fingerprint}))
+        logger.info(f"Saved job index to {directory}")
+
+    @classmethod
+    def load(cls, directory: str = INDEX_DIR, embed: Callable = None) -> "JobIndex":
+        """Memory-map the saved vectors so worker processes share the same pages"""
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "jobs.json")) as f:
+            jobs = json.load(f)
+        meta_path = os.path.join(directory, "meta.json")
+        fingerprint = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                fingerprint = json.load(f).get("fingerprint")
+        if len(jobs) != vectors.shape[0]:
+            # Caught between another process's file replacements; treat as stale
+            fingerprint = None
+        if embed is None:
+            idf_path = os.path.join(directory, "idf.npy")
+            idf = np.load(idf_path) if os.path.exists(idf_path) else None
+            embed = HashingEmbedder(dim=vectors.shape[1], idf=idf)
+        return cls(vectors, jobs, embed, fingerprint)
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """Top-k jobs by cosine similarity to the query"""
+        k = min(k, len(self.jobs))
+        if k <= 0:
+            return []
+        scores = self.vectors @ self.embed([query])[0]
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [dict(self.jobs[i], score=float(scores[i])) for i in top]
+
+    def __len__(self):
+        return len(self.jobs)
+
+
+_default_index = None
+_last_check = 0.0
+_default_lock = threading.Lock()
+
+
+def _current_fingerprint():
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        return corpus_fingerprint(conn)
+    finally:
+        conn.close()
+
+
+def _rebuild() -> JobIndex:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        index = JobIndex.build(conn)
+    finally:
+        conn.close()
+    index.save(INDEX_DIR)
+    return JobIndex.load(INDEX_DIR)
+
+
+def get_default_index() -> JobIndex:
+    """The saved index, rebuilt from the jobs table when it is missing or the jobs changed.
+
+    The jobs table is re-checked at most every CHECK_INTERVAL seconds, by one
+    thread; the others keep searching the current index meanwhile.
+    """
+    global _default_index, _last_check
+    if _default_index is not None and time.monotonic() - _last_check < CHECK_INTERVAL:
+        return _default_index
+    if not _default_lock.acquire(blocking=_default_index is None):
+        return _default_index
+    try:
+        if _default_index is not None and time.monotonic() - _last_check < CHECK_INTERVAL:
+            return _default_index
+        _last_check = time.monotonic()
+        index = _default_index
+        if index is None and os.path.exists(os.path.join(INDEX_DIR, "vectors.npy")):
+            index = JobIndex.load(INDEX_DIR)
+        try:
+            fingerprint = _current_fingerprint()
+        except sqlite3.Error as e:
+            if index is None:
+                raise
+            logger.error(f"Cannot check the jobs table, keeping the current job index: {e}")
+            fingerprint = index.fingerprint
+        if index is None or index.fingerprint != fingerprint:
+            # Another worker may already have saved an index of the current jobs
+            saved = JobIndex.load(INDEX_DIR) if os.path.exists(os.path.join(INDEX_DIR, "meta.json")) else None
+            index = saved if saved is not None and saved.fingerprint == fingerprint else _rebuild()
+        _default_index = index
+        return index
+    finally:
+        _default_lock.release()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(DB_PATH)
+    JobIndex.build(conn).save(INDEX_DIR)
+    conn.close()
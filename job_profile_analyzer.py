@@ -1,20 +1,31 @@
 import os
+import re
 import json
-from openai import OpenAI
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-from dotenv import load_dotenv
 import sqlite3
 from typing import Dict, List, Tuple
+from rate_limit import TokenBucket, retry_with_backoff
+from match_table import create_match_table, refresh_matches, parse_profile_key
+import job_schema
+from metrics import external_call, timed_function
 
-# Load environment variables
-load_dotenv()
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# OpenAI client, created on first use so importing this module stays cheap
+client = None
+
+# Classification cache key parts; bump PROMPT_VERSION whenever the prompt changes
+MODEL = "gpt-4"
+PROMPT_VERSION = "1"
+
+# Ingestion tuning: concurrent GPT-4 calls, request rate and rows per INSERT batch
+MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("INGEST_REQUESTS_PER_MINUTE", "300"))
+MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+INSERT_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
 
 # Questions from app.py (same as used for user profiles)
 questions = [
@@ -53,8 +64,19 @@ questions = [
     }
 ]
 
-def analyze_job_description(job_description: str) -> str:
-    """Analyze a job description to determine its profile match"""
+def get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        # retry_with_backoff owns retries, so callers can throttle every attempt
+        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+    return client
+
+def analyze_job_description(job_description: str, bucket: TokenBucket = None) -> str:
+    """Analyze a job description to determine its profile match
+
+    If a token bucket is given, every attempt (including retries) takes a token from it.
+    """
     prompt = f"""
     Based on the following job description, determine which profile combination (A-A-A-A format) best matches the job's requirements.
     Consider these aspects:
@@ -69,88 +91,221 @@ def analyze_job_description(job_description: str) -> str:
     {job_description}
     """
     
+    from openai import RateLimitError, APITimeoutError, APIConnectionError
+
+    def create(**kwargs):
+        if bucket is not None:
+            bucket.acquire()
+        return get_client().chat.completions.create(**kwargs)
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with external_call("openai"):
+            response = retry_with_backoff(
+                create,
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                retry_on=(RateLimitError, APITimeoutError, APIConnectionError),
+                max_attempts=MAX_ATTEMPTS
+            )
         return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"Error analyzing job description: {e}")
         return None
 
-def create_database():
+def create_database(path: str = 'job_profiles.db'):
     """Create SQLite database for storing profiles and job matches"""
-    conn = sqlite3.connect('job_profiles.db')
+    conn = job_schema.connect(path)
     cursor = conn.cursor()
-    
-    # Create tables
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS profiles (
-        profile_id TEXT PRIMARY KEY,
-        work_style TEXT,
-        environment TEXT,
-        interaction_level TEXT,
-        task_preference TEXT,
-        accommodations TEXT
-    )
-    ''')
-    
+
+    # profiles, profile_sections, jobs and the full-text index
+    job_schema.migrate(conn)
+
     cursor.execute('''
-    CREATE TABLE IF NOT EXISTS jobs (
-        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT,
-        company TEXT,
-        description TEXT,
+    CREATE TABLE IF NOT EXISTS classification_cache (
+        description_hash TEXT,
+        model TEXT,
+        prompt_version TEXT,
         profile_id TEXT,
-        FOREIGN KEY (profile_id) REFERENCES profiles (profile_id)
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (description_hash, model, prompt_version)
     )
     ''')
-    
+
+    create_match_table(conn)
+    _migrate_job_hashes(conn)
+    # Jobs stored before the match table existed would otherwise never be ranked
+    if conn.execute("SELECT 1 FROM profile_job_matches LIMIT 1").fetchone() is None:
+        refresh_matches(conn)
     conn.commit()
     return conn
 
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "")).strip().lower()
+
+def description_hash(description: str) -> str:
+    """Hash of the normalized description, used to key the classification cache"""
+    return hashlib.sha256(_normalize_text(description).encode("utf-8")).hexdigest()
+
+def job_hash(job: Dict) -> str:
+    """Hash identifying a posting; identical postings collapse to one jobs row"""
+    parts = (job.get('title'), job.get('company'), job.get('description'))
+    return hashlib.sha256("\x1f".join(_normalize_text(p) for p in parts).encode("utf-8")).hexdigest()
+
+def _migrate_job_hashes(conn: sqlite3.Connection):
+    """Add and backfill jobs.content_hash on older databases, dropping duplicate rows"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if 'content_hash' not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN content_hash TEXT")
+
+    rows = conn.execute(
+        "SELECT job_id, title, company, description FROM jobs WHERE content_hash IS NULL"
+    ).fetchall()
+    conn.executemany("UPDATE jobs SET content_hash = ? WHERE job_id = ?", [
+        (job_hash({'title': t, 'company': c, 'description': d}), job_id)
+        for job_id, t, c, d in rows
+    ])
+    deleted = conn.execute('''
+    DELETE FROM jobs WHERE job_id NOT IN (
+        SELECT MIN(job_id) FROM jobs GROUP BY content_hash
+    )
+    ''').rowcount
+    if deleted:
+        conn.execute("DELETE FROM profile_job_matches WHERE job_id NOT IN (SELECT job_id FROM jobs)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_content_hash ON jobs (content_hash)")
+
+@timed_function("load_profiles")
 def load_profiles(conn: sqlite3.Connection):
     """Load profiles from the generated JSON file into the database"""
     try:
         with open('personality_analyses.json', 'r') as f:
             profiles = json.load(f)
             
-        cursor = conn.cursor()
+        sections = []
         for profile_id, data in profiles.items():
-            analysis = data['analysis']
-            cursor.execute('''
-            INSERT OR REPLACE INTO profiles 
-            (profile_id, work_style, environment, interaction_level, task_preference, accommodations)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                profile_id,
-                json.dumps(analysis['work_style']),
-                json.dumps(analysis['environment']),
-                json.dumps(analysis['interaction_level']),
-                json.dumps(analysis['task_preference']),
-                json.dumps(analysis['accommodations'])
-            ))
-        
+            key = parse_profile_key(profile_id)
+            if not key:
+                logger.warning(f"Skipping profile with invalid key: {profile_id}")
+                continue
+            for section, content in data['analysis'].items():
+                sections.append((key, section, content.get('description'), content.get('explanation')))
+
+        conn.executemany('''
+        INSERT OR REPLACE INTO profile_sections (profile_id, section, description, explanation)
+        VALUES (?, ?, ?, ?)
+        ''', sections)
         conn.commit()
         logger.info("Successfully loaded profiles into database")
     except Exception as e:
         logger.error(f"Error loading profiles: {e}")
 
-def analyze_and_store_jobs(conn: sqlite3.Connection, jobs: List[Dict]):
-    """Analyze job descriptions and store them in the database"""
-    cursor = conn.cursor()
-    
+@timed_function("analyze_and_store_jobs")
+def analyze_and_store_jobs(
+    conn: sqlite3.Connection,
+    jobs: List[Dict],
+    max_in_flight: int = MAX_IN_FLIGHT,
+    requests_per_minute: float = REQUESTS_PER_MINUTE,
+    batch_size: int = INSERT_BATCH_SIZE
+) -> Dict:
+    """Analyze job descriptions concurrently and upsert them into the database
+
+    Descriptions already in the classification cache (same normalized text,
+    model and prompt version) are not sent to the LLM again. At most
+    `max_in_flight` classifications run at once, throttled to
+    `requests_per_minute`. Results are written with batched executemany
+    calls inside a single transaction.
+    """
+    start = time.perf_counter()
+    bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=max_in_flight)
+
+    # Collapse duplicate postings within the feed itself
+    unique_jobs = {}
     for job in jobs:
-        profile_id = analyze_job_description(job['description'])
+        unique_jobs.setdefault(job_hash(job), job)
+
+    cached = _cached_classifications(conn, [description_hash(j['description']) for j in unique_jobs.values()])
+    pending = []
+    batch = []
+    for content_hash, job in unique_jobs.items():
+        profile_id = parse_profile_key(cached.get(description_hash(job['description'])))
         if profile_id:
-            cursor.execute('''
-            INSERT INTO jobs (title, company, description, profile_id)
+            batch.append((job['title'], job['company'], job['description'], profile_id, content_hash))
+        else:
+            pending.append((content_hash, job))
+
+    def classify(job):
+        # Free-form model output; anything that is not a valid key counts as a failure
+        return parse_profile_key(analyze_job_description(job['description'], bucket=bucket))
+
+    stored = failed = 0
+    stored_hashes = []
+    with conn, ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        futures = {pool.submit(classify, job): (content_hash, job) for content_hash, job in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            content_hash, job = futures[future]
+            profile_id = future.result()
+            if not profile_id:
+                failed += 1
+                continue
+            conn.execute('''
+            INSERT OR REPLACE INTO classification_cache (description_hash, model, prompt_version, profile_id)
             VALUES (?, ?, ?, ?)
-            ''', (job['title'], job['company'], job['description'], profile_id))
-    
-    conn.commit()
-    logger.info("Successfully analyzed and stored jobs")
+            ''', (description_hash(job['description']), MODEL, PROMPT_VERSION, profile_id))
+            batch.append((job['title'], job['company'], job['description'], profile_id, content_hash))
+            if len(batch) >= batch_size:
+                stored += _upsert_jobs(conn, batch)
+                stored_hashes += [row[-1] for row in batch]
+                batch = []
+                logger.info(f"Classified {done}/{len(pending)} jobs")
+        if batch:
+            stored += _upsert_jobs(conn, batch)
+            stored_hashes += [row[-1] for row in batch]
+
+        # Keep the precomputed profile rankings in step with the new rows
+        refresh_matches(conn, _job_ids_for_hashes(conn, stored_hashes))
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "jobs": len(jobs),
+        "duplicates": len(jobs) - len(unique_jobs),
+        "cached": len(unique_jobs) - len(pending),
+        "classified": len(pending) - failed,
+        "stored": stored,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "jobs_per_second": round(len(jobs) / elapsed, 2) if elapsed else 0.0,
+    }
+    logger.info(f"Successfully analyzed and stored jobs: {report}")
+    return report
+
+def _cached_classifications(conn: sqlite3.Connection, hashes: List[str]) -> Dict[str, str]:
+    """Look up cached profile ids for the current model and prompt version"""
+    found = {}
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(conn.execute(f'''
+        SELECT description_hash, profile_id FROM classification_cache
+        WHERE model = ? AND prompt_version = ? AND description_hash IN ({placeholders})
+        ''', (MODEL, PROMPT_VERSION, *chunk)).fetchall())
+    return found
+
+def _job_ids_for_hashes(conn: sqlite3.Connection, hashes: List[str]) -> List[int]:
+    job_ids = []
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        job_ids += [row[0] for row in conn.execute(
+            f"SELECT job_id FROM jobs WHERE content_hash IN ({placeholders})", chunk
+        )]
+    return job_ids
+
+def _upsert_jobs(conn: sqlite3.Connection, rows: List[Tuple]) -> int:
+    conn.executemany('''
+    INSERT INTO jobs (title, company, description, profile_id, content_hash)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (content_hash) DO UPDATE SET profile_id = excluded.profile_id
+    ''', rows)
+    return len(rows)
 
 def main():
     # Create and initialize database
@@ -178,4 +333,9 @@ def main():
     conn.close()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    from dotenv import load_dotenv
+    load_dotenv()
+    # The INGEST_* settings are read at import; re-import so they see .env
+    import job_profile_analyzer
+    logging.basicConfig(level=logging.INFO)
+    job_profile_analyzer.main() 
\ No newline at end of file
@@ -0,0 +1,269 @@
+# job_schema.py
+"""Normalized schema for job_profiles.db.
+
+Profile keys are validated by CHECK constraints and split into one generated,
+indexed column per answer dimension, profile sections live in their own rows
+instead of JSON blobs, and jobs.title/description are indexed with FTS5. A
+query such as "minimal interaction, detailed tasks, mentions data" becomes
+index lookups:
+
+    find_jobs(conn, "data", interaction_level="A", task_preference="A")
+
+Run `python job_schema.py` to migrate an existing database in place.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+from match_table import DIMENSION_OPTIONS, all_profile_keys, parse_profile_key
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("JOB_DB_PATH", "job_profiles.db")
+SCHEMA_VERSION = 2
+CACHE_SIZE_MB = int(os.getenv("JOB_DB_CACHE_MB", "32"))
+MMAP_SIZE_MB = int(os.getenv("JOB_DB_MMAP_MB", "256"))
+
+# Answer dimension columns, in profile key order
+DIMENSIONS = ("work_style", "environment", "interaction_level", "task_preference")
+
+_WORD = re.compile(r"\w+")
+
+
+def _dimension_columns() -> str:
+    """Generated columns deriving each dimension from profile_id ("A-B-C-A")"""
+    return ",\n".join(
+        f"    {name} TEXT GENERATED ALWAYS AS (substr(profile_id, {2 * i + 1}, 1)) VIRTUAL"
+        for i, name in enumerate(DIMENSIONS)
+    )
+
+
+def _profile_key_check() -> str:
+    pattern = "-".join(f"[{''.join(options)}]" for options in DIMENSION_OPTIONS)
+    return f"profile_id GLOB '{pattern}'"
+
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """WAL so readers never block the ingester, plus cache/mmap sizing"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_MB * 1024}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_MB * 1024 * 1024}")
+    return conn
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    return configure_connection(sqlite3.connect(path, timeout=10))
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _create_profiles(conn: sqlite3.Connection):
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS profiles (
+        profile_id TEXT PRIMARY KEY CHECK ({_profile_key_check()}),
+    {_dimension_columns()}
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS profile_sections (
+        profile_id TEXT NOT NULL REFERENCES profiles (profile_id) ON DELETE CASCADE,
+        section TEXT NOT NULL,
+        description TEXT,
+        explanation TEXT,
+        PRIMARY KEY (profile_id, section)
+    ) WITHOUT ROWID
+    ''')
+    # Every valid key has a row, so jobs can reference profiles before they are generated
+    conn.executemany("INSERT OR IGNORE INTO profiles (profile_id) VALUES (?)", [(k,) for k in all_profile_keys()])
+
+
+def _create_jobs(conn: sqlite3.Connection):
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        company TEXT,
+        description TEXT,
+        profile_id TEXT REFERENCES profiles (profile_id) CHECK ({_profile_key_check()}),
+        content_hash TEXT,
+    {_dimension_columns()}
+    )
+    ''')
+    for name in DIMENSIONS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_jobs_{name} ON jobs ({name})")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_profile_id ON jobs (profile_id)")
+
+
+def _create_fts(conn: sqlite3.Connection):
+    """External-content FTS5 index kept in step with jobs by triggers"""
+    try:
+        conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            title, description, content='jobs', content_rowid='job_id', tokenize='porter unicode61'
+        )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 is not available; full-text job search is disabled: {e}")
+        return
+    # Separate statements: executescript would commit the caller's transaction
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts (rowid, title, description) VALUES (new.job_id, new.title, new.description);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, title, description)
+        VALUES ('delete', old.job_id, old.title, old.description);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, description ON jobs BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, title, description)
+        VALUES ('delete', old.job_id, old.title, old.description);
+        INSERT INTO jobs_fts (rowid, title, description) VALUES (new.job_id, new.title, new.description);
+    END
+    ''')
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone() is not None
+
+
+def _migrate_profiles(conn: sqlite3.Connection):
+    """Move the old JSON-blob profile columns into profile_sections"""
+    old = conn.execute("SELECT * FROM profiles_old").fetchall()
+    names = _columns(conn, "profiles_old")[1:]
+    _create_profiles(conn)
+    sections = []
+    for profile_id, *blobs in old:
+        key = parse_profile_key(profile_id)
+        if not key:
+            continue
+        for section, blob in zip(names, blobs):
+            try:
+                data = json.loads(blob) if blob else {}
+            except ValueError:
+                data = {"description": blob}
+            sections.append((key, section, data.get("description"), data.get("explanation")))
+    conn.executemany('''
+    INSERT OR REPLACE INTO profile_sections (profile_id, section, description, explanation)
+    VALUES (?, ?, ?, ?)
+    ''', sections)
+    conn.execute("DROP TABLE profiles_old")
+
+
+def _migrate_jobs(conn: sqlite3.Connection):
+    """Copy jobs into the new table, keeping only profile ids that parse as valid keys"""
+    has_hash = "content_hash" in _columns(conn, "jobs_old")
+    rows = conn.execute(
+        f"SELECT job_id, title, company, description, profile_id, "
+        f"{'content_hash' if has_hash else 'NULL'} FROM jobs_old"
+    ).fetchall()
+    _create_jobs(conn)
+    invalid = 0
+    migrated = []
+    for job_id, title, company, description, raw_profile, content_hash in rows:
+        key = parse_profile_key(raw_profile)
+        invalid += key is None
+        migrated.append((job_id, title, company, description, key, content_hash))
+    conn.executemany('''
+    INSERT INTO jobs (job_id, title, company, description, profile_id, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', migrated)
+    conn.execute("DROP TABLE jobs_old")
+    if invalid:
+        logger.warning(f"{invalid} jobs had no valid profile key and were left unclassified")
+
+
+def migrate(conn: sqlite3.Connection):
+    """Create or upgrade the schema to SCHEMA_VERSION; safe to call on every start"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+
+    # Tables are rebuilt, so foreign keys are checked once at the end instead of per row
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        with conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "profiles" in tables and "accommodations" in _columns(conn, "profiles"):
+                conn.execute("ALTER TABLE profiles RENAME TO profiles_old")
+                _migrate_profiles(conn)
+            _create_profiles(conn)
+
+            if "jobs" in tables and "work_style" not in _columns(conn, "jobs"):
+                conn.execute("ALTER TABLE jobs RENAME TO jobs_old")
+                _migrate_jobs(conn)
+            _create_jobs(conn)
+
+            _create_fts(conn)
+            if has_fts(conn):
+                conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+            violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if violations:
+                raise sqlite3.IntegrityError(f"Foreign key violations after migration: {violations[:5]}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+    logger.info(f"Migrated job database to schema version {SCHEMA_VERSION}")
+
+
+def fts_query(text: str, operator: str = "AND") -> Optional[str]:
+    """Quote each word so user input cannot be parsed as FTS5 query syntax"""
+    words = _WORD.findall(text or "")
+    return f" {operator} ".join(f'"{w}"' for w in words) or None
+
+
+def find_jobs(conn: sqlite3.Connection, text: str = None, limit: int = 20, **dimensions) -> List[Dict]:
+    """Jobs filtered by dimension values (e.g. interaction_level="A") and optional full-text terms"""
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+
+    where, params = [], []
+    for name, value in dimensions.items():
+        if value is not None:
+            where.append(f"j.{name} = ?")
+            params.append(value)
+
+    query = fts_query(text)
+    if query and has_fts(conn):
+        source = "jobs_fts JOIN jobs j ON j.job_id = jobs_fts.rowid"
+        where.insert(0, "jobs_fts MATCH ?")
+        params.insert(0, query)
+        order = "bm25(jobs_fts)"
+    else:
+        source = "jobs j"
+        order = "j.job_id DESC"
+        # Without FTS5 fall back to (unindexed) substring matching
+        for word in _WORD.findall(text or ""):
+            where.append("(j.title LIKE ? OR j.description LIKE ?)")
+            params += [f"%{word}%", f"%{word}%"]
+
+    sql = f"SELECT j.job_id, j.title, j.company, j.description, j.profile_id FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT ?"
+    rows = conn.execute(sql, (*params, limit)).fetchall()
+    return [
+        {"job_id": r[0], "title": r[1], "company": r[2], "description": r[3], "profile_id": r[4]}
+        for r in rows
+    ]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    conn = connect()
+    migrate(conn)
+    conn.close()
@@ -0,0 +1,127 @@
+# job_search.py
+"""Local hybrid job search over job_profiles.db.
+
+Each job is scored by BM25 relevance of its title/description to free text
+(via the jobs_fts index) blended with how many of the four answer dimensions
+it shares with the searcher's profile. Results are ordered by (score, job_id)
+and paginated with opaque keyset cursors, so deep pages cost the same as the
+first one and stay stable while new jobs are ingested.
+"""
+
+import os
+import json
+import base64
+import sqlite3
+from typing import Dict, Optional
+from job_schema import DB_PATH, DIMENSIONS, fts_query, has_fts
+from match_table import normalize_profile_key
+from thread_connections import ThreadConnections
+
+TEXT_WEIGHT = float(os.getenv("SEARCH_TEXT_WEIGHT", "0.6"))
+PROFILE_WEIGHT = float(os.getenv("SEARCH_PROFILE_WEIGHT", "0.4"))
+MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "50"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(score: float, job_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, job_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    try:
+        score, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), int(job_id)
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+# Per-thread read-only connections for request-time searches
+_connections = ThreadConnections(DB_PATH, configure=lambda conn: conn.execute("PRAGMA query_only=ON"))
+
+
+def reset_connections():
+    _connections.reset()
+
+
+def search_jobs(
+    text: str = None,
+    profile_key: str = None,
+    limit: int = 10,
+    cursor: str = None,
+    conn: sqlite3.Connection = None,
+) -> Dict:
+    """One page of jobs ranked by text relevance and profile similarity, plus the next cursor"""
+    conn = conn or _connections.get()
+    limit = max(1, min(limit, MAX_LIMIT))
+    profile_key = normalize_profile_key(profile_key) if profile_key else None
+    answers = profile_key.split("-") if profile_key else [None] * len(DIMENSIONS)
+    # Any term may match; BM25 ranks jobs matching more (and rarer) terms higher
+    query = fts_query(text, operator="OR")
+
+    params = {f"d{i}": a for i, a in enumerate(answers)}
+    profile_expr = "(" + " + ".join(
+        f"IFNULL(j.{name} = :d{i}, 0)" for i, name in enumerate(DIMENSIONS)
+    ) + f") / {float(len(DIMENSIONS))}"
+
+    where = []
+    if query and has_fts(conn):
+        source = "jobs_fts JOIN jobs j ON j.job_id = jobs_fts.rowid"
+        where.append("jobs_fts MATCH :query")
+        params["query"] = query
+        # bm25() is negative and unbounded; map it onto 0..1
+        text_expr = "(-bm25(jobs_fts) / (1.0 - bm25(jobs_fts)))"
+    else:
+        source = "jobs j"
+        text_expr = "0.0"
+        # Without FTS5 still honour the text as an (unranked) substring filter
+        for n, word in enumerate((query or "").replace('"', "").split(" OR ")):
+            where.append(f"(j.title LIKE :w{n} OR j.description LIKE :w{n})")
+            params[f"w{n}"] = f"%{word}%"
+
+    if query and profile_key:
+        total = TEXT_WEIGHT + PROFILE_WEIGHT
+        text_weight, profile_weight = TEXT_WEIGHT / total, PROFILE_WEIGHT / total
+    elif query:
+        text_weight, profile_weight = 1.0, 0.0
+    else:
+        text_weight, profile_weight = 0.0, 1.0
+
+    params.update(text_weight=text_weight, profile_weight=profile_weight, limit=limit + 1)
+    params["cursor_score"], params["cursor_id"] = decode_cursor(cursor) if cursor else (None, None)
+
+    sql = f'''
+    SELECT job_id, title, company, description, profile_id, text_score, profile_score, score FROM (
+        SELECT j.job_id, j.title, j.company, j.description, j.profile_id,
+               {text_expr} AS text_score,
+               {profile_expr} AS profile_score,
+               ROUND(:text_weight * {text_expr} + :profile_weight * {profile_expr}, 6) AS score
+        FROM {source}
+        {"WHERE " + " AND ".join(where) if where else ""}
+    )
+    WHERE :cursor_score IS NULL
+       OR score < :cursor_score
+       OR (score = :cursor_score AND job_id < :cursor_id)
+    ORDER BY score DESC, job_id DESC
+    LIMIT :limit
+    '''
+    rows = conn.execute(sql, params).fetchall()
+
+    results = [{
+        "job_id": job_id,
+        "title": title,
+        "company": company,
+        "description": description,
+        "profile_id": job_profile,
+        "score": round(score * 100, 2),
+        "text_score": round(text_score, 4),
+        "profile_score": round(profile_score, 4),
+    } for job_id, title, company, description, job_profile, text_score, profile_score, score in rows[:limit]]
+
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[-1], last[0])
+    return {"results": results, "next_cursor": next_cursor, "profile_key": profile_key}
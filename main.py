@@ -1,4 +1,14 @@
-from app import app
+import logging
+from dotenv import load_dotenv
+
+# Load environment variables before the app reads its configuration
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from app import app, init_db, refresh_precomputed_recommendations, warm_up  # noqa: E402
 
 if __name__ == "__main__":
+    init_db()
+    refresh_precomputed_recommendations()
+    warm_up()
     app.run(host="0.0.0.0", port=5000, debug=True)
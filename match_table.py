@@ -0,0 +1,160 @@
+# match_table.py
+"""Precomputed profile-to-job ranking stored in job_profiles.db.
+
+Every job is scored against every profile key by Hamming distance across the
+four answer dimensions, and the best TOP_N jobs per profile are kept in an
+indexed table so /results can fetch them with a single lookup.
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from itertools import product
+from typing import Dict, Iterable, List, Optional
+from thread_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("JOB_DB_PATH", "job_profiles.db")
+MAX_DISTANCE = int(os.getenv("MATCH_MAX_DISTANCE", "1"))
+TOP_N = int(os.getenv("MATCH_TOP_N", "20"))
+
+# Options for Q1-Q4, in profile key order
+DIMENSION_OPTIONS = (("A", "B"), ("A", "B"), ("A", "B", "C"), ("A", "B"))
+_KEY = r"([A-C])\s*-\s*([A-C])\s*-\s*([A-C])\s*-\s*([A-C])"
+# Not part of a longer dash-separated run such as "A-A-A-A-B"
+_PROFILE_KEY = re.compile(rf"(?<![\w-]){_KEY}(?![\w-])")
+_EXACT_PROFILE_KEY = re.compile(_KEY)
+
+
+def all_profile_keys() -> List[str]:
+    return ["-".join(combo) for combo in product(*DIMENSION_OPTIONS)]
+
+
+def _valid_key(match) -> Optional[str]:
+    if not match:
+        return None
+    answers = match.groups()
+    if any(a not in options for a, options in zip(answers, DIMENSION_OPTIONS)):
+        return None
+    return "-".join(answers)
+
+
+def parse_profile_key(raw: str) -> Optional[str]:
+    """Extract a valid profile key from free-form LLM output, or None"""
+    return _valid_key(_PROFILE_KEY.search((raw or "").upper()))
+
+
+def normalize_profile_key(raw: str) -> Optional[str]:
+    """The profile key if `raw` is exactly one (any case, e.g. "a-b-c-a"), else None"""
+    return _valid_key(_EXACT_PROFILE_KEY.fullmatch((raw or "").strip().upper()))
+
+
+def hamming(a: str, b: str) -> int:
+    return sum(x != y for x, y in zip(a.split("-"), b.split("-")))
+
+
+def match_score(distance: int) -> int:
+    return round(100 * (1 - distance / len(DIMENSION_OPTIONS)))
+
+
+def create_match_table(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS profile_job_matches (
+        profile_id TEXT,
+        job_id INTEGER,
+        distance INTEGER,
+        score INTEGER,
+        PRIMARY KEY (profile_id, job_id)
+    )
+    ''')
+    conn.execute('''
+    CREATE INDEX IF NOT EXISTS idx_matches_rank
+    ON profile_job_matches (profile_id, score DESC, job_id DESC)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_matches_job ON profile_job_matches (job_id)")
+
+
+def refresh_matches(conn: sqlite3.Connection, job_ids: Iterable[int] = None) -> int:
+    """Recompute matches for the given jobs (or all jobs) and trim each profile to TOP_N
+
+    Runs inside the caller's transaction; commit afterwards.
+    """
+    create_match_table(conn)
+    if job_ids is None:
+        conn.execute("DELETE FROM profile_job_matches")
+        rows = conn.execute("SELECT job_id, profile_id FROM jobs").fetchall()
+    else:
+        job_ids = list(job_ids)
+        rows = []
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            conn.execute(f"DELETE FROM profile_job_matches WHERE job_id IN ({placeholders})", chunk)
+            rows += conn.execute(
+                f"SELECT job_id, profile_id FROM jobs WHERE job_id IN ({placeholders})", chunk
+            ).fetchall()
+
+    keys = all_profile_keys()
+    matches = []
+    for job_id, raw_profile in rows:
+        job_key = parse_profile_key(raw_profile)
+        if not job_key:
+            continue
+        for key in keys:
+            distance = hamming(key, job_key)
+            if distance <= MAX_DISTANCE:
+                matches.append((key, job_id, distance, match_score(distance)))
+    conn.executemany('''
+    INSERT OR REPLACE INTO profile_job_matches (profile_id, job_id, distance, score)
+    VALUES (?, ?, ?, ?)
+    ''', matches)
+
+    conn.execute('''
+    DELETE FROM profile_job_matches WHERE rowid IN (
+        SELECT rowid FROM (
+            SELECT rowid, ROW_NUMBER() OVER (
+                PARTITION BY profile_id ORDER BY score DESC, job_id DESC
+            ) AS position
+            FROM profile_job_matches
+        ) WHERE position > ?
+    )
+    ''', (TOP_N,))
+    logger.info(f"Refreshed {len(matches)} profile matches for {len(rows)} jobs")
+    return len(matches)
+
+
+# Per-thread read-only connections for request-time lookups
+_connections = ThreadConnections(DB_PATH)
+
+
+def reset_connections():
+    _connections.reset()
+
+
+def top_matches(profile_key: str, limit: int = 5, conn: sqlite3.Connection = None) -> List[Dict]:
+    """Best precomputed jobs for a profile key, shaped like results.html recommendations"""
+    conn = conn or _connections.get()
+    rows = conn.execute('''
+    SELECT j.title, j.company, j.description, m.score, m.distance
+    FROM profile_job_matches m JOIN jobs j ON j.job_id = m.job_id
+    WHERE m.profile_id = ?
+    ORDER BY m.score DESC, m.job_id DESC
+    LIMIT ?
+    ''', (profile_key, limit)).fetchall()
+    return [{
+        "title": title,
+        "company": company,
+        "match_score": score,
+        "reasoning": description,
+        "exact_match": distance == 0,
+    } for title, company, description, score, distance in rows]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        refresh_matches(conn)
+    conn.close()
@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import glob
+import random
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, spanning in-memory lookups through slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Each process's metrics are its own. With several workers (gunicorn), each one
+# writes a snapshot here and /metrics merges them, so any worker reports the
+# whole server. Unset, /metrics covers only the process that answered.
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+# Histograms and counters of exited workers, so server totals never go backwards
+ARCHIVE_FILE = "archive.json"
+
+
+def _quantile(buckets, counts, q: float) -> float:
+    """Estimate a quantile by linear interpolation inside its bucket"""
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(counts):
+        if seen + n >= rank and n:
+            lower = buckets[i - 1] if i > 0 else 0.0
+            upper = buckets[i] if i < len(buckets) else buckets[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return buckets[-1]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is a bisect and three additions"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        with self._lock:
+            counts = list(self.counts)
+        return _quantile(self.buckets, counts, q)
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        h = self.histograms.get(stage)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(stage, Histogram())
+        return h
+
+    def inc(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """Drop recorded histograms and counters, e.g. those a worker inherited from the master"""
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def gauge(self, name: str, fn, label: str = "name"):
+        """Register a callable evaluated at scrape time, returning a number or {label value: number}"""
+        self.gauges[name] = (fn, label)
+
+
+registry = Registry()
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the wall time of the block under `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.histogram(stage).observe(time.perf_counter() - start)
+
+
+def timed_function(stage: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def external_call(service: str):
+    """Time a call to an external service and count it as in flight while it runs"""
+    with _in_flight_lock:
+        _in_flight[service] = _in_flight.get(service, 0) + 1
+    try:
+        with timed(f"external_{service}"):
+            yield
+    except Exception:
+        registry.inc(f"external_{service}_errors_total")
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight[service] -= 1
+
+
+registry.gauge("external_calls_in_flight", lambda: dict(_in_flight), label="service")
+
+
+def should_sample(rate: float) -> bool:
+    return rate > 0 and random.random() < rate
+
+
+def snapshot() -> dict:
+    """This process's metrics as plain data, with gauges evaluated now"""
+    histograms = {}
+    for stage, h in list(registry.histograms.items()):
+        with h._lock:
+            histograms[stage] = {"buckets": list(h.buckets), "counts": list(h.counts), "sum": h.sum}
+    with registry._lock:
+        counters = dict(registry.counters)
+    gauges = {}
+    for gauge, (fn, label) in list(registry.gauges.items()):
+        try:
+            gauges[gauge] = {"label": label, "value": fn()}
+        except Exception:
+            continue
+    return {"pid": os.getpid(), "histograms": histograms, "counters": counters, "gauges": gauges}
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(directory: str = None):
+    directory = directory or MULTIPROC_DIR
+    _write_json(os.path.join(directory, f"{os.getpid()}.json"), snapshot())
+
+
+def read_snapshots(directory: str = None) -> list:
+    directory = directory or MULTIPROC_DIR
+    paths = glob.glob(os.path.join(directory, "*.json"))
+    return [data for data in map(_read_json, paths) if data is not None]
+
+
+def _merge(snapshots) -> dict:
+    """Sum histograms and counters across processes; keep each process's gauges apart"""
+    merged = {"histograms": {}, "counters": {}, "gauges": {}}
+    for data in snapshots:
+        for stage, h in data.get("histograms", {}).items():
+            into = merged["histograms"].setdefault(
+                stage, {"buckets": h["buckets"], "counts": [0] * len(h["counts"]), "sum": 0.0}
+            )
+            into["counts"] = [a + b for a, b in zip(into["counts"], h["counts"])]
+            into["sum"] += h["sum"]
+        for counter, value in data.get("counters", {}).items():
+            merged["counters"][counter] = merged["counters"].get(counter, 0) + value
+        for gauge, g in data.get("gauges", {}).items():
+            entry = merged["gauges"].setdefault(gauge, {"label": g["label"], "values": {}})
+            entry["values"][data.get("pid")] = g["value"]
+    return merged
+
+
+def archive_snapshot(pid: int, directory: str = None):
+    """Fold an exited worker's histograms and counters into the archive; its gauges go with it"""
+    directory = directory or MULTIPROC_DIR
+    path = os.path.join(directory, f"{pid}.json")
+    data = _read_json(path)
+    if data is not None:
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = _merge(filter(None, [_read_json(archive_path), data]))
+        _write_json(archive_path, {"pid": None, "histograms": archive["histograms"], "counters": archive["counters"]})
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SnapshotWriter:
+    """Daemon thread writing this process's snapshot every `interval` seconds"""
+
+    def __init__(self, directory: str = None, interval: float = SNAPSHOT_INTERVAL):
+        self.directory = directory or MULTIPROC_DIR
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.directory)
+            except Exception as e:
+                logger.error(f"Error writing metrics snapshot: {e}")
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        write_snapshot(self.directory)
+
+
+def render_prometheus(prefix: str = "wayfinder", directory: str = None) -> str:
+    """Render every metric in the Prometheus text exposition format
+
+    With a snapshot directory, histograms and counters are summed over all
+    workers and each gauge gets a `pid` label per worker.
+    """
+    directory = directory or MULTIPROC_DIR
+    own = snapshot()
+    if directory:
+        others = [data for data in read_snapshots(directory) if data.get("pid") != own["pid"]]
+        merged = _merge(others + [own])
+    else:
+        merged = _merge([own])
+
+    lines = []
+    name = f"{prefix}_stage_duration_seconds"
+    lines.append(f"# TYPE {name} histogram")
+    for stage, h in sorted(merged["histograms"].items()):
+        counts, total = h["counts"], sum(h["counts"])
+        cumulative = 0
+        for bound, n in zip(h["buckets"], counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {total}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {h["sum"]}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {total}')
+
+    quantile_name = f"{prefix}_stage_duration_quantile_seconds"
+    lines.append(f"# TYPE {quantile_name} gauge")
+    for stage, h in sorted(merged["histograms"].items()):
+        for q in (0.5, 0.95, 0.99):
+            lines.append(f'{quantile_name}{{stage="{stage}",quantile="{q}"}} {_quantile(h["buckets"], h["counts"], q):.6f}')
+
+    for counter, value in sorted(merged["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{counter} counter")
+        lines.append(f"{prefix}_{counter} {value}")
+
+    for gauge, g in sorted(merged["gauges"].items()):
+        lines.append(f"# TYPE {prefix}_{gauge} gauge")
+        label = g["label"]
+        for pid, value in sorted(g["values"].items(), key=lambda item: str(item[0])):
+            pid_label = f'pid="{pid}"' if directory else ""
+            if isinstance(value, dict):
+                for label_value, v in value.items():
+                    labels = ",".join(filter(None, [f'{label}="{label_value}"', pid_label]))
+                    lines.append(f"{prefix}_{gauge}{{{labels}}} {v}")
+            elif pid_label:
+                lines.append(f"{prefix}_{gauge}{{{pid_label}}} {value}")
+            else:
+                lines.append(f"{prefix}_{gauge} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,12 +1,44 @@
+from sqlalchemy import inspect, text
+
 from app import db
 
 class Assessment(db.Model):
+    __table_args__ = (
+        db.Index("ix_assessment_profile_key_created_at", "profile_key", "created_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     q1_answer = db.Column(db.String(1))
     q2_answer = db.Column(db.String(1))
     q3_answer = db.Column(db.String(1))
     q4_answer = db.Column(db.String(1))
     q5_answer = db.Column(db.Text)  # changed to Text to support freeform
+    profile_key = db.Column(db.String(7))
     analysis = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    recommendation = db.Column(db.Text)
+    latency_ms = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), index=True)
+
+def upgrade_schema(engine):
+    """Add the columns and indexes create_all skips on tables that already exist
 
+    Databases created before profile_key, recommendation and latency_ms were
+    added keep their assessment table, so the new columns are added in place.
+    """
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        quote = engine.dialect.identifier_preparer.quote
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name not in columns:
+                    conn.execute(text(
+                        f"ALTER TABLE {quote(table.name)} ADD COLUMN "
+                        f"{quote(column.name)} {column.type.compile(dialect=engine.dialect)}"
+                    ))
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
@@ -0,0 +1,233 @@
+# pdf_ingest.py
+"""Load job listings from a directory of PDFs into job_profiles.db.
+
+Text is extracted page by page with PyMuPDF in a process pool. Each document is
+split into postings by a streaming generator, and the postings are bulk-inserted
+into `jobs`. Files whose content hash matches the last run are skipped. Postings
+that are already stored (same title/company/description) are left untouched.
+
+    python pdf_ingest.py listings/ --workers 8
+    python pdf_ingest.py listings/ --classify   # also assign profile keys via the LLM
+
+Postings from an earlier version of a changed file are not removed.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import resource
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("PDF_INGEST_WORKERS", str(os.cpu_count() or 2)))
+BATCH_SIZE = int(os.getenv("PDF_INGEST_BATCH_SIZE", "500"))
+
+# A line like "Job Title: Data Analyst" starts a new posting; "Company: Oracle" names its employer
+_TITLE_LINE = re.compile(r"^\s*(?:job\s+title|position|role|title)\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE)
+_COMPANY_LINE = re.compile(r"^\s*(?:company|employer|organi[sz]ation)\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_pdf_paths(root: str) -> Iterator[str]:
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(dirpath, name)
+
+
+def extract_pages(path: str) -> Tuple[str, List[str]]:
+    """Runs in a worker process: (path, text of each page)"""
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return path, [page.get_text("text") for page in doc]
+
+
+def iter_postings(pages: Iterable[str], source: str) -> Iterator[Dict]:
+    """Split a document into postings at title lines; without any, the document is one posting"""
+    title = company = None
+    lines: List[str] = []
+
+    def posting():
+        description = re.sub(r"\s+", " ", " ".join(lines)).strip()
+        if description:
+            fallback = os.path.splitext(os.path.basename(source))[0]
+            return {"title": title or fallback, "company": company, "description": description}
+        return None
+
+    for page in pages:
+        for line in page.splitlines():
+            match = _TITLE_LINE.match(line)
+            if match:
+                if title is not None or lines:
+                    job = posting()
+                    if job:
+                        yield job
+                title, company, lines = match.group(1), None, []
+                continue
+            match = _COMPANY_LINE.match(line)
+            if match and company is None:
+                company = match.group(1)
+                continue
+            if line.strip():
+                lines.append(line)
+
+    job = posting()
+    if job:
+        yield job
+
+
+def create_ingest_table(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        path TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        pages INTEGER,
+        postings INTEGER,
+        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _changed_files(conn: sqlite3.Connection, paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """(path, content hash) for files that are new or differ from the last ingest"""
+    for path in paths:
+        digest = file_hash(path)
+        row = conn.execute("SELECT content_hash FROM ingested_files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == digest:
+            continue
+        yield path, digest
+
+
+def _extract_all(paths: Iterator[Tuple[str, str]], max_workers: int) -> Iterator[Tuple[str, str, List[str]]]:
+    """(path, hash, pages) per document, extracted in a process pool with at most
+    2 * max_workers documents in memory; pages is None if the file could not be read"""
+    def result(future):
+        path, digest = in_flight.pop(future)
+        try:
+            return path, digest, future.result()[1]
+        except Exception as e:
+            logger.error(f"Error extracting text from {path}: {e}")
+            return path, digest, None
+
+    in_flight = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for path, digest in paths:
+            in_flight[pool.submit(extract_pages, path)] = (path, digest)
+            if len(in_flight) >= 2 * max_workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield result(future)
+        for future in list(in_flight):
+            yield result(future)
+
+
+def _insert_postings(conn: sqlite3.Connection, postings: List[Dict]) -> int:
+    from job_profile_analyzer import job_hash
+
+    cursor = conn.executemany('''
+    INSERT INTO jobs (title, company, description, content_hash) VALUES (?, ?, ?, ?)
+    ON CONFLICT (content_hash) DO NOTHING
+    ''', [(p["title"], p["company"], p["description"], job_hash(p)) for p in postings])
+    # rowcount leaves out the rows the FTS triggers touch
+    return cursor.rowcount
+
+
+def ingest_directory(
+    root: str,
+    conn: sqlite3.Connection,
+    max_workers: int = MAX_WORKERS,
+    batch_size: int = BATCH_SIZE,
+    classify: bool = False,
+) -> Dict:
+    """Ingest every new or changed PDF under `root` and return throughput figures"""
+    start = time.perf_counter()
+    create_ingest_table(conn)
+    conn.commit()
+
+    paths = list(iter_pdf_paths(root))
+    report = {"files": len(paths), "skipped": 0, "failed": 0, "pages": 0, "postings": 0, "inserted": 0}
+    changed = list(_changed_files(conn, paths))
+    report["skipped"] = len(paths) - len(changed)
+
+    batch, batch_files = [], []
+
+    def flush():
+        with conn:
+            report["inserted"] += _insert_postings(conn, batch)
+            conn.executemany('''
+            INSERT OR REPLACE INTO ingested_files (path, content_hash, pages, postings) VALUES (?, ?, ?, ?)
+            ''', batch_files)
+        if classify:
+            from job_profile_analyzer import analyze_and_store_jobs
+            analyze_and_store_jobs(conn, batch)
+        batch.clear()
+        batch_files.clear()
+
+    for path, digest, pages in _extract_all(iter(changed), max_workers):
+        if pages is None:
+            # Left out of ingested_files, so the next run retries it
+            report["failed"] += 1
+            continue
+        postings = list(iter_postings(pages, path))
+        report["pages"] += len(pages)
+        report["postings"] += len(postings)
+        batch.extend(postings)
+        batch_files.append((path, digest, len(pages), len(postings)))
+        if len(batch) >= batch_size:
+            flush()
+    if batch_files:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    report.update({
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(report["pages"] / elapsed, 2) if elapsed else 0.0,
+        "max_rss_mb": round(self_rss / scale, 1),
+        "max_worker_rss_mb": round(child_rss / scale, 1),
+    })
+    logger.info(f"PDF ingest finished: {report}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--db", default=os.getenv("JOB_DB_PATH", "job_profiles.db"))
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--classify", action="store_true", help="assign profile keys to new postings")
+    args = parser.parse_args(argv)
+
+    from job_profile_analyzer import create_database
+    conn = create_database(args.db)
+    report = ingest_directory(args.directory, conn, args.workers, args.batch_size, args.classify)
+    conn.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    # PDF_INGEST_* defaults are read at import; use a copy imported after .env is loaded
+    import pdf_ingest
+    logging.basicConfig(level=logging.INFO)
+    pdf_ingest.main()
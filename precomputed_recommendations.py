@@ -0,0 +1,288 @@
+# precomputed_recommendations.py
+"""Bedrock recommendations generated offline for every profile key and common Q5 intent.
+
+Most free-form answers are empty, generic ("no preference") or one of a few
+recurring requests ("somewhere quiet", "remote work"). For those the answer
+only depends on the profile key and the intent, so a batch job generates it
+once per (profile, intent) and /results serves it with a single indexed
+lookup instead of a live Bedrock call:
+
+    python precomputed_recommendations.py --workers 8
+
+Each row records a fingerprint of its query and the model/retriever settings,
+so re-running the batch only regenerates rows whose inputs changed. With the
+local retriever the fingerprint also covers the jobs retrieved for that query,
+so after pdf_ingest.py adds jobs only the rows those jobs reach are redone.
+The Knowledge Base is synced outside job_profiles.db; bump
+RECOMMENDATION_CORPUS_VERSION after a re-sync. Intents are configured by a JSON
+file at RECOMMENDATION_INTENTS_PATH mapping names to {"text": ..., "keywords": [...]};
+classify() decides whether an answer says nothing beyond one intent.
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, Tuple
+from rag_cache import normalize_query
+from profile_store import ProfileStore
+from thread_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("JOB_DB_PATH", "job_profiles.db")
+PROFILES_PATH = os.getenv("PROFILES_PATH", "personality_analyses.json")
+INTENTS_PATH = os.getenv("RECOMMENDATION_INTENTS_PATH")
+MAX_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", "4"))
+# Share of an answer's meaningful words an intent must account for before it is served
+MIN_CONFIDENCE = float(os.getenv("PRECOMPUTED_MIN_CONFIDENCE", "0.6"))
+# Bump to regenerate everything when the Knowledge Base is re-synced
+CORPUS_VERSION = os.getenv("RECOMMENDATION_CORPUS_VERSION", "")
+
+QUERY_PREFIX = "Match this user description to appropriate job roles:"
+GENERIC_INTENT = "none"
+
+DEFAULT_INTENTS = {
+    GENERIC_INTENT: {"text": "", "keywords": []},
+    "quiet": {
+        "text": "I would like a quiet workplace with few distractions.",
+        "keywords": ["quiet", "calm", "silent", "silence", "noise", "noisy", "distraction", "distract", "peaceful", "private"],
+    },
+    "remote": {
+        "text": "I would like to work remotely from home.",
+        "keywords": ["remote", "remotely", "home", "wfh", "telework", "telecommute", "virtual", "online"],
+    },
+    "flexible": {
+        "text": "I need flexible working hours.",
+        "keywords": ["flexible", "flexibility", "hours", "schedule", "part", "time", "shifts"],
+    },
+    "accessible": {
+        "text": "I need an accessible workplace that provides accommodations.",
+        "keywords": ["accessible", "accessibility", "accommodation", "accommodations", "wheelchair", "disability", "ramp"],
+    },
+    "supportive": {
+        "text": "I would like a supportive and understanding team.",
+        "keywords": ["supportive", "support", "understanding", "inclusive", "kind", "friendly", "patient", "mentor", "mentorship"],
+    },
+    "growth": {
+        "text": "I would like to keep learning and grow my career.",
+        "keywords": ["learn", "learning", "grow", "growth", "training", "career", "develop", "development", "advancement"],
+    },
+}
+
+# Words that say nothing about the kind of job wanted; an answer made only of these is generic
+_GENERIC_WORDS = frozenset(normalize_query(
+    "work working job jobs role place workplace environment space office company prefer preference "
+    "really just very much more lot good nice great ok okay fine sure also most important ideally "
+    "something somewhere anything everything else nothing no not none n a na idk know don t think "
+    "feel have having being able can could should will thing things all one other here there as so "
+    "from by about where when if but than get let s d ll ve m re",
+    stem=True,
+).split())
+
+
+def load_intents(path: str = INTENTS_PATH) -> Dict[str, Dict]:
+    """Configured intents with their keywords normalized like classify() normalizes answers"""
+    intents = DEFAULT_INTENTS
+    if path:
+        with open(path) as f:
+            intents = json.load(f)
+    intents.setdefault(GENERIC_INTENT, {"text": "", "keywords": []})
+    return {
+        name: {
+            "text": spec.get("text", ""),
+            "keywords": frozenset(normalize_query(" ".join(spec.get("keywords", [])), stem=True).split()),
+        }
+        for name, spec in intents.items()
+    }
+
+
+intents = load_intents()
+
+
+def classify(free_response: str) -> Tuple[Optional[str], float]:
+    """(intent, confidence) for a Q5 answer; confidence is the share of its meaningful words the intent covers"""
+    words = [w for w in normalize_query(free_response, stem=True).split() if w not in _GENERIC_WORDS]
+    if not words:
+        return GENERIC_INTENT, 1.0
+    best, best_hits = None, 0
+    for name, intent in intents.items():
+        hits = sum(w in intent["keywords"] for w in words)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    if best is None:
+        return None, 0.0
+    return best, best_hits / len(words)
+
+
+def profile_query(analysis, intent_text: str) -> str:
+    """The recommendation query for a profile's analysis plus the intent's representative answer"""
+    summary = "; ".join(
+        section["description"] for section in analysis.values()
+        if hasattr(section, "get") and section.get("description")
+    )
+    return f"{QUERY_PREFIX} {summary}. {intent_text}".strip()
+
+
+def create_table(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS precomputed_recommendations (
+        profile_id TEXT NOT NULL,
+        intent TEXT NOT NULL,
+        query TEXT NOT NULL,
+        recommendation TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (profile_id, intent)
+    ) WITHOUT ROWID
+    ''')
+
+
+def settings_fingerprint() -> str:
+    """Changes with the retriever, Knowledge Base or model settings and RECOMMENDATION_CORPUS_VERSION"""
+    import rag_engine
+
+    return f"{rag_engine.RETRIEVER}|{rag_engine.KB_ID}|{rag_engine.MODEL_ID}|{CORPUS_VERSION}"
+
+
+def retrieved_jobs(index, query: str) -> str:
+    """The jobs the local retriever grounds `query` in, in prompt order"""
+    import rag_engine
+    from job_index import job_text
+
+    return json.dumps([[job["job_id"], job_text(job)] for job in index.search(query, k=rag_engine.LOCAL_TOP_K)])
+
+
+def _fingerprint(query: str, settings: str, jobs: str = "") -> str:
+    return hashlib.sha256(f"{settings}|{query}|{jobs}".encode()).hexdigest()
+
+
+def precompute(
+    conn: sqlite3.Connection,
+    profiles_path: str = PROFILES_PATH,
+    max_workers: int = MAX_WORKERS,
+    force: bool = False,
+) -> Dict:
+    """Generate recommendations for every (profile, intent) whose inputs changed since the last run"""
+    import rag_engine
+
+    create_table(conn)
+    conn.commit()
+    # Includes profiles composed from fragments, not just the full ones in the file
+    store = ProfileStore(profiles_path)
+    profiles = {key: store.get(key) for key in store.keys()}
+    settings = settings_fingerprint()
+    index = None
+    if rag_engine.RETRIEVER == "local":
+        # Same jobs and weights as the index /results searches, built from this database
+        from job_index import JobIndex
+        index = JobIndex.build(conn)
+    stored = dict(
+        ((profile_id, intent), fingerprint) for profile_id, intent, fingerprint
+        in conn.execute("SELECT profile_id, intent, fingerprint FROM precomputed_recommendations")
+    )
+
+    pending = []
+    for key, profile in profiles.items():
+        for name, intent in intents.items():
+            query = profile_query(profile.analysis, intent["text"])
+            jobs = retrieved_jobs(index, query) if index is not None else ""
+            fingerprint = _fingerprint(query, settings, jobs)
+            if force or stored.get((key, name)) != fingerprint:
+                pending.append((key, name, query, fingerprint))
+
+    report = {"entries": len(profiles) * len(intents), "skipped": 0, "generated": 0, "failed": 0}
+    report["skipped"] = report["entries"] - len(pending)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(rag_engine.get_semantic_matches_bedrock, query, use_cache=False): (key, name, query, fingerprint)
+            for key, name, query, fingerprint in pending
+        }
+        for future in as_completed(futures):
+            key, name, query, fingerprint = futures[future]
+            try:
+                text = future.result()
+                if rag_engine.is_fallback_answer(text):
+                    raise ValueError("Bedrock returned a fallback answer")
+            except Exception as e:
+                # Left stale or missing, so the next run retries it
+                logger.error(f"Error precomputing recommendations for {key}/{name}: {e}")
+                report["failed"] += 1
+                continue
+            with conn:
+                conn.execute('''
+                INSERT OR REPLACE INTO precomputed_recommendations (profile_id, intent, query, recommendation, fingerprint)
+                VALUES (?, ?, ?, ?, ?)
+                ''', (key, name, query, text, fingerprint))
+            report["generated"] += 1
+
+    # Intents removed from the configuration should no longer be served
+    placeholders = ",".join("?" * len(intents))
+    with conn:
+        conn.execute(f"DELETE FROM precomputed_recommendations WHERE intent NOT IN ({placeholders})", list(intents))
+    logger.info(f"Precomputed recommendations: {report}")
+    return report
+
+
+# Per-thread read-only connections for request-time lookups
+_connections = ThreadConnections(DB_PATH)
+
+
+def reset_connections():
+    _connections.reset()
+
+
+def match_intent(free_response: str) -> Optional[str]:
+    """The intent an answer confidently maps to, or None; needs no database"""
+    intent, confidence = classify(free_response)
+    if intent is None or confidence < MIN_CONFIDENCE:
+        return None
+    return intent
+
+
+def stored_recommendation(profile_key: str, intent: str, conn: sqlite3.Connection = None) -> Optional[str]:
+    """The stored recommendation text for (profile, intent), or None if none was generated"""
+    conn = conn or _connections.get()
+    row = conn.execute(
+        "SELECT recommendation FROM precomputed_recommendations WHERE profile_id = ? AND intent = ?",
+        (profile_key, intent),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def lookup(profile_key: str, free_response: str, conn: sqlite3.Connection = None) -> Optional[str]:
+    """The stored recommendation text if the answer confidently maps to an intent, else None
+
+    Rows are served as last generated; re-run the batch after the corpus changes.
+    """
+    intent = match_intent(free_response)
+    if intent is None:
+        return None
+    return stored_recommendation(profile_key, intent, conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--profiles", default=PROFILES_PATH)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--force", action="store_true", help="regenerate every entry")
+    args = parser.parse_args(argv)
+
+    from job_schema import connect
+    conn = connect(args.db)
+    report = precompute(conn, args.profiles, args.workers, args.force)
+    conn.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    # DB_PATH and the PRECOMPUTE* settings come from a copy imported after .env is loaded
+    import precomputed_recommendations
+    logging.basicConfig(level=logging.INFO)
+    precomputed_recommendations.main()
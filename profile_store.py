@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import logging
+import threading
+from itertools import product
+from types import MappingProxyType
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from metrics import timed_function
+
+logger = logging.getLogger(__name__)
+
+PROFILES_PATH = os.getenv("PROFILES_PATH", "personality_analyses.json")
+RELOAD_INTERVAL = float(os.getenv("PROFILE_RELOAD_INTERVAL", "2"))
+# Per-answer and pairwise fragments written by `automating_profiles.py --compose`
+FRAGMENTS_PATH = os.getenv("PROFILE_FRAGMENTS_PATH", "profile_fragments.json")
+
+
+class Profile(NamedTuple):
+    key: str
+    combination: Tuple[str, ...]
+    analysis: MappingProxyType
+    analysis_html: str
+
+
+@timed_function("format_analysis_html")
+def format_analysis_html(analysis):
+    return f"""
+    <div class='analysis-section'>
+        <h3>Work Style</h3>
+        <p><strong>{analysis['work_style']['description']}</strong></p>
+        <p>{analysis['work_style']['explanation']}</p>
+
+        <h3>Ideal Environment</h3>
+        <p><strong>{analysis['environment']['description']}</strong></p>
+        <p>{analysis['environment']['explanation']}</p>
+
+        <h3>Interaction Level</h3>
+        <p><strong>{analysis['interaction_level']['description']}</strong></p>
+        <p>{analysis['interaction_level']['explanation']}</p>
+
+        <h3>Task Preferences</h3>
+        <p><strong>{analysis['task_preference']['description']}</strong></p>
+        <p>{analysis['task_preference']['explanation']}</p>
+
+        <h3>Accommodations</h3>
+        <p><strong>{analysis['accommodations']['description']}</strong></p>
+        <p>{analysis['accommodations']['explanation']}</p>
+    </div>
+    """
+
+
+def _freeze(value):
+    """Recursively wrap dicts and lists so cached profiles cannot be mutated"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def compose_analysis(fragments: Dict, answers: Sequence[str]) -> Optional[Dict]:
+    """Assemble a full analysis from per-answer fragments, or None if one is missing
+
+    Each dimension's section is its answer's fragment. Accommodations come from the
+    pairwise fragments matching the answers, or the per-answer hints if none do.
+    """
+    dimensions = fragments["dimensions"]
+    if len(answers) != len(dimensions):
+        return None
+    analysis = {}
+    hints = []
+    for dimension, answer in zip(dimensions, answers):
+        fragment = fragments["options"].get(dimension, {}).get(answer)
+        if fragment is None:
+            return None
+        analysis[dimension] = {"description": fragment["description"], "explanation": fragment["explanation"]}
+        if fragment.get("accommodation"):
+            hints.append(fragment["accommodation"])
+
+    chosen = dict(zip(dimensions, answers))
+    notes = []
+    for pair, by_answers in fragments.get("pairs", {}).items():
+        first, second = pair.split("|")
+        note = by_answers.get(f"{chosen.get(first)}-{chosen.get(second)}")
+        if note:
+            notes.append(note)
+    notes = notes or hints
+    analysis["accommodations"] = {
+        "description": "; ".join(n["description"] for n in notes),
+        "explanation": " ".join(n["explanation"] for n in notes),
+    }
+    return analysis
+
+
+def _is_section(value) -> bool:
+    return isinstance(value, dict) and all(isinstance(value.get(f), str) for f in ("description", "explanation"))
+
+
+def _fragments_problem(fragments) -> Optional[str]:
+    """Why compose_analysis cannot use `fragments`, or None if every dimension has usable options"""
+    if not (isinstance(fragments, dict) and isinstance(fragments.get("dimensions"), list)
+            and isinstance(fragments.get("options"), dict)):
+        return 'expected "dimensions" and "options"'
+    for dimension in fragments["dimensions"]:
+        options = fragments["options"].get(dimension)
+        if not isinstance(options, dict) or not options:
+            return f"no options for {dimension}"
+        for option, fragment in options.items():
+            hint = fragment.get("accommodation") if isinstance(fragment, dict) else None
+            if not _is_section(fragment) or (hint and not _is_section(hint)):
+                return f"malformed fragment {dimension}={option}"
+    pairs = fragments.get("pairs", {})
+    if not isinstance(pairs, dict):
+        return "malformed pairs"
+    for pair, by_answers in pairs.items():
+        if "|" not in pair or not isinstance(by_answers, dict):
+            return f"malformed pair {pair}"
+        if not all(_is_section(note) for note in by_answers.values()):
+            return f"malformed pair {pair}"
+    return None
+
+
+def _read_fragments(path: str) -> Optional[Dict]:
+    """The fragments file if profiles can be composed from it, else None"""
+    try:
+        with open(path) as f:
+            fragments = json.load(f)
+        problem = _fragments_problem(fragments)
+    except (OSError, ValueError) as e:
+        problem = repr(e)
+    if problem:
+        logger.error(f"Ignoring {path} and serving full profiles only: {problem}")
+        return None
+    return fragments
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class ProfileStore:
+    """In-memory index of the generated profiles, keyed by profile key (e.g. "A-B-C-A").
+
+    The JSON file is parsed and rendered once; afterwards the file's mtime is
+    checked at most every `reload_interval` seconds and the index is swapped
+    atomically when it changes, so profiles can be regenerated without
+    restarting workers.
+
+    If a fragments file exists, keys without a full profile are composed from
+    it on first use and memoized until the next reload; full profiles always
+    take precedence.
+    """
+
+    def __init__(
+        self,
+        path: str = PROFILES_PATH,
+        reload_interval: float = RELOAD_INTERVAL,
+        fragments_path: str = FRAGMENTS_PATH,
+    ):
+        self.path = path
+        self.fragments_path = fragments_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._profiles = MappingProxyType({})
+        self._fragments = None
+        self._composed = {}
+        self._keys = ()
+        self._key_set = frozenset()
+        self._mtime = None
+        self._fragments_mtime = None
+        self._last_check = 0.0
+        self.load()
+
+    @timed_function("profile_load")
+    def load(self):
+        """Parse the profiles file and replace the index"""
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path) as f:
+            raw = json.load(f)
+
+        profiles = {}
+        for key, data in raw.items():
+            try:
+                analysis = data["analysis"]
+                profiles[key] = Profile(
+                    key=key,
+                    combination=tuple(data.get("combination", key.split("-"))),
+                    analysis=_freeze(analysis),
+                    analysis_html=format_analysis_html(analysis),
+                )
+            except Exception as e:
+                # One malformed profile should cost only its own requests, not the whole index
+                logger.error(f"Skipping malformed profile {key}: {e!r}")
+
+        fragments_mtime = _file_mtime(self.fragments_path)
+        fragments = None
+        keys = list(profiles)
+        if fragments_mtime is not None:
+            fragments = _read_fragments(self.fragments_path)
+        if fragments is not None:
+            options = [sorted(fragments["options"][d]) for d in fragments["dimensions"]]
+            keys += ["-".join(c) for c in product(*options) if "-".join(c) not in profiles]
+
+        with self._lock:
+            self._profiles = MappingProxyType(profiles)
+            self._fragments = fragments
+            self._composed = {}
+            self._keys = tuple(keys)
+            self._key_set = frozenset(keys)
+            self._mtime = mtime
+            self._fragments_mtime = fragments_mtime
+            self._last_check = time.monotonic()
+        logger.info(f"Loaded {len(profiles)} profiles from {self.path}"
+                    + (f", {len(keys) - len(profiles)} more composable from {self.fragments_path}" if fragments else ""))
+
+    def maybe_reload(self):
+        """Reload the index if the file changed since the last check"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            if (os.stat(self.path).st_mtime != self._mtime
+                    or _file_mtime(self.fragments_path) != self._fragments_mtime):
+                self.load()
+        except Exception as e:
+            # Keep serving the previous profiles if the file is missing or mid-write
+            logger.error(f"Error reloading profiles: {e}")
+
+    def get(self, profile_key: str) -> Optional[Profile]:
+        self.maybe_reload()
+        profile = self._profiles.get(profile_key)
+        if profile is None and self._fragments is not None:
+            profile = self._compose(profile_key)
+        return profile
+
+    @timed_function("profile_compose")
+    def _compose(self, profile_key: str) -> Optional[Profile]:
+        composed = self._composed
+        profile = composed.get(profile_key)
+        if profile is not None:
+            return profile
+        combination = tuple(profile_key.split("-"))
+        analysis = compose_analysis(self._fragments, combination)
+        if analysis is None:
+            # Not memoized, so arbitrary keys from requests cannot grow the memo
+            return None
+        profile = composed[profile_key] = Profile(
+            key=profile_key,
+            combination=combination,
+            analysis=_freeze(analysis),
+            analysis_html=format_analysis_html(analysis),
+        )
+        return profile
+
+    @property
+    def version(self):
+        """Changes whenever the profiles or fragments file is reloaded"""
+        return self._mtime, self._fragments_mtime
+
+    def keys(self):
+        """Full profile keys followed by the keys that can be composed from fragments"""
+        return self._keys
+
+    def __contains__(self, profile_key):
+        return profile_key in self._key_set
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,201 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from thread_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("RAG_CACHE_TTL", "86400"))
+CACHE_DB = os.getenv("RAG_CACHE_DB")  # optional path to a persistent SQLite tier
+CACHE_STEM = os.getenv("RAG_CACHE_STEM", "false").lower() == "true"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_STOPWORDS = frozenset(
+    "a an the i me my we our you your to of in on at for with and or is am are be "
+    "would like want need please some that this it".split()
+)
+_SUFFIXES = (("ies", "y"), ("ied", "y"), ("ingly", ""), ("ing", ""), ("edly", ""), ("ed", ""), ("ly", ""))
+
+
+def _stem(word):
+    """Very small suffix-stripping stemmer, enough to fold plurals and tenses"""
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def normalize_query(text, stem=CACHE_STEM):
+    """Fold case, punctuation and whitespace so near-identical queries share a key"""
+    text = _PUNCTUATION.sub(" ", (text or "").lower())
+    words = _WHITESPACE.split(text.strip())
+    if stem:
+        words = [_stem(w) for w in words if w and w not in _STOPWORDS]
+    return " ".join(w for w in words if w)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Persistent cache tier shared by every worker on the host"""
+
+    def __init__(self, path, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._connections = ThreadConnections(
+            path, read_only=False, configure=lambda conn: conn.execute("PRAGMA journal_mode=WAL")
+        )
+        conn = self._connect()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS rag_cache (
+            cache_key TEXT PRIMARY KEY,
+            value TEXT,
+            expires_at REAL
+        )
+        ''')
+        conn.commit()
+
+    def _connect(self):
+        return self._connections.get()
+
+    def reset_connections(self):
+        """Forget connections opened before a fork; each worker thread reopens its own"""
+        self._connections.reset()
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at FROM rag_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if row[1] < time.time():
+            conn.execute("DELETE FROM rag_cache WHERE cache_key = ?", (key,))
+            conn.commit()
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO rag_cache (cache_key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + self.ttl),
+        )
+        conn.commit()
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM rag_cache")
+        conn.commit()
+
+
+class TieredCache:
+    """Looks up each tier in order and back-fills faster tiers on a hit"""
+
+    def __init__(self, *tiers):
+        self.tiers = [t for t in tiers if t is not None]
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                logger.error(f"Error reading RAG cache tier {type(tier).__name__}: {e}")
+                continue
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception as e:
+                logger.error(f"Error writing RAG cache tier {type(tier).__name__}: {e}")
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        return {type(t).__name__: t.stats.as_dict() for t in self.tiers}
+
+    def reset_connections(self):
+        for tier in self.tiers:
+            if hasattr(tier, "reset_connections"):
+                tier.reset_connections()
+
+
+def build_default_cache():
+    """LRU tier always, SQLite tier only when RAG_CACHE_DB is set"""
+    return TieredCache(LRUCache(), SQLiteCache(CACHE_DB) if CACHE_DB else None)
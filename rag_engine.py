@@ -1,16 +1,89 @@
 # rag_engine.py
 
-import boto3
 import os
-from dotenv import load_dotenv
+import time
+import threading
+import logging
+from rag_cache import build_default_cache, normalize_query
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from single_flight import SingleFlight, CallAbandoned
+from metrics import registry, external_call, timed_function, should_sample
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 REGION = os.getenv("AWS_REGION", "us-east-1")
 KB_ID = os.getenv("BEDROCK_KB_ID")
 MODEL_ARN = "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-haiku-20240307-v1:0"
+MODEL_ID = MODEL_ARN.split("/")[-1]
+USE_FAKE = os.getenv("BEDROCK_FAKE", "false").lower() == "true"
+# "knowledge_base" retrieves through Bedrock; "local" retrieves from job_index
+RETRIEVER = os.getenv("RAG_RETRIEVER", "knowledge_base")
+LOCAL_TOP_K = int(os.getenv("RAG_LOCAL_TOP_K", "5"))
+# Fraction of Bedrock responses to log in full, for debugging
+DEBUG_SAMPLE_RATE = float(os.getenv("RAG_DEBUG_SAMPLE_RATE", "0"))
 
-client = boto3.client("bedrock-agent-runtime", region_name=REGION)
+# Size the pool to the number of threads that may call Bedrock at once
+MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "32"))
+CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "30"))
+MAX_ATTEMPTS = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "3"))
+# Override for local stand-ins such as stub_servers; unset in production
+ENDPOINT_URL = os.getenv("BEDROCK_ENDPOINT_URL")
+
+def create_client(service_name="bedrock-agent-runtime"):
+    """Build a Bedrock client with pooled connections, explicit timeouts and adaptive retries"""
+    if USE_FAKE:
+        from fake_bedrock import FakeBedrockClient
+        return FakeBedrockClient()
+
+    # boto3 takes a noticeable share of cold start, so it is imported on first use
+    import boto3
+    from botocore.config import Config
+
+    config = Config(
+        region_name=REGION,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+        tcp_keepalive=True,
+    )
+    return boto3.client(service_name, config=config, endpoint_url=ENDPOINT_URL)
+
+# Clients are created on first use; see get_client() and _get_runtime_client()
+client = None
+runtime_client = None
+_client_lock = threading.Lock()
+
+# Short-circuits to the caller's fallback while Bedrock is failing or slow
+breaker = CircuitBreaker("bedrock")
+
+# Responses keyed on the normalized query text; swap for any object with get/set
+cache = build_default_cache()
+
+# Concurrent callers with the same normalized query share one Bedrock call
+COALESCE_TIMEOUT = float(os.getenv("RAG_COALESCE_TIMEOUT", str(CONNECT_TIMEOUT + READ_TIMEOUT * MAX_ATTEMPTS)))
+inflight = SingleFlight(timeout=COALESCE_TIMEOUT)
+
+def is_fallback_answer(text):
+    """Answers the app replaces with its fallback job; never cached, so a brief outage isn't pinned"""
+    return "sorry" in text.lower()
+
+def is_validation_error(error):
+    """Bedrock rejected the request itself (bad KB id, model ARN or input), per its error code"""
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") == "ValidationException"
+
+def _cache_stat(field):
+    stats = cache.stats() if hasattr(cache, "stats") else {}
+    return {tier: values[field] for tier, values in stats.items()}
+
+registry.gauge("rag_cache_hit_rate", lambda: _cache_stat("hit_rate"), label="tier")
+registry.gauge("rag_cache_hits", lambda: _cache_stat("hits"), label="tier")
+registry.gauge("rag_cache_misses", lambda: _cache_stat("misses"), label="tier")
+registry.gauge("rag_cache_evictions", lambda: _cache_stat("evictions"), label="tier")
+registry.gauge("rag_inflight_queries", lambda: inflight.in_flight())
+registry.gauge("rag_coalesced_queries_total", lambda: inflight.coalesced)
 
 def check_environment():
     print(f"Region: {REGION}")
@@ -24,7 +97,7 @@ def check_environment():
 
 def check_kb_status():
     try:
-        response = client.get_knowledge_base(
+        response = get_client().get_knowledge_base(
             knowledgeBaseId=KB_ID
         )
         print(f"Knowledge Base status: {response['status']}")
@@ -35,7 +108,7 @@ def check_kb_status():
 def verify_kb_and_model():
     try:
         # Test a simple query
-        response = client.retrieve_and_generate(
+        response = get_client().retrieve_and_generate(
             input={"text": "test query"},
             retrieveAndGenerateConfiguration={
                 "type": "KNOWLEDGE_BASE",
@@ -47,46 +120,204 @@ def verify_kb_and_model():
         )
         print("Knowledge Base and Model configuration is valid")
         return True
-    except client.exceptions.ValidationException as ve:
-        print(f"Validation error: {str(ve)}")
-        return False
     except Exception as e:
-        print(f"Other error: {str(e)}")
+        if is_validation_error(e):
+            print(f"Validation error: {str(e)}")
+        else:
+            print(f"Other error: {str(e)}")
         return False
 
-def get_semantic_matches_bedrock(query):
+def _kb_configuration():
+    return {
+        "type": "KNOWLEDGE_BASE",
+        "knowledgeBaseConfiguration": {
+            "knowledgeBaseId": KB_ID,
+            "modelArn": MODEL_ARN
+        }
+    }
+
+def get_client():
+    """bedrock-agent-runtime client for knowledge base queries"""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                client = create_client()
+    return client
+
+def _get_runtime_client():
+    global runtime_client
+    if runtime_client is None:
+        with _client_lock:
+            if runtime_client is None:
+                runtime_client = create_client("bedrock-runtime")
+    return runtime_client
+
+def reset_clients():
+    """Drop the clients so they are rebuilt, e.g. in a freshly forked worker"""
+    global client, runtime_client
+    client = None
+    runtime_client = None
+
+def warm_up():
+    """Build clients and load retrieval data before the first request needs them"""
+    start = time.perf_counter()
+    if RETRIEVER == "local":
+        from job_index import get_default_index
+        _get_runtime_client()
+        get_default_index()
+    else:
+        get_client()
+    logger.info(f"Bedrock RAG warm-up finished in {time.perf_counter() - start:.2f}s")
+
+def _local_prompt(query):
+    """Retrieve matching jobs from the local index and ground the prompt in them"""
+    from job_index import get_default_index
+    jobs = get_default_index().search(query, k=LOCAL_TOP_K)
+    context = "\n\n".join(
+        f"Job: {job['title']} at {job['company']}\n{job['description']}" for job in jobs
+    )
+    return [{
+        "role": "user",
+        "content": [{
+            "text": "Answer using only these job listings. If none of them fit, say you are sorry "
+                    f"and cannot find a match.\n\n{context}\n\n{query}"
+        }]
+    }]
+
+def _generate_local(query):
+    response = _get_runtime_client().converse(modelId=MODEL_ID, messages=_local_prompt(query))
+    return response["output"]["message"]["content"][0]["text"]
+
+def _stream_local(query):
+    response = _get_runtime_client().converse_stream(modelId=MODEL_ID, messages=_local_prompt(query))
+    for event in response["stream"]:
+        text = event.get("contentBlockDelta", {}).get("delta", {}).get("text")
+        if text:
+            yield text
+
+def _stream_knowledge_base(query):
+    response = get_client().retrieve_and_generate_stream(
+        input={"text": query},
+        retrieveAndGenerateConfiguration=_kb_configuration()
+    )
+    for event in response["stream"]:
+        text = event.get("output", {}).get("text")
+        if text:
+            yield text
+
+def _generate_knowledge_base(query):
+    response = get_client().retrieve_and_generate(
+        input={"text": query},
+        retrieveAndGenerateConfiguration=_kb_configuration()
+    )
+
+    if should_sample(DEBUG_SAMPLE_RATE):
+        logger.info(f"Sampled Bedrock response (KB_ID={KB_ID}, model={MODEL_ARN}): {response}")
+
+    return response["output"]["text"]
+
+@timed_function("rag_query")
+def get_semantic_matches_bedrock(query, use_cache=True):
     """Query Bedrock Knowledge Base using Claude 3 Haiku."""
+    cache_key = normalize_query(query)
+    if use_cache and cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
-        print(f"Attempting query with KB_ID: {KB_ID}")
-        print(f"Using model: {MODEL_ARN}")
-        
-        response = client.retrieve_and_generate(
-            input={"text": query},
-            retrieveAndGenerateConfiguration={
-                "type": "KNOWLEDGE_BASE",
-                "knowledgeBaseConfiguration": {
-                    "knowledgeBaseId": KB_ID,
-                    "modelArn": MODEL_ARN
-                }
-            }
-        )
+        while True:
+            call, leader = inflight.begin(cache_key)
+            if not leader:
+                try:
+                    return inflight.wait(call)
+                except CallAbandoned:
+                    # A streaming leader was cut off; try again, possibly as the leader
+                    continue
+            try:
+                text = _generate(query)
+            except BaseException as e:
+                inflight.finish(cache_key, call, error=e)
+                raise
+            if use_cache and cache is not None and not is_fallback_answer(text):
+                cache.set(cache_key, text)
+            inflight.finish(cache_key, call, value=text)
+            return text
 
-        # DEBUG: Show raw response
-        print("Raw Bedrock response:")
-        print(response)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        if is_validation_error(e):
+            print(f"Configuration error: {str(e)}")
+        else:
+            print(f"Unexpected error: {str(e)}")
+        raise
+
+def _generate(query):
+    generate = _generate_local if RETRIEVER == "local" else _generate_knowledge_base
+    with external_call("bedrock"):
+        return breaker.call(generate, query)
+
+def stream_semantic_matches_bedrock(query, use_cache=True):
+    """Yield the Claude 3 Haiku answer in text chunks as Bedrock generates it."""
+    cache_key = normalize_query(query)
+    if use_cache and cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
 
-        return response["output"]["text"]
+    call, leader = inflight.begin(cache_key)
+    if not leader:
+        # Someone is already generating this answer; wait and send it in one chunk
+        try:
+            yield inflight.wait(call)
+            return
+        except CallAbandoned:
+            call, leader = inflight.begin(cache_key)
+            if not leader:
+                yield inflight.wait(call)
+                return
 
-    except client.exceptions.ValidationException as ve:
-        print(f"Configuration error: {str(ve)}")
+    start = time.monotonic()
+    chunks = []
+    try:
+        breaker.before_call()
+        stream = _stream_local(query) if RETRIEVER == "local" else _stream_knowledge_base(query)
+        for text in stream:
+            chunks.append(text)
+            yield text
+
+        breaker.record(True, time.monotonic() - start)
+        answer = "".join(chunks)
+        if use_cache and cache is not None and chunks and not is_fallback_answer(answer):
+            cache.set(cache_key, answer)
+        inflight.finish(cache_key, call, value=answer)
+
+    except GeneratorExit:
+        # The browser went away mid-stream; Bedrock itself was answering
+        breaker.record(True, time.monotonic() - start)
+        inflight.finish(cache_key, call, error=CallAbandoned())
+        raise
+    except CircuitOpenError as e:
+        inflight.finish(cache_key, call, error=e)
         raise
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        breaker.record(False, time.monotonic() - start)
+        inflight.finish(cache_key, call, error=e)
+        if is_validation_error(e):
+            print(f"Configuration error: {str(e)}")
+        else:
+            print(f"Unexpected error: {str(e)}")
         raise
 
-
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    # REGION, KB_ID and the rest were read before .env was loaded; a fresh import sees it
+    import rag_engine
     print("Running diagnostics...")
-    check_environment()
-    check_kb_status()
-    verify_kb_and_model()
+    rag_engine.check_environment()
+    rag_engine.check_kb_status()
+    rag_engine.verify_kb_and_model()
@@ -0,0 +1,54 @@
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Blocking token bucket shared by worker threads to cap request rate"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(exc):
+    """Seconds requested by a 429 response's Retry-After header, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_with_backoff(fn, *args, retry_on=(Exception,), max_attempts=5, base_delay=1.0, max_delay=60.0, **kwargs):
+    """Call fn, retrying `retry_on` errors with exponential backoff and full jitter"""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except retry_on as e:
+            if attempt == max_attempts:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            logger.warning(f"Attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
@@ -0,0 +1,58 @@
+import os
+import time
+import hashlib
+import threading
+from typing import NamedTuple, Optional
+from flask import Response, request
+
+PAGE_MAX_AGE = int(os.getenv("RENDER_CACHE_MAX_AGE", "300"))
+FRAGMENT_TTL = float(os.getenv("RENDER_CACHE_TTL", "300"))
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    version: object
+    expires_at: float
+
+
+class RenderCache:
+    """Rendered pages and fragments, each stored as encoded bytes with a strong ETag.
+
+    An entry is re-rendered when its `version` changes (e.g. the profiles file
+    was reloaded) or, if a `ttl` is given, once it is older than that.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, render, version=None, ttl: Optional[float] = None) -> CachedPage:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version or entry.expires_at < now:
+            body = render().encode("utf-8")
+            entry = CachedPage(
+                body=body,
+                etag=hashlib.sha256(body).hexdigest()[:32],
+                version=version,
+                expires_at=now + ttl if ttl is not None else float("inf"),
+            )
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cached_response(page: CachedPage, cache_control: str, mimetype: str = "text/html") -> Response:
+    """Serve a cached page, answering 304 when the client already has this ETag"""
+    response = Response(page.body, mimetype=mimetype)
+    response.set_etag(page.etag)
+    response.headers["Cache-Control"] = cache_control
+    return response.make_conditional(request)
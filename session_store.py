@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from thread_connections import ThreadConnections
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory, sqlite, redis or cookie
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "50000"))
+SESSION_DB = os.getenv("SESSION_DB")  # defaults to sessions.db in the instance folder
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class MemoryBackend:
+    """Per-process store with LRU eviction; only suitable for a single worker"""
+
+    def __init__(self, maxsize=SESSION_MAX_ENTRIES, ttl=SESSION_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[sid]
+                return None
+            self._data.move_to_end(sid)
+            return dict(data)
+
+    def set(self, sid, data):
+        with self._lock:
+            self._data[sid] = (dict(data), time.monotonic() + self.ttl)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+
+class SQLiteBackend:
+    """Store shared by every worker on the host"""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._connections = ThreadConnections(path, read_only=False, configure=self._configure)
+        self._writes = 0
+        conn = self._connect()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid TEXT PRIMARY KEY,
+            data TEXT,
+            expires_at REAL
+        )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+        conn.commit()
+
+    @staticmethod
+    def _configure(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _connect(self):
+        return self._connections.get()
+
+    def reset_connections(self):
+        """Forget connections opened before a fork; each worker thread reopens its own"""
+        self._connections.reset()
+
+    def get(self, sid):
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at >= ?", (sid, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, sid, data):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+            (sid, json.dumps(data), time.time() + self.ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+        conn.commit()
+
+    def delete(self, sid):
+        conn = self._connect()
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.commit()
+
+
+class RedisBackend:
+    """Store shared across hosts; works with any Redis-protocol server"""
+
+    def __init__(self, url=SESSION_REDIS_URL, ttl=SESSION_TTL, prefix="wayfinder:session:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, sid):
+        value = self.client.get(self.prefix + sid)
+        return json.loads(value) if value else None
+
+    def set(self, sid, data):
+        self.client.setex(self.prefix + sid, self.ttl, json.dumps(data))
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in `backend`; the cookie only carries a random session id.
+
+    The backend is written only when the session changed, and an emptied
+    session (e.g. after `session.clear()`) is deleted along with its cookie.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def reset_connections(self):
+        if hasattr(self.backend, "reset_connections"):
+            self.backend.reset_connections()
+
+    def _new_sid(self):
+        return secrets.token_urlsafe(32)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                data = self.backend.get(sid)
+            except Exception as e:
+                logger.error(f"Error loading session: {e}")
+                data = None
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=self._new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        self.backend.set(session.sid, dict(session))
+        response.vary.add("Cookie")
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def build_session_interface(app, backend=SESSION_BACKEND):
+    """Session interface for SESSION_BACKEND, or None to keep Flask's cookie session"""
+    if backend == "cookie":
+        return None
+    if backend == "memory":
+        return ServerSideSessionInterface(MemoryBackend())
+    if backend == "sqlite":
+        path = SESSION_DB
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, "sessions.db")
+        return ServerSideSessionInterface(SQLiteBackend(path))
+    if backend == "redis":
+        return ServerSideSessionInterface(RedisBackend())
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,67 @@
+import os
+import threading
+
+DEFAULT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "60"))
+
+
+class SingleFlightTimeout(TimeoutError):
+    pass
+
+
+class CallAbandoned(Exception):
+    """The leading caller stopped before producing a result (e.g. a closed stream)"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the call; callers arriving
+    while it is in flight wait for and share its result or exception. Keys are
+    forgotten as soon as the call finishes, so this only deduplicates calls
+    that overlap in time; caching finished results is left to the caller.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Return (call, is_leader); the leader must later call finish()"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def finish(self, key, call, value=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.value = value
+        call.error = error
+        call.done.set()
+
+    def wait(self, call, timeout: float = None):
+        """Block until the leader finishes, then return its value or raise its exception"""
+        timeout = self.timeout if timeout is None else timeout
+        if not call.done.wait(timeout):
+            raise SingleFlightTimeout(f"Timed out after {timeout}s waiting for an in-flight call")
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def in_flight(self):
+        return len(self._calls)
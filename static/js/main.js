@@ -1,4 +1,109 @@
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize Feather icons
     feather.replace();
+
+    // Fill in recommendations that are still being generated
+    const recommendations = document.getElementById('recommendations');
+    if (recommendations && recommendations.dataset.url) {
+        pollRecommendations(recommendations, recommendations.dataset.url, 1000);
+    } else if (recommendations && recommendations.dataset.streamUrl) {
+        streamRecommendations(recommendations, recommendations.dataset.streamUrl);
+    }
 });
+
+function streamRecommendations(container, url) {
+    const source = new EventSource(url);
+    let text = null;
+
+    source.addEventListener('chunk', function(event) {
+        if (text === null) {
+            container.innerHTML = '';
+            const card = document.createElement('div');
+            card.className = 'card mb-3';
+            text = document.createElement('p');
+            text.className = 'card-body card-text';
+            card.appendChild(text);
+            container.appendChild(card);
+        }
+        text.textContent += JSON.parse(event.data);
+    });
+    source.addEventListener('done', function(event) {
+        source.close();
+        renderRecommendations(container, JSON.parse(event.data));
+    });
+    source.addEventListener('error', function() {
+        source.close();
+        if (text === null) {
+            showRecommendationError(container);
+        }
+    });
+}
+
+function pollRecommendations(container, url, delay) {
+    fetch(url, { credentials: 'same-origin' })
+        .then(function(response) { return response.json(); })
+        .then(function(data) {
+            if (data.status === 'pending') {
+                setTimeout(function() {
+                    pollRecommendations(container, url, Math.min(delay * 1.5, 5000));
+                }, delay);
+            } else if (data.status === 'done') {
+                renderRecommendations(container, data.recommendations);
+            } else {
+                showRecommendationError(container);
+            }
+        })
+        .catch(function() { showRecommendationError(container); });
+}
+
+function renderRecommendations(container, jobs) {
+    container.innerHTML = '';
+    if (!jobs || !jobs.length) {
+        container.innerHTML = '<div class="alert alert-warning">No job recommendations found.</div>';
+        return;
+    }
+    jobs.forEach(function(job) {
+        const card = document.createElement('div');
+        card.className = 'card mb-3';
+        const body = document.createElement('div');
+        body.className = 'card-body';
+
+        const title = document.createElement('h5');
+        title.className = 'card-title';
+        title.textContent = job.title;
+        body.appendChild(title);
+
+        const subtitle = document.createElement('h6');
+        subtitle.className = 'card-subtitle mb-2 text-muted';
+        subtitle.textContent = job.company + ' - ' + job.location;
+        body.appendChild(subtitle);
+
+        const badge = document.createElement('span');
+        const score = job.match_score;
+        badge.className = 'badge bg-' + (score !== null && score >= 80 ? 'success'
+            : score !== null && score >= 60 ? 'warning' : 'secondary');
+        badge.textContent = (score !== null ? score : 'N/A') + '% Match';
+        body.appendChild(badge);
+
+        const reasoning = document.createElement('p');
+        reasoning.className = 'card-text mt-2';
+        reasoning.textContent = job.reasoning;
+        body.appendChild(reasoning);
+
+        if (job.url && job.url !== '#') {
+            const link = document.createElement('a');
+            link.className = 'card-link';
+            link.href = job.url;
+            link.target = '_blank';
+            link.textContent = 'Job Posting';
+            body.appendChild(link);
+        }
+
+        card.appendChild(body);
+        container.appendChild(card);
+    });
+}
+
+function showRecommendationError(container) {
+    container.innerHTML = '<div class="alert alert-warning">We could not load job recommendations. Please try again.</div>';
+}
@@ -0,0 +1,139 @@
+# stub_servers.py
+"""Local HTTP stand-ins for Bedrock and OpenAI, used by benchmark.py.
+
+Point the real SDK clients at them with BEDROCK_ENDPOINT_URL and
+OPENAI_BASE_URL. Latency and error rate are configurable per server, so
+load tests can exercise slow and throttled upstreams without network access.
+"""
+
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+BEDROCK_ANSWER = (
+    "Based on your description, roles such as Data Quality Analyst, Research Assistant "
+    "and Technical Writer are a good fit. They offer focused, independent work."
+)
+
+PROFILE_ANALYSIS = {
+    section: {"description": f"Stub {section} description", "explanation": f"Stub {section} explanation"}
+    for section in ("work_style", "environment", "interaction_level", "task_preference", "accommodations")
+}
+
+
+class StubServer:
+    """Threaded HTTP server answering every POST through `respond(path, body)`"""
+
+    def __init__(self, respond, latency=0.0, jitter=0.0, error_rate=0.0, host="127.0.0.1", port=0):
+        self.respond = respond
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+                if random.random() < server.error_rate:
+                    with server._lock:
+                        server.errors += 1
+                    self._send(429, {"message": "Rate exceeded", "error": {"message": "Rate exceeded"}},
+                               {"x-amzn-ErrorType": "ThrottlingException"})
+                    return
+                self._send(200, server.respond(self.path, body))
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def bedrock_respond(path, body):
+    """retrieve_and_generate on bedrock-agent-runtime and converse on bedrock-runtime"""
+    if path.endswith("/converse"):
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": BEDROCK_ANSWER}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+            "metrics": {"latencyMs": 0},
+        }
+    return {"sessionId": str(uuid.uuid4()), "output": {"text": BEDROCK_ANSWER}, "citations": []}
+
+
+def openai_respond(path, body):
+    """Chat completions shaped for whichever prompt in this repo sent them"""
+    prompt = body["messages"][-1]["content"]
+    if "profile combination" in prompt:
+        content = random.choice(["A-A-A-A", "A-B-C-A", "B-A-B-B", "B-B-A-A"])
+    elif '"results"' in prompt:
+        count = prompt.count("Job Title:")
+        content = json.dumps({"results": [
+            {"index": i, "match_score": random.randint(40, 95), "reasoning": "Stub reasoning"}
+            for i in range(count)
+        ]})
+    elif "match_score" in prompt:
+        content = json.dumps({"match_score": random.randint(40, 95), "reasoning": "Stub reasoning"})
+    else:
+        content = json.dumps(PROFILE_ANALYSIS)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def start_bedrock_stub(**kwargs) -> StubServer:
+    return StubServer(bedrock_respond, **kwargs).start()
+
+
+def start_openai_stub(**kwargs) -> StubServer:
+    return StubServer(openai_respond, **kwargs).start()
@@ -1,21 +1,17 @@
-import boto3
 import json
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
-
 KB_ID = os.getenv('BEDROCK_KB_ID')
 REGION = os.getenv('AWS_REGION', 'us-east-1')
 MODEL_ARN = "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-haiku-20240307-v1:0"
 
-# Create the client
-client = boto3.client("bedrock-agent-runtime", region_name=REGION)
+def get_client():
+    import boto3
+    return boto3.client("bedrock-agent-runtime", region_name=REGION)
 
 def test_query():
     try:
-        response = client.retrieve_and_generate(
+        response = get_client().retrieve_and_generate(
             input={"text": "test query"},
             retrieveAndGenerateConfiguration={
                 "type": "KNOWLEDGE_BASE",
@@ -42,9 +38,13 @@ def test_query():
         print(f"Error: {str(e)}")
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    # KB_ID and REGION were read before .env was loaded
+    import test_rag
     print("Testing knowledge base query...")
-    print(f"Knowledge Base ID: {KB_ID}")
-    print(f"Region: {REGION}")
-    print(f"Model ARN: {MODEL_ARN}")
+    print(f"Knowledge Base ID: {test_rag.KB_ID}")
+    print(f"Region: {test_rag.REGION}")
+    print(f"Model ARN: {test_rag.MODEL_ARN}")
     print("\nExecuting test query...")
-    test_query()
+    test_rag.test_query()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configure the app before any test imports it: no AWS, and nothing written to
+# instance/app.db or the committed job_profiles.db
+_tmp = tempfile.mkdtemp()
+os.environ["BEDROCK_FAKE"] = "true"
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp, "app.db")
+os.environ["JOB_DB_PATH"] = shutil.copy(os.path.join(ROOT, "job_profiles.db"), _tmp)
+os.environ["SESSION_BACKEND"] = "memory"
+os.environ.pop("RAG_CACHE_DB", None)
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def profiles():
+    with open(os.path.join(ROOT, "personality_analyses.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def profiles_file(tmp_path, profiles):
+    """Write (possibly modified) profiles to a temporary file and return its path"""
+    def write(data=None):
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps(profiles if data is None else data))
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    """A fresh fake Bedrock client, empty RAG cache and closed circuit for each test"""
+    import rag_engine
+    from circuit_breaker import CircuitBreaker
+    from fake_bedrock import FakeBedrockClient
+    from rag_cache import LRUCache, TieredCache
+
+    client = FakeBedrockClient(chunk_size=16)
+    monkeypatch.setattr(rag_engine, "client", client)
+    monkeypatch.setattr(rag_engine, "cache", TieredCache(LRUCache()))
+    monkeypatch.setattr(rag_engine, "breaker", CircuitBreaker("bedrock"))
+    return client
+
+
+@pytest.fixture(scope="session")
+def app():
+    import app as app_module
+    app_module.init_db()
+    app_module.app.config["TESTING"] = True
+    return app_module.app
+
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def answered(client):
+    """Fill in the questionnaire for `client`; returns a function taking Q1-Q5"""
+    def answer(q1="A", q2="A", q3="A", q4="A", q5="I enjoy working with data"):
+        with client.session_transaction() as session:
+            session.update(q1=q1, q2=q2, q3=q3, q4=q4, q5=q5)
+    return answer
+
+
+JOBS = [
+    ("Data Quality Analyst", "Acme", "Review datasets for accuracy in a quiet office", "A-A-A-A"),
+    ("Research Assistant", "Vanderbilt University", "Detailed lab research with a structured schedule", "A-A-A-A"),
+    ("Graphic Designer", "Studio B", "Creative design work in a collaborative open studio", "B-B-B-B"),
+    ("Team Lead, Support", "HelpCo", "Lead a support team with regular coordination", "A-B-C-A"),
+    ("Technical Writer", "DocsInc", "Write focused technical documentation remotely", "B-A-A-A"),
+]
+
+
+@pytest.fixture
+def job_db(tmp_path):
+    """Path of a job_profiles.db holding JOBS; returns (path, connection)"""
+    from job_profile_analyzer import create_database, job_hash
+
+    path = str(tmp_path / "job_profiles.db")
+    conn = create_database(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (title, company, description, profile_id, content_hash) VALUES (?, ?, ?, ?, ?)",
+            [(t, c, d, p, job_hash({"title": t, "company": c, "description": d})) for t, c, d, p in JOBS],
+        )
+    yield path, conn
+    conn.close()
@@ -0,0 +1,95 @@
+import logging
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, select, text
+
+import app as app_module
+import models
+from assessment_writer import AssessmentWriter
+from models import Assessment
+
+
+def row(n=0, **overrides):
+    values = dict(
+        q1_answer="A", q2_answer="A", q3_answer="A", q4_answer="A", q5_answer=f"answer {n}",
+        profile_key="A-A-A-A", analysis="<p>analysis</p>", recommendation="Technical Writer",
+        latency_ms=12.5, created_at=datetime(2024, 1, 1),
+    )
+    values.update(overrides)
+    return values
+
+
+def stored(flask_app, q5_prefix="answer"):
+    with flask_app.app_context():
+        return app_module.db.session.scalars(
+            select(Assessment).where(Assessment.q5_answer.startswith(q5_prefix)).order_by(Assessment.id)
+        ).all()
+
+
+def test_flush_inserts_a_batch(app):
+    writer = AssessmentWriter(app, app_module.db)
+    writer.flush([row(n, q5_answer=f"flush {n}") for n in range(3)])
+    rows = stored(app, "flush")
+    assert [r.q5_answer for r in rows] == ["flush 0", "flush 1", "flush 2"]
+    assert rows[0].profile_key == "A-A-A-A" and rows[0].latency_ms == 12.5
+
+
+def test_enqueued_rows_are_written_by_the_thread(app):
+    writer = AssessmentWriter(app, app_module.db, batch_size=2, flush_interval=0.05)
+    for n in range(3):
+        writer.enqueue(**row(n, q5_answer=f"queued {n}"))
+    writer.stop()
+    assert len(stored(app, "queued")) == 3
+    assert writer.pending() == 0
+
+
+def test_failed_flush_is_rolled_back_and_logged(app, caplog):
+    writer = AssessmentWriter(app, app_module.db)
+    with caplog.at_level(logging.ERROR):
+        writer.flush([row(q5_answer="bad", created_at="yesterday")])
+    assert "Error storing 1 assessments" in caplog.text
+    # The session is usable again afterwards
+    writer.flush([row(q5_answer="good")])
+    assert [r.q5_answer for r in stored(app, "good")] == ["good"]
+
+
+@pytest.fixture
+def baseline_app(tmp_path):
+    """An app on a database whose assessment table predates profile_key, recommendation and latency_ms"""
+    flask_app = Flask(__name__)
+    flask_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    app_module.db.init_app(flask_app)
+    with flask_app.app_context():
+        with app_module.db.engine.begin() as conn:
+            conn.execute(text("""
+            CREATE TABLE assessment (
+                id INTEGER NOT NULL PRIMARY KEY,
+                q1_answer VARCHAR(1), q2_answer VARCHAR(1), q3_answer VARCHAR(1), q4_answer VARCHAR(1),
+                q5_answer TEXT, analysis TEXT, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+            )"""))
+            conn.execute(text("INSERT INTO assessment (q1_answer, q5_answer) VALUES ('B', 'old answer')"))
+    return flask_app
+
+
+def test_upgrade_adds_new_columns_to_an_existing_table(baseline_app, caplog):
+    writer = AssessmentWriter(baseline_app, app_module.db)
+    with caplog.at_level(logging.ERROR):
+        writer.flush([row()])
+    assert "no column named profile_key" in caplog.text
+
+    with baseline_app.app_context():
+        app_module.db.create_all()
+        models.upgrade_schema(app_module.db.engine)
+        # Running it again finds nothing to do
+        models.upgrade_schema(app_module.db.engine)
+        inspector = inspect(app_module.db.engine)
+        columns = {c["name"] for c in inspector.get_columns("assessment")}
+        indexes = {i["name"] for i in inspector.get_indexes("assessment")}
+    assert {"profile_key", "recommendation", "latency_ms"} <= columns
+    assert {"ix_assessment_profile_key_created_at", "ix_assessment_created_at"} <= indexes
+
+    writer.flush([row()])
+    rows = stored(baseline_app, "")
+    assert [(r.q5_answer, r.profile_key) for r in rows] == [("old answer", None), ("answer 0", "A-A-A-A")]
@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import automating_profiles
+
+
+class FakeCompletions:
+    """Returns the queued message contents in order"""
+
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = self.contents.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def openai(monkeypatch):
+    def install(*contents):
+        completions = FakeCompletions(contents)
+        monkeypatch.setattr(automating_profiles, "get_client", lambda: SimpleNamespace(
+            chat=SimpleNamespace(completions=completions)))
+        return completions
+    return install
+
+
+def full_analysis():
+    return {s: {"description": s, "explanation": f"{s}."} for s in automating_profiles.ANALYSIS_SECTIONS}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"key": "A-A-A-A", "value": 1}) + "\n" + '{"key": "A-A-A-B", "va')
+    assert automating_profiles.load_checkpoint(str(path)) == {"A-A-A-A": 1}
+
+
+def test_append_after_torn_line_keeps_both_records(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"key": "A-A-A-A", "value": 1}) + "\n" + '{"key": "A-A-A-B", "va')
+
+    jobs = {"A-A-A-A": lambda: 1, "A-A-A-B": lambda: 2, "A-A-A-C": lambda: 3}
+    completed, failed = automating_profiles.run_checkpointed(jobs, str(path), max_workers=2)
+
+    assert failed == []
+    assert completed == {"A-A-A-A": 1, "A-A-A-B": 2, "A-A-A-C": 3}
+    # Every line parses, so a later resume loses nothing
+    assert automating_profiles.load_checkpoint(str(path)) == completed
+
+
+def test_failed_jobs_are_not_checkpointed(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    completed, failed = automating_profiles.run_checkpointed({"a": lambda: None, "b": lambda: 2}, str(path))
+    assert failed == ["a"]
+    assert automating_profiles.load_checkpoint(str(path)) == {"b": 2}
+
+
+def test_incomplete_analysis_is_requested_again(openai):
+    partial = full_analysis()
+    del partial["accommodations"]
+    completions = openai("not json", json.dumps(partial), json.dumps(full_analysis()))
+    assert automating_profiles.analyze_combination(["Q: ?\nA: !"]) == full_analysis()
+    assert completions.calls == 3
+
+
+def test_gives_up_after_attempts(openai):
+    completions = openai(*["{}"] * automating_profiles.RESPONSE_ATTEMPTS)
+    assert automating_profiles.analyze_combination(["Q: ?\nA: !"]) is None
+    assert completions.calls == automating_profiles.RESPONSE_ATTEMPTS
+
+
+def test_fragment_jobs_grow_with_options_not_their_product():
+    jobs = automating_profiles.fragment_jobs()
+    assert len(jobs) < len(automating_profiles.generate_all_combinations())
+    assert "work_style=A" in jobs
+
+
+@pytest.fixture
+def output(tmp_path, monkeypatch):
+    """Point the generator's output and checkpoint at tmp_path; returns the output path"""
+    path = tmp_path / "personality_analyses.json"
+    monkeypatch.setattr(automating_profiles, "OUTPUT_FILE", str(path))
+    monkeypatch.setattr(automating_profiles, "CHECKPOINT_FILE", str(tmp_path / "checkpoint.jsonl"))
+    return path
+
+
+def test_resume_skips_checkpointed_combinations(output, monkeypatch):
+    with open(automating_profiles.CHECKPOINT_FILE, "w") as f:
+        automating_profiles.append_checkpoint(f, "A-A-A-A", "from checkpoint")
+    analyzed = []
+    monkeypatch.setattr(automating_profiles, "analyze_combination",
+                        lambda answers: analyzed.append(answers) or full_analysis())
+
+    automating_profiles.main(max_workers=2, combinations=[("A", "A", "A", "A"), ("B", "A", "A", "A")])
+    assert len(analyzed) == 1
+    results = json.loads(output.read_text())
+    assert list(results) == ["A-A-A-A", "B-A-A-A"]
+    assert results["A-A-A-A"] == "from checkpoint"
+    assert not automating_profiles.os.path.exists(automating_profiles.CHECKPOINT_FILE)
+
+
+def test_failures_leave_the_output_file_alone(output, monkeypatch):
+    output.write_text(json.dumps({"A-A-A-A": "complete", "A-A-A-B": "complete"}))
+    monkeypatch.setattr(automating_profiles, "analyze_combination",
+                        lambda answers: None if "flexibility" in answers[0] else full_analysis())
+
+    automating_profiles.main(max_workers=2, combinations=[("A", "A", "A", "A"), ("B", "A", "A", "A")])
+    assert json.loads(output.read_text()) == {"A-A-A-A": "complete", "A-A-A-B": "complete"}
+    assert list(automating_profiles.load_checkpoint(automating_profiles.CHECKPOINT_FILE)) == ["A-A-A-A"]
+
+    # The re-run only retries the failure, then replaces the file
+    monkeypatch.setattr(automating_profiles, "analyze_combination", lambda answers: full_analysis())
+    automating_profiles.main(max_workers=2, combinations=[("A", "A", "A", "A"), ("B", "A", "A", "A")])
+    assert list(json.loads(output.read_text())) == ["A-A-A-A", "B-A-A-A"]
+    assert not automating_profiles.os.path.exists(automating_profiles.CHECKPOINT_FILE)
+
+
+def test_fragments_file_is_only_written_once_complete(tmp_path, monkeypatch):
+    path = tmp_path / "profile_fragments.json"
+    monkeypatch.setattr(automating_profiles, "FRAGMENTS_FILE", str(path))
+    monkeypatch.setattr(automating_profiles, "FRAGMENT_CHECKPOINT_FILE", str(tmp_path / "fragments.jsonl"))
+    section = {"description": "d", "explanation": "e"}
+    monkeypatch.setattr(automating_profiles, "analyze_pair", lambda first, second: section)
+    monkeypatch.setattr(automating_profiles, "analyze_option",
+                        lambda q_idx, option: None if q_idx == 3 else section)
+
+    automating_profiles.generate_fragments(max_workers=2, full_combinations=[])
+    assert not path.exists()
+
+    monkeypatch.setattr(automating_profiles, "analyze_option", lambda q_idx, option: section)
+    automating_profiles.generate_fragments(max_workers=2, full_combinations=[])
+    assert sorted(json.loads(path.read_text())["options"]["task_preference"]) == ["A", "B"]
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+import background
+from background import DONE, ERROR, PENDING, TaskQueue
+
+
+@pytest.fixture
+def tasks():
+    queue = TaskQueue(max_workers=2, result_ttl=60)
+    yield queue
+    queue.shutdown()
+
+
+def test_pending_then_done(tasks):
+    release = threading.Event()
+    task_id = tasks.submit(lambda: release.wait(5) and "cards")
+    assert tasks.status(task_id) == (PENDING, None)
+    release.set()
+    tasks._tasks[task_id][0].result(timeout=5)
+    assert tasks.status(task_id) == (DONE, "cards")
+
+
+def test_errors_are_reported(tasks):
+    def fail():
+        raise RuntimeError("bedrock down")
+
+    task_id = tasks.submit(fail)
+    tasks._tasks[task_id][0].exception(timeout=5)
+    state, value = tasks.status(task_id)
+    assert state == ERROR
+    assert isinstance(value, RuntimeError)
+
+
+def test_unknown_and_explicit_task_ids(tasks):
+    assert tasks.status("nope") == (None, None)
+    assert tasks.submit(lambda x: x, 1, task_id="mine") == "mine"
+
+
+def test_finished_tasks_expire(tasks, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(background.time, "monotonic", lambda: now[0])
+    task_id = tasks.submit(lambda: 1)
+    tasks._tasks[task_id][0].result(timeout=5)
+
+    now[0] += 61
+    # Expired results are purged on the next submit
+    tasks.submit(lambda: 2)
+    assert tasks.status(task_id) == (None, None)
+
+
+def test_reset_forgets_tasks(tasks):
+    task_id = tasks.submit(lambda: 1)
+    tasks.reset()
+    assert tasks.status(task_id) == (None, None)
+    assert tasks.submit(lambda: 2)
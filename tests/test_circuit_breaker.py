@@ -0,0 +1,120 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**kwargs):
+    options = dict(failure_rate=0.5, slow_call_seconds=1.0, window=4, min_calls=4, reset_seconds=30)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def boom():
+    raise RuntimeError("boom")
+
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            breaker.call(boom)
+
+
+def test_passes_results_and_errors_through(clock):
+    breaker = make_breaker()
+    assert breaker.call(lambda x: x * 2, 21) == 42
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_needs_min_calls_before_opening(clock):
+    breaker = make_breaker()
+    fail(breaker, 3)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+
+
+def test_opens_at_failure_rate(clock):
+    breaker = make_breaker()
+    breaker.call(lambda: None)
+    breaker.call(lambda: None)
+    fail(breaker)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+
+
+def test_window_forgets_old_failures(clock):
+    breaker = make_breaker(failure_rate=0.75, min_calls=4, window=4)
+    fail(breaker, 2)
+    for _ in range(4):
+        breaker.call(lambda: None)
+    fail(breaker, 2)
+    # Only the last four calls count: two failures out of four stays below 75%
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = make_breaker(min_calls=1, window=1)
+
+    def slow():
+        clock.now += 2
+        return "late"
+
+    assert breaker.call(slow) == "late"
+    assert breaker.state == OPEN
+
+
+def test_half_open_trial_closes_on_success(clock):
+    breaker = make_breaker()
+    fail(breaker, 4)
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 1
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    # A fresh window: one failure does not reopen it
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_trial_reopens_on_failure(clock):
+    breaker = make_breaker()
+    fail(breaker, 4)
+    clock.now += 30
+    fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = make_breaker()
+    fail(breaker, 4)
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == CLOSED
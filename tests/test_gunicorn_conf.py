@@ -0,0 +1,86 @@
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+import job_search
+import match_table
+import metrics
+import precomputed_recommendations
+import rag_engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def conf(tmp_path, monkeypatch):
+    """The settings and hooks gunicorn reads from gunicorn.conf.py"""
+    monkeypatch.setenv("METRICS_MULTIPROC_DIR", str(tmp_path))
+    return runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+
+
+class RecordingWriter:
+    """Stands in for metrics.SnapshotWriter"""
+    instances = []
+
+    def __init__(self):
+        self.started = self.stopped = False
+        RecordingWriter.instances.append(self)
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_master_preloads_the_app(conf):
+    assert conf["wsgi_app"] == "app:app"
+    assert conf["preload_app"]
+    assert conf["worker_class"] == "gthread"
+
+
+def test_post_fork_gives_the_worker_its_own_state(app, conf, monkeypatch):
+    reset = []
+    monkeypatch.setattr(rag_engine, "reset_clients", lambda: reset.append("bedrock clients"))
+    monkeypatch.setattr(rag_engine, "warm_up", lambda: reset.append("bedrock warm-up"))
+    monkeypatch.setattr(match_table, "reset_connections", lambda: reset.append("match_table"))
+    monkeypatch.setattr(job_search, "reset_connections", lambda: reset.append("job_search"))
+    monkeypatch.setattr(precomputed_recommendations, "reset_connections", lambda: reset.append("precomputed"))
+    monkeypatch.setattr(app_module.recommendation_queue, "reset", lambda: reset.append("task queue"))
+    monkeypatch.setattr(app_module.assessment_writer, "reset", lambda: reset.append("assessment writer"))
+    monkeypatch.setattr(rag_engine.cache, "reset_connections", lambda: reset.append("rag cache"), raising=False)
+    monkeypatch.setattr(app_module.app.session_interface, "reset_connections", lambda: reset.append("sessions"),
+                        raising=False)
+    monkeypatch.setattr(metrics, "registry", metrics.Registry())
+    metrics.registry.inc("flows_total")
+    monkeypatch.setattr(metrics, "SnapshotWriter", RecordingWriter)
+
+    conf["post_fork"](SimpleNamespace(log=None), SimpleNamespace(pid=1234))
+    assert sorted(reset) == sorted([
+        "bedrock clients", "rag cache", "sessions", "match_table", "job_search", "precomputed",
+        "task queue", "assessment writer", "bedrock warm-up",
+    ])
+    # The master's counts stay with the master; the worker reports its own
+    assert metrics.registry.counters == {}
+    assert RecordingWriter.instances[-1].started
+
+
+def test_worker_exit_flushes_assessments_and_metrics(conf, monkeypatch):
+    stopped = []
+    monkeypatch.setattr(app_module.assessment_writer, "stop", lambda: stopped.append(True))
+    writer = RecordingWriter()
+    # run_path returns a copy of the module globals; set the one the hook reads
+    conf["worker_exit"].__globals__["_snapshot_writer"] = writer
+    conf["worker_exit"](SimpleNamespace(log=None), SimpleNamespace(pid=1234))
+    assert stopped == [True]
+    assert writer.stopped
+
+
+def test_child_exit_archives_the_workers_snapshot(conf, monkeypatch):
+    archived = []
+    monkeypatch.setattr(metrics, "archive_snapshot", lambda pid: archived.append(pid))
+    conf["child_exit"](SimpleNamespace(log=None), SimpleNamespace(pid=1234))
+    assert archived == [1234]
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys
+import dotenv
+calls = []
+dotenv.load_dotenv = lambda *args, **kwargs: calls.append(args)
+import {module}
+print(json.dumps({{
+    "load_dotenv": len(calls),
+    "sdks": sorted(m for m in ("boto3", "openai", "bs4") if m in sys.modules),
+}}))
+"""
+
+
+@pytest.mark.parametrize("module", [
+    "app", "rag_engine", "automating_profiles", "job_profile_analyzer", "utils", "test_rag",
+])
+def test_import_loads_no_dotenv_and_builds_no_clients(module):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    assert json.loads(result.stdout.splitlines()[-1]) == {"load_dotenv": 0, "sdks": []}
+
+
+def test_scripts_load_dotenv(tmp_path):
+    (tmp_path / ".env").write_text("PRECOMPUTE_WORKERS=3\n")
+    script = (
+        "import runpy, sys; sys.argv = ['precomputed_recommendations.py', '--help']\n"
+        "try:\n    runpy.run_path(sys.argv[0], run_name='__main__')\nexcept SystemExit:\n    pass\n"
+        "print(sys.modules['precomputed_recommendations'].MAX_WORKERS)"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("PRECOMPUTE_WORKERS", None)
+    (tmp_path / "precomputed_recommendations.py").symlink_to(os.path.join(ROOT, "precomputed_recommendations.py"))
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.splitlines()[-1] == "3"
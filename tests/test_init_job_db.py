@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import pytest
+
+import app as app_module
+import job_schema
+import precomputed_recommendations
+from job_search import search_jobs
+from match_table import top_matches
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """A copy of the committed job_profiles.db, still on the original schema"""
+    return shutil.copy(os.path.join(ROOT, "job_profiles.db"), tmp_path)
+
+
+def test_baseline_database_is_migrated(baseline_db):
+    app_module.init_job_db(baseline_db)
+    # Running it again on an up-to-date database changes nothing
+    app_module.init_job_db(baseline_db)
+
+    conn = job_schema.connect(baseline_db)
+    try:
+        page = search_jobs(profile_key="B-A-A-A", conn=conn)
+        assert [r["score"] for r in page["results"]][0] == 100
+        assert len(page["results"]) == 2
+        assert top_matches("B-B-C-B", conn=conn)[0]["exact_match"]
+        assert precomputed_recommendations.stored_recommendation("A-A-A-A", "quiet", conn) is None
+        assert conn.execute("SELECT COUNT(*) FROM profile_sections").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_app_serves_the_migrated_database(client):
+    response = client.get("/api/jobs/search?profile=B-B-C-B")
+    assert response.status_code == 200
+    assert response.get_json()["results"][0]["score"] == 100
+    assert app_module.fetch_job_matches("B-B-C-B")
+
+
+@pytest.mark.parametrize("setting, runs", [("true", 1), ("false", 0)])
+def test_precomputed_refresh_can_be_turned_off(baseline_db, monkeypatch, setting, runs):
+    app_module.init_job_db(baseline_db)
+    calls = []
+    monkeypatch.setenv("PRECOMPUTE_ON_START", setting)
+    monkeypatch.setattr(precomputed_recommendations, "precompute", lambda conn: calls.append(conn))
+    app_module.refresh_precomputed_recommendations(baseline_db)
+    assert len(calls) == runs
+
+
+def test_precomputed_refresh_failures_do_not_stop_startup(baseline_db, monkeypatch, caplog):
+    def fail(conn):
+        raise RuntimeError("bedrock down")
+    monkeypatch.setattr(precomputed_recommendations, "precompute", fail)
+    app_module.refresh_precomputed_recommendations(baseline_db)
+    assert "bedrock down" in caplog.text
@@ -0,0 +1,58 @@
+import pytest
+
+import job_index
+from job_index import JobIndex
+
+
+@pytest.fixture
+def default_index(job_db, tmp_path, monkeypatch):
+    path, conn = job_db
+    monkeypatch.setattr(job_index, "DB_PATH", path)
+    monkeypatch.setattr(job_index, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(job_index, "CHECK_INTERVAL", 0)
+    monkeypatch.setattr(job_index, "_default_index", None)
+    return conn
+
+
+def test_search_ranks_matching_jobs_first(job_db):
+    index = JobIndex.build(job_db[1])
+    assert index.search("creative design studio", k=1)[0]["title"] == "Graphic Designer"
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_search_with_non_positive_k_is_empty(job_db, k):
+    assert JobIndex.build(job_db[1]).search("data", k=k) == []
+
+
+def test_search_with_k_beyond_corpus_returns_everything(job_db):
+    index = JobIndex.build(job_db[1])
+    assert len(index.search("data", k=len(index) + 10)) == len(index)
+
+
+def test_saved_index_round_trips(job_db, tmp_path):
+    index = JobIndex.build(job_db[1])
+    index.save(str(tmp_path / "index"))
+    loaded = JobIndex.load(str(tmp_path / "index"))
+    assert loaded.fingerprint == index.fingerprint
+    assert loaded.search("technical documentation", k=1) == index.search("technical documentation", k=1)
+
+
+def test_default_index_rebuilds_after_jobs_are_added(default_index):
+    assert len(job_index.get_default_index()) == 5
+    with default_index:
+        default_index.execute(
+            "INSERT INTO jobs (title, company, description, profile_id) VALUES (?, ?, ?, ?)",
+            ("Marine Technician", "Aquarium", "Care for marine animals", "B-B-A-A"),
+        )
+    index = job_index.get_default_index()
+    assert len(index) == 6
+    assert index.search("marine animals", k=1)[0]["title"] == "Marine Technician"
+    # Reused as long as the jobs are unchanged
+    assert job_index.get_default_index() is index
+
+
+def test_default_index_reuses_an_up_to_date_saved_index(default_index, monkeypatch):
+    saved = job_index.get_default_index()
+    monkeypatch.setattr(job_index, "_default_index", None)
+    monkeypatch.setattr(job_index, "_rebuild", lambda: pytest.fail("rebuilt an up-to-date index"))
+    assert job_index.get_default_index().fingerprint == saved.fingerprint
@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+
+import job_profile_analyzer
+from job_profile_analyzer import analyze_and_store_jobs, create_database, job_hash
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Stand-in classifier; returns the descriptions it was asked about"""
+    calls = []
+
+    def classify(description, bucket=None):
+        calls.append(description)
+        return "B-A-A-A" if "remote" in description.lower() else "A-B-C-A"
+
+    monkeypatch.setattr(job_profile_analyzer, "analyze_job_description", classify)
+    return calls
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = create_database(str(tmp_path / "job_profiles.db"))
+    yield conn
+    conn.close()
+
+
+def jobs_table(conn):
+    return conn.execute("SELECT title, company, profile_id FROM jobs ORDER BY job_id").fetchall()
+
+
+WRITER = {"title": "Technical Writer", "company": "DocsInc", "description": "Write docs remotely"}
+LEAD = {"title": "Team Lead", "company": "HelpCo", "description": "Lead a support team"}
+
+
+def test_duplicate_postings_in_a_feed_are_classified_once(conn, llm):
+    reposted = {"title": " technical  WRITER", "company": "docsinc", "description": "Write  docs remotely "}
+    report = analyze_and_store_jobs(conn, [WRITER, reposted, LEAD], max_in_flight=2, requests_per_minute=6000)
+    assert report["duplicates"] == 1
+    assert report["classified"] == report["stored"] == 2
+    assert sorted(llm) == ["Lead a support team", "Write docs remotely"]
+    assert len(jobs_table(conn)) == 2
+
+
+def test_cached_descriptions_skip_the_llm(conn, llm):
+    analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    # Same description under another title: a new job, but a cached classification
+    retitled = dict(WRITER, title="Documentation Writer")
+    report = analyze_and_store_jobs(conn, [retitled], requests_per_minute=6000)
+    assert report["cached"] == 1 and report["classified"] == 0
+    assert llm == ["Write docs remotely"]
+    assert jobs_table(conn)[-1] == ("Documentation Writer", "DocsInc", "B-A-A-A")
+
+
+def test_new_prompt_version_reclassifies(conn, llm, monkeypatch):
+    analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    monkeypatch.setattr(job_profile_analyzer, "PROMPT_VERSION", "2")
+    report = analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    assert report["cached"] == 0 and report["classified"] == 1
+    assert len(llm) == 2
+
+
+def test_reingested_job_updates_the_existing_row(conn, llm, monkeypatch):
+    analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    monkeypatch.setattr(job_profile_analyzer, "PROMPT_VERSION", "2")
+    monkeypatch.setattr(job_profile_analyzer, "analyze_job_description", lambda description, bucket=None: "A-A-A-A")
+    analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    assert jobs_table(conn) == [("Technical Writer", "DocsInc", "A-A-A-A")]
+
+
+def test_failed_classifications_are_not_stored_or_cached(conn, monkeypatch):
+    monkeypatch.setattr(job_profile_analyzer, "analyze_job_description", lambda description, bucket=None: "no idea")
+    report = analyze_and_store_jobs(conn, [WRITER], requests_per_minute=6000)
+    assert report["failed"] == 1 and report["stored"] == 0
+    assert conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0] == 0
+
+
+def test_existing_rows_get_content_hashes(tmp_path):
+    path = str(tmp_path / "job_profiles.db")
+    old = sqlite3.connect(path)
+    # jobs as the original create_database made it: no content_hash
+    old.execute("""
+    CREATE TABLE jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company TEXT, description TEXT, profile_id TEXT
+    )""")
+    old.executemany("INSERT INTO jobs (title, company, description, profile_id) VALUES (?, ?, ?, ?)", [
+        ("Technical Writer", "DocsInc", "Write docs remotely", "B-A-A-A"),
+        ("Team Lead", "HelpCo", "Lead a support team", "A-B-C-A"),
+        ("technical writer", "DocsInc", "Write  docs remotely", "B-A-A-A"),
+    ])
+    old.commit()
+    old.close()
+
+    conn = create_database(path)
+    try:
+        rows = conn.execute("SELECT job_id, title, content_hash FROM jobs ORDER BY job_id").fetchall()
+        assert [(job_id, title) for job_id, title, _ in rows] == [(1, "Technical Writer"), (2, "Team Lead")]
+        assert rows[0][2] == job_hash(WRITER)
+        assert rows[1][2] == job_hash(LEAD)
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO jobs (title, company, description, content_hash) VALUES ('x', 'y', 'z', ?)",
+                         (rows[0][2],))
+    finally:
+        conn.close()
@@ -0,0 +1,114 @@
+import logging
+import sqlite3
+
+import pytest
+
+import app as app_module
+import job_search
+from job_search import InvalidCursor, decode_cursor, encode_cursor, search_jobs
+
+
+def titles(page):
+    return [r["title"] for r in page["results"]]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.75, 12)) == (0.75, 12)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_text_search_ranks_by_relevance(job_db):
+    _, conn = job_db
+    page = search_jobs("technical documentation", conn=conn)
+    assert titles(page)[0] == "Technical Writer"
+    assert page["results"][0]["profile_score"] == 0
+    assert "Graphic Designer" not in titles(page)
+
+
+def test_profile_search_ranks_by_shared_dimensions(job_db):
+    _, conn = job_db
+    page = search_jobs(profile_key="a-a-a-a", limit=10, conn=conn)
+    assert page["profile_key"] == "A-A-A-A"
+    assert set(titles(page)[:2]) == {"Data Quality Analyst", "Research Assistant"}
+    assert titles(page)[2] == "Technical Writer"
+    assert titles(page)[-1] == "Graphic Designer"
+    assert [r["score"] for r in page["results"]] == [100, 100, 75, 50, 0]
+
+
+def test_text_and_profile_are_blended(job_db):
+    _, conn = job_db
+    text_only = search_jobs("quiet structured research", conn=conn)
+    blended = search_jobs("quiet structured research", "B-B-B-B", conn=conn)
+    result = blended["results"][0]
+    expected = job_search.TEXT_WEIGHT * result["text_score"] + job_search.PROFILE_WEIGHT * result["profile_score"]
+    assert result["score"] == pytest.approx(100 * expected / (job_search.TEXT_WEIGHT + job_search.PROFILE_WEIGHT), abs=0.01)
+    assert set(titles(blended)) == set(titles(text_only))
+
+
+def test_user_text_is_not_fts_syntax(job_db):
+    _, conn = job_db
+    assert search_jobs('lead" OR NEAR(', conn=conn)["results"][0]["title"] == "Team Lead, Support"
+
+
+def test_keyset_pagination_is_stable(job_db):
+    _, conn = job_db
+    seen, cursor = [], None
+    while True:
+        page = search_jobs(profile_key="A-A-A-A", limit=2, cursor=cursor, conn=conn)
+        seen += titles(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        # A job ingested mid-pagination must not shift the pages that follow
+        conn.execute(
+            "INSERT INTO jobs (title, company, description, profile_id) VALUES ('New Job', 'NewCo', 'x', 'A-A-A-A')"
+        )
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_limit_is_clamped(job_db, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(job_search, "MAX_LIMIT", 2)
+    assert len(search_jobs(profile_key="A-A-A-A", limit=100, conn=conn)["results"]) == 2
+    assert len(search_jobs(profile_key="A-A-A-A", limit=0, conn=conn)["results"]) == 1
+
+
+def test_substring_fallback_without_fts(job_db):
+    _, conn = job_db
+    conn.execute("DROP TABLE jobs_fts")
+    page = search_jobs("designer", conn=conn)
+    assert titles(page) == ["Graphic Designer"]
+
+
+def test_search_route(client, job_db, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(job_search._connections, "get", lambda: conn)
+
+    response = client.get("/api/jobs/search?q=writer&limit=1")
+    assert response.status_code == 200
+    assert response.get_json()["results"][0]["title"] == "Technical Writer"
+
+    assert client.get("/api/jobs/search?profile=Z-Z-Z-Z").status_code == 400
+    assert client.get("/api/jobs/search?profile=A-A-A-A-B").status_code == 400
+    assert client.get("/api/jobs/search?profile=best:A-A-A-A").status_code == 400
+    assert client.get("/api/jobs/search?q=x&cursor=bogus").status_code == 400
+    assert client.get("/api/jobs/search?q=x&limit=many").status_code == 400
+    assert client.get("/api/jobs/search").status_code == 400
+
+
+def test_unavailable_search_is_logged_once(client, monkeypatch, caplog):
+    monkeypatch.setattr(app_module, "_job_search_unavailable", False)
+
+    def broken(*args):
+        raise sqlite3.OperationalError("no such column: j.work_style")
+
+    monkeypatch.setattr(job_search, "search_jobs", broken)
+    with caplog.at_level(logging.ERROR):
+        assert client.get("/api/jobs/search?q=writer").status_code == 503
+        assert client.get("/api/jobs/search?q=designer").status_code == 503
+    assert len([r for r in caplog.records if "searching jobs" in r.getMessage()]) == 1
+
+    monkeypatch.setattr(job_search, "search_jobs", lambda *args: {"results": [], "next_cursor": None})
+    assert client.get("/api/jobs/search?q=writer").status_code == 200
+    assert not app_module._job_search_unavailable
@@ -0,0 +1,122 @@
+import sqlite3
+
+import pytest
+
+import match_table
+from job_profile_analyzer import create_database
+from match_table import all_profile_keys, normalize_profile_key, parse_profile_key, refresh_matches, top_matches
+
+
+def count_matches(conn, job_id=None):
+    if job_id is None:
+        return conn.execute("SELECT COUNT(*) FROM profile_job_matches").fetchone()[0]
+    return conn.execute("SELECT COUNT(*) FROM profile_job_matches WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("A-B-C-A", "A-B-C-A"),
+    ("The best match is a - b - c - a.", "A-B-C-A"),
+    ("A-C-A-A", None),  # Q2 has no option C
+    ("A-A-A-A-B", None),
+    ("no idea", None),
+    (None, None),
+])
+def test_parse_profile_key(raw, expected):
+    assert parse_profile_key(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("A-B-C-A", "A-B-C-A"),
+    (" a-b-c-a ", "A-B-C-A"),
+    ("A-A-A-A-B", None),
+    ("A-A-A-AB", None),
+    ("profile A-B-C-A", None),
+    ("A-C-A-A", None),
+    ("", None),
+])
+def test_normalize_profile_key(raw, expected):
+    assert normalize_profile_key(raw) == expected
+
+
+def test_all_profile_keys():
+    keys = all_profile_keys()
+    assert len(keys) == 24
+    assert "A-A-A-A" in keys and "B-B-C-B" in keys
+
+
+def test_top_matches_ranks_exact_matches_first(job_db):
+    _, conn = job_db
+    with conn:
+        refresh_matches(conn)
+
+    results = top_matches("A-A-A-A", limit=5, conn=conn)
+    titles = [r["title"] for r in results]
+    assert set(titles[:2]) == {"Data Quality Analyst", "Research Assistant"}
+    assert titles[2] == "Technical Writer"
+    assert [r["exact_match"] for r in results] == [True, True, False]
+    assert [r["match_score"] for r in results] == [100, 100, 75]
+    # Graphic Designer (B-B-B-B) is further than MATCH_MAX_DISTANCE from A-A-A-A
+    assert "Graphic Designer" not in titles
+
+
+def test_refresh_selected_jobs(job_db):
+    _, conn = job_db
+    with conn:
+        refresh_matches(conn)
+        conn.execute("UPDATE jobs SET profile_id = 'B-B-B-B' WHERE title = 'Technical Writer'")
+        (job_id,) = conn.execute("SELECT job_id FROM jobs WHERE title = 'Technical Writer'").fetchone()
+        refresh_matches(conn, [job_id])
+
+    assert "Technical Writer" not in [r["title"] for r in top_matches("A-A-A-A", conn=conn)]
+    assert {r["title"] for r in top_matches("B-B-B-B", conn=conn) if r["exact_match"]} == {
+        "Graphic Designer", "Technical Writer",
+    }
+
+
+def test_refresh_trims_to_top_n(job_db, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(match_table, "TOP_N", 1)
+    with conn:
+        refresh_matches(conn)
+    assert len(top_matches("A-A-A-A", limit=5, conn=conn)) == 1
+
+
+def test_create_database_ranks_existing_jobs(job_db):
+    path, conn = job_db
+    conn.close()
+
+    conn = create_database(path)
+    try:
+        assert count_matches(conn) > 0
+        assert top_matches("A-B-C-A", conn=conn)[0]["title"] == "Team Lead, Support"
+    finally:
+        conn.close()
+
+
+def test_create_database_drops_matches_of_duplicate_jobs(job_db):
+    path, conn = job_db
+    with conn:
+        refresh_matches(conn)
+        conn.execute("DROP INDEX IF EXISTS idx_jobs_content_hash")
+        cursor = conn.execute(
+            "INSERT INTO jobs (title, company, description, profile_id) "
+            "SELECT title, company, description, profile_id FROM jobs WHERE title = 'Graphic Designer'"
+        )
+        duplicate = cursor.lastrowid
+        refresh_matches(conn, [duplicate])
+    assert count_matches(conn, duplicate) > 0
+    conn.close()
+
+    conn = create_database(path)
+    try:
+        assert conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (duplicate,)).fetchone() is None
+        assert count_matches(conn, duplicate) == 0
+        assert [r["title"] for r in top_matches("B-B-B-B", conn=conn)].count("Graphic Designer") == 1
+    finally:
+        conn.close()
+
+
+def test_top_matches_without_table_raises(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "empty.db"))
+    with pytest.raises(sqlite3.OperationalError):
+        top_matches("A-A-A-A", conn=conn)
@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+import metrics
+from metrics import Registry, SnapshotWriter, archive_snapshot, external_call, render_prometheus, timed, write_snapshot
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty registry standing in for this process's metrics"""
+    registry = Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", None)
+    return registry
+
+
+def worker_snapshot(directory, pid, seconds, errors, queued):
+    """Write the snapshot another worker process would have left"""
+    histogram = metrics.Histogram()
+    for s in seconds:
+        histogram.observe(s)
+    data = {
+        "pid": pid,
+        "histograms": {"results": {"buckets": list(histogram.buckets), "counts": histogram.counts, "sum": histogram.sum}},
+        "counters": {"external_bedrock_errors_total": errors},
+        "gauges": {"assessment_queue_size": {"label": "name", "value": queued}},
+    }
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump(data, f)
+
+
+def sample(text, line_start):
+    return [line for line in text.splitlines() if line.startswith(line_start)]
+
+
+def test_single_process_has_no_pid_labels(registry):
+    registry.histogram("results").observe(0.2)
+    registry.inc("external_bedrock_errors_total")
+    registry.gauge("assessment_queue_size", lambda: 3)
+    registry.gauge("rag_cache_hits", lambda: {"LRUCache": 5}, label="tier")
+
+    text = render_prometheus()
+    assert 'wayfinder_stage_duration_seconds_count{stage="results"} 1' in text
+    assert "wayfinder_external_bedrock_errors_total 1" in text
+    assert "wayfinder_assessment_queue_size 3" in text
+    assert 'wayfinder_rag_cache_hits{tier="LRUCache"} 5' in text
+
+
+def test_workers_are_summed(registry, tmp_path):
+    directory = str(tmp_path)
+    registry.histogram("results").observe(0.2)
+    registry.inc("external_bedrock_errors_total", 1)
+    registry.gauge("assessment_queue_size", lambda: 3)
+    worker_snapshot(directory, 111, [0.2, 3.0], errors=2, queued=7)
+    worker_snapshot(directory, 222, [0.02], errors=4, queued=0)
+    # This process's snapshot on disk is stale; its live metrics are used instead
+    worker_snapshot(directory, os.getpid(), [1.0] * 50, errors=100, queued=99)
+
+    text = render_prometheus(directory=directory)
+    assert 'wayfinder_stage_duration_seconds_count{stage="results"} 4' in text
+    assert 'wayfinder_stage_duration_seconds_bucket{stage="results",le="0.25"} 3' in text
+    assert "wayfinder_external_bedrock_errors_total 7" in text
+    assert set(sample(text, "wayfinder_assessment_queue_size{")) == {
+        'wayfinder_assessment_queue_size{pid="111"} 7',
+        'wayfinder_assessment_queue_size{pid="222"} 0',
+        f'wayfinder_assessment_queue_size{{pid="{os.getpid()}"}} 3',
+    }
+
+
+def test_exited_workers_keep_their_totals_but_not_their_gauges(registry, tmp_path):
+    directory = str(tmp_path)
+    worker_snapshot(directory, 111, [0.2], errors=2, queued=7)
+    worker_snapshot(directory, 222, [0.2, 0.2], errors=3, queued=1)
+    archive_snapshot(111, directory)
+    archive_snapshot(222, directory)
+    archive_snapshot(333, directory)  # never wrote a snapshot
+
+    assert sorted(os.listdir(directory)) == [metrics.ARCHIVE_FILE]
+    text = render_prometheus(directory=directory)
+    assert 'wayfinder_stage_duration_seconds_count{stage="results"} 3' in text
+    assert "wayfinder_external_bedrock_errors_total 5" in text
+    assert "assessment_queue_size" not in text
+
+
+def test_snapshot_writer_writes_a_final_snapshot(registry, tmp_path):
+    registry.inc("flows_total", 2)
+    writer = SnapshotWriter(str(tmp_path), interval=60)
+    writer.start()
+    writer.stop()
+    with open(tmp_path / f"{os.getpid()}.json") as f:
+        assert json.load(f)["counters"] == {"flows_total": 2}
+
+
+def test_reset_keeps_gauges(registry):
+    registry.histogram("results").observe(0.1)
+    registry.inc("flows_total")
+    registry.gauge("assessment_queue_size", lambda: 0)
+    registry.reset()
+    assert registry.histograms == {} and registry.counters == {}
+    assert "assessment_queue_size" in registry.gauges
+
+
+def test_unreadable_snapshots_are_ignored(registry, tmp_path):
+    (tmp_path / "999.json").write_text("{not json")
+    write_snapshot(str(tmp_path))
+    assert len(metrics.read_snapshots(str(tmp_path))) == 1
+
+
+def test_external_call_times_and_counts_errors(registry):
+    with timed("results"):
+        with pytest.raises(RuntimeError):
+            with external_call("bedrock"):
+                raise RuntimeError("upstream failure")
+    assert registry.histogram("results").count == 1
+    assert registry.histogram("external_bedrock").count == 1
+    assert registry.counters == {"external_bedrock_errors_total": 1}
+
+
+def test_metrics_endpoint(client, registry):
+    registry.inc("flows_total")
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    assert "wayfinder_flows_total 1" in response.get_data(as_text=True)
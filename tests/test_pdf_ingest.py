@@ -0,0 +1,108 @@
+import pytest
+
+from job_profile_analyzer import create_database
+from match_table import top_matches
+from pdf_ingest import ingest_directory, iter_postings
+
+LISTING = [
+    "Careers at Acme\nJob Title: Data Analyst\nCompany: Acme\nReview datasets\nfor accuracy.",
+    "Title: Technical Writer\nEmployer: DocsInc\nWrite documentation remotely.",
+]
+
+
+def write_pdf(path, pages):
+    pymupdf = pytest.importorskip("pymupdf")
+    doc = pymupdf.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = create_database(str(tmp_path / "job_profiles.db"))
+    yield conn
+    conn.close()
+
+
+def stored_titles(conn):
+    return sorted(title for (title,) in conn.execute("SELECT title FROM jobs"))
+
+
+def test_iter_postings_splits_at_title_lines():
+    postings = list(iter_postings(LISTING, "listings/acme.pdf"))
+    assert postings == [
+        # Text before the first title line is a posting of its own, named after the file
+        {"title": "acme", "company": None, "description": "Careers at Acme"},
+        {"title": "Data Analyst", "company": "Acme", "description": "Review datasets for accuracy."},
+        {"title": "Technical Writer", "company": "DocsInc", "description": "Write documentation remotely."},
+    ]
+
+
+def test_iter_postings_without_titles_is_one_posting():
+    postings = list(iter_postings(["Line one\n\n", "line two"], "brochure.pdf"))
+    assert postings == [{"title": "brochure", "company": None, "description": "Line one line two"}]
+    assert list(iter_postings(["", "  \n"], "empty.pdf")) == []
+
+
+def test_ingest_directory(tmp_path, conn):
+    listings = tmp_path / "listings"
+    (listings / "nested").mkdir(parents=True)
+    write_pdf(listings / "acme.pdf", LISTING)
+    write_pdf(listings / "nested" / "more.PDF", ["Position: Graphic Designer\nCreative studio work."])
+    (listings / "notes.txt").write_text("Job Title: Ignored")
+
+    report = ingest_directory(str(listings), conn, max_workers=1, batch_size=2)
+    assert report["files"] == 2
+    assert report["pages"] == 3
+    assert report["postings"] == report["inserted"] == 4
+    assert stored_titles(conn) == ["Data Analyst", "Graphic Designer", "Technical Writer", "acme"]
+    # Searchable straight away through the FTS triggers
+    assert conn.execute("SELECT COUNT(*) FROM jobs_fts WHERE jobs_fts MATCH 'documentation'").fetchone()[0] == 1
+
+
+def test_unchanged_files_are_skipped(tmp_path, conn):
+    write_pdf(tmp_path / "acme.pdf", LISTING)
+    ingest_directory(str(tmp_path), conn, max_workers=1)
+
+    report = ingest_directory(str(tmp_path), conn, max_workers=1)
+    assert report["skipped"] == 1
+    assert report["postings"] == report["inserted"] == 0
+
+
+def test_changed_file_only_adds_new_postings(tmp_path, conn):
+    write_pdf(tmp_path / "acme.pdf", LISTING)
+    ingest_directory(str(tmp_path), conn, max_workers=1)
+
+    write_pdf(tmp_path / "acme.pdf", LISTING + ["Role: Research Assistant\nLab research."])
+    report = ingest_directory(str(tmp_path), conn, max_workers=1)
+    assert report["postings"] == 4
+    assert report["inserted"] == 1
+    assert stored_titles(conn).count("Data Analyst") == 1
+    assert "Research Assistant" in stored_titles(conn)
+
+
+def test_unreadable_files_are_retried(tmp_path, conn):
+    write_pdf(tmp_path / "acme.pdf", LISTING)
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    report = ingest_directory(str(tmp_path), conn, max_workers=1)
+    assert report["failed"] == 1
+    assert report["inserted"] == 3
+    recorded = [path for (path,) in conn.execute("SELECT path FROM ingested_files")]
+    assert recorded == [str(tmp_path / "acme.pdf")]
+
+    report = ingest_directory(str(tmp_path), conn, max_workers=1)
+    assert report["skipped"] == 1 and report["failed"] == 1
+
+
+def test_classify_assigns_profiles(tmp_path, conn, monkeypatch):
+    import job_profile_analyzer
+
+    monkeypatch.setattr(job_profile_analyzer, "analyze_job_description", lambda description, bucket=None: "A-B-C-A")
+    write_pdf(tmp_path / "acme.pdf", LISTING)
+    ingest_directory(str(tmp_path), conn, max_workers=1, classify=True)
+    profiles = {title: profile for title, profile in conn.execute("SELECT title, profile_id FROM jobs")}
+    assert set(profiles.values()) == {"A-B-C-A"}
+    assert top_matches("A-B-C-A", limit=10, conn=conn)[0]["exact_match"]
@@ -0,0 +1,120 @@
+import logging
+import sqlite3
+
+import pytest
+
+import app as app_module
+import precomputed_recommendations as precomputed
+import rag_engine
+from precomputed_recommendations import GENERIC_INTENT, lookup, match_intent, precompute
+
+
+@pytest.fixture
+def generate(monkeypatch):
+    """Stand-in for the Bedrock query; records each query it answers"""
+    queries = []
+
+    def answer(query, use_cache=True):
+        queries.append(query)
+        return "Technical Writer at DocsInc suits you."
+
+    monkeypatch.setattr(rag_engine, "get_semantic_matches_bedrock", answer)
+    return queries
+
+
+@pytest.mark.parametrize("answer, intent", [
+    ("", GENERIC_INTENT),
+    ("no preference really", GENERIC_INTENT),
+    ("somewhere quiet", "quiet"),
+    ("I want to work remotely from home", "remote"),
+    ("I want to work with horses and llamas on a farm", None),
+])
+def test_match_intent(answer, intent):
+    assert match_intent(answer) == intent
+
+
+def test_precompute_then_lookup(job_db, generate):
+    _, conn = job_db
+    report = precompute(conn, max_workers=2)
+    assert report["generated"] == report["entries"] == len(generate) > 0
+    assert report["failed"] == report["skipped"] == 0
+
+    assert lookup("A-A-A-A", "somewhere quiet", conn) == "Technical Writer at DocsInc suits you."
+    assert lookup("A-A-A-A", "horses and llamas", conn) is None
+
+
+def test_rerun_skips_unchanged_rows(job_db, generate):
+    _, conn = job_db
+    precompute(conn, max_workers=2)
+    report = precompute(conn, max_workers=2)
+    assert report["generated"] == 0
+    assert report["skipped"] == report["entries"]
+
+    assert precompute(conn, max_workers=2, force=True)["generated"] == report["entries"]
+
+
+def test_knowledge_base_rows_ignore_local_jobs(job_db, generate, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(rag_engine, "RETRIEVER", "knowledge_base")
+    precompute(conn, max_workers=2)
+    with conn:
+        conn.execute("INSERT INTO jobs (title, company, description) VALUES ('Baker', 'Bakery', 'Bake bread')")
+    assert precompute(conn, max_workers=2)["generated"] == 0
+
+    monkeypatch.setattr(precomputed, "CORPUS_VERSION", "kb-sync-2")
+    report = precompute(conn, max_workers=2)
+    assert report["generated"] == report["entries"]
+
+
+def test_local_rows_regenerate_only_where_retrieval_changed(job_db, generate, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(rag_engine, "RETRIEVER", "local")
+    monkeypatch.setattr(rag_engine, "LOCAL_TOP_K", 2)
+    first = precompute(conn, max_workers=2)
+
+    with conn:
+        conn.execute(
+            "INSERT INTO jobs (title, company, description, profile_id) VALUES (?, ?, ?, ?)",
+            ("Remote Home Office Assistant", "HomeCo", "Work remotely from home with flexible hours", "B-A-A-A"),
+        )
+    report = precompute(conn, max_workers=2)
+    # Rows whose top jobs did not change keep their recommendation
+    assert 0 < report["generated"] < first["entries"]
+    assert report["skipped"] == first["entries"] - report["generated"]
+
+
+def test_fallback_answers_are_not_stored(job_db, monkeypatch):
+    _, conn = job_db
+    monkeypatch.setattr(rag_engine, "get_semantic_matches_bedrock",
+                        lambda query, use_cache=True: "Sorry, I am unable to assist you with this request.")
+    report = precompute(conn, max_workers=2)
+    assert report["failed"] == report["entries"]
+    assert report["generated"] == 0
+    assert lookup("A-A-A-A", "somewhere quiet", conn) is None
+
+
+@pytest.fixture
+def unavailable(monkeypatch):
+    monkeypatch.setattr(app_module, "_precomputed_unavailable", False)
+
+    def broken(profile_key, intent):
+        raise sqlite3.OperationalError("no such table")
+
+    return broken
+
+
+def test_unavailable_flag_tracks_database_reads(monkeypatch, unavailable, caplog):
+    monkeypatch.setattr(precomputed, "stored_recommendation", unavailable)
+    with caplog.at_level(logging.ERROR):
+        assert app_module.fetch_precomputed_recommendations("A-A-A-A", "somewhere quiet") is None
+        assert app_module.fetch_precomputed_recommendations("A-A-A-A", "somewhere calm") is None
+    assert app_module._precomputed_unavailable
+    assert len([r for r in caplog.records if "precomputed" in r.getMessage()]) == 1
+
+    # An answer that maps to no intent never reaches the database, so proves nothing
+    assert app_module.fetch_precomputed_recommendations("A-A-A-A", "horses and llamas") is None
+    assert app_module._precomputed_unavailable
+
+    monkeypatch.setattr(precomputed, "stored_recommendation", lambda profile_key, intent: None)
+    assert app_module.fetch_precomputed_recommendations("A-A-A-A", "somewhere quiet") is None
+    assert not app_module._precomputed_unavailable
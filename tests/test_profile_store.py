@@ -0,0 +1,110 @@
+import os
+import json
+import logging
+
+import pytest
+
+from profile_store import ProfileStore, compose_analysis
+
+
+def test_loads_every_profile(profiles_file, profiles, tmp_path):
+    store = ProfileStore(profiles_file(), fragments_path=str(tmp_path / "missing.json"))
+    assert len(store) == len(profiles)
+    profile = store.get("A-B-C-A")
+    assert profile.combination == ("A", "B", "C", "A")
+    assert "Work Style" in profile.analysis_html
+
+
+def test_malformed_profile_is_skipped(profiles_file, profiles, tmp_path):
+    del profiles["A-A-A-A"]["analysis"]["environment"]
+    profiles["A-A-A-B"] = {}
+    store = ProfileStore(profiles_file(profiles), fragments_path=str(tmp_path / "missing.json"))
+    assert store.get("A-A-A-A") is None
+    assert store.get("A-A-A-B") is None
+    assert store.get("B-B-B-B") is not None
+
+
+def test_reloads_when_file_changes(profiles_file, profiles, tmp_path):
+    path = profiles_file()
+    store = ProfileStore(path, reload_interval=0, fragments_path=str(tmp_path / "missing.json"))
+    profiles["A-A-A-A"]["analysis"]["work_style"]["description"] = "Changed"
+    with open(path, "w") as f:
+        json.dump(profiles, f)
+    os.utime(path, (0, store.version[0] + 10))
+    assert store.get("A-A-A-A").analysis["work_style"]["description"] == "Changed"
+
+
+def section(text):
+    return {"description": text, "explanation": f"{text}."}
+
+
+def make_fragments():
+    return {
+        "dimensions": ["work_style", "environment", "interaction_level", "task_preference"],
+        "options": {
+            "work_style": {"A": section("Structured"), "B": section("Flexible")},
+            "environment": {"A": section("Quiet"), "B": section("Open")},
+            "interaction_level": {"A": section("Minimal"), "B": section("Team"), "C": section("Lead")},
+            "task_preference": {"A": dict(section("Detailed"), accommodation=section("Focus time"))},
+        },
+        "pairs": {"work_style|environment": {"B-A": section("Flexible quiet hours")}},
+    }
+
+
+def test_composes_from_fragments(profiles_file, tmp_path):
+    fragments = make_fragments()
+    path = tmp_path / "fragments.json"
+    path.write_text(json.dumps(fragments))
+    store = ProfileStore(profiles_file({}), fragments_path=str(path))
+
+    assert len(store) == 2 * 2 * 3 * 1
+    profile = store.get("B-A-C-A")
+    assert profile.analysis["interaction_level"]["description"] == "Lead"
+    assert profile.analysis["accommodations"]["description"] == "Flexible quiet hours"
+    assert store.get("B-A-C-A") is profile
+    # No pair note for A-B, so the per-answer hint is used
+    assert compose_analysis(fragments, "ABAA")["accommodations"]["description"] == "Focus time"
+    assert store.get("A-A-A-B") is None
+
+
+def drop_task_preference(fragments):
+    del fragments["options"]["task_preference"]
+
+
+def empty_options(fragments):
+    fragments["options"]["environment"] = {}
+
+
+def malformed_fragment(fragments):
+    fragments["options"]["work_style"]["A"] = "Structured"
+
+
+def malformed_pair(fragments):
+    fragments["pairs"]["work_style|environment"]["B-A"] = None
+
+
+@pytest.mark.parametrize("damage", [drop_task_preference, empty_options, malformed_fragment, malformed_pair])
+def test_unusable_fragments_fall_back_to_full_profiles(profiles_file, profiles, tmp_path, caplog, damage):
+    fragments = make_fragments()
+    damage(fragments)
+    path = tmp_path / "fragments.json"
+    path.write_text(json.dumps(fragments))
+    with caplog.at_level(logging.ERROR):
+        store = ProfileStore(profiles_file(), fragments_path=str(path))
+    assert len(store) == len(profiles)
+    assert store.get("A-B-C-A") is not None
+    assert "serving full profiles only" in caplog.text
+
+
+def test_unreadable_fragments_on_reload_fall_back(profiles_file, profiles, tmp_path, caplog):
+    path = tmp_path / "fragments.json"
+    path.write_text(json.dumps(make_fragments()))
+    store = ProfileStore(profiles_file({}), reload_interval=0, fragments_path=str(path))
+    assert len(store) == 12
+
+    path.write_text("{not json")
+    os.utime(path, (0, store.version[1] + 10))
+    with caplog.at_level(logging.ERROR):
+        assert store.get("B-A-C-A") is None
+    assert len(store) == 0
+    assert "serving full profiles only" in caplog.text
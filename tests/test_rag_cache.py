@@ -0,0 +1,61 @@
+import rag_engine
+from rag_cache import LRUCache, SQLiteCache, TieredCache, normalize_query
+
+
+def test_normalize_query_folds_case_punctuation_and_whitespace():
+    assert normalize_query("  Quiet,  REMOTE work!! ") == "quiet remote work"
+
+
+def test_normalize_query_stemming_drops_stopwords_and_suffixes():
+    assert normalize_query("I would like quiet offices", stem=True) == normalize_query("quiet office", stem=True)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_sqlite_tier_backfills_memory_tier(tmp_path):
+    persistent = SQLiteCache(str(tmp_path / "cache.db"))
+    persistent.set("key", "value")
+    memory = LRUCache()
+    cache = TieredCache(memory, persistent)
+    assert cache.get("key") == "value"
+    assert memory.get("key") == "value"
+
+
+def test_answers_are_cached_on_normalized_query(bedrock):
+    first = rag_engine.get_semantic_matches_bedrock("Quiet work, please")
+    second = rag_engine.get_semantic_matches_bedrock("quiet WORK please")
+    assert first == second
+    assert bedrock.calls == 1
+
+
+def test_fallback_answers_are_not_cached(bedrock):
+    bedrock.answer = "I'm sorry, I could not find a match."
+    rag_engine.get_semantic_matches_bedrock("marine biology")
+    bedrock.answer = "Marine Technician roles fit well."
+    assert rag_engine.get_semantic_matches_bedrock("marine biology") == "Marine Technician roles fit well."
+    assert bedrock.calls == 2
+
+
+def test_reset_connections_reopens_the_sqlite_tier(tmp_path):
+    sqlite_tier = SQLiteCache(str(tmp_path / "rag_cache.db"))
+    cache = TieredCache(LRUCache(), sqlite_tier)
+    cache.set("q", "answer")
+    before = sqlite_tier._connect()
+    cache.reset_connections()
+    assert sqlite_tier._connect() is not before
+    assert sqlite_tier.get("q") == "answer"
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import job_profile_analyzer
+import rate_limit
+from rate_limit import TokenBucket, retry_with_backoff
+
+
+class Clock:
+    """Stands in for time.monotonic and time.sleep; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 100
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def flaky(failures, error=ValueError):
+    """A callable that raises `error` for its first `failures` calls"""
+    calls = []
+
+    def call(*args, **kwargs):
+        calls.append((args, kwargs))
+        if len(calls) <= failures:
+            raise error("try again")
+        return "ok"
+
+    return call, calls
+
+
+def test_retry_succeeds_after_failures(clock):
+    call, calls = flaky(2)
+    assert retry_with_backoff(call, 1, retry_on=(ValueError,), base_delay=1.0, key="v") == "ok"
+    assert calls == [((1,), {"key": "v"})] * 3
+    # Full jitter: each delay is at most base_delay * 2 ** (attempt - 1)
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 2.0
+
+
+def test_retry_gives_up_after_max_attempts(clock):
+    call, calls = flaky(10)
+    with pytest.raises(ValueError):
+        retry_with_backoff(call, retry_on=(ValueError,), max_attempts=3)
+    assert len(calls) == 3
+
+
+def test_other_errors_are_not_retried(clock):
+    call, calls = flaky(1, error=KeyError)
+    with pytest.raises(KeyError):
+        retry_with_backoff(call, retry_on=(ValueError,))
+    assert len(calls) == 1
+
+
+def rate_limited(retry_after):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.mark.parametrize("retry_after, delay", [("7", 7.0), ("0", 0.0)])
+def test_retry_after_header_is_honoured(clock, retry_after, delay):
+    errors = [rate_limited(retry_after)]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert retry_with_backoff(call, retry_on=(openai.RateLimitError,), base_delay=30.0) == "ok"
+    assert clock.sleeps == [delay]
+
+
+def test_every_attempt_takes_a_token(clock, monkeypatch):
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(kwargs["model"])
+        if len(attempts) < 3:
+            raise rate_limited("0")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" A-B-C-A "))])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(job_profile_analyzer, "client", fake)
+    bucket = TokenBucket(rate=1, capacity=1)
+    acquired = []
+    monkeypatch.setattr(bucket, "acquire", lambda: acquired.append(len(attempts)))
+
+    assert job_profile_analyzer.analyze_job_description("Lead a team", bucket=bucket) == "A-B-C-A"
+    assert acquired == [0, 1, 2]
@@ -0,0 +1,94 @@
+import pytest
+
+import render_cache
+from render_cache import RenderCache
+
+
+class Renderer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"<p>render {self.calls}</p>"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(render_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_renders_once_per_key():
+    cache, render = RenderCache(), Renderer()
+    first = cache.get("page", render)
+    second = cache.get("page", render)
+    assert second is first
+    assert first.body == b"<p>render 1</p>"
+    assert render.calls == 1
+    cache.get("other", render)
+    assert len(cache) == 2
+
+
+def test_version_change_rerenders():
+    cache, render = RenderCache(), Renderer()
+    first = cache.get("page", render, version=1)
+    assert cache.get("page", render, version=1) is first
+    second = cache.get("page", render, version=2)
+    assert second.body == b"<p>render 2</p>"
+    assert second.etag != first.etag
+
+
+def test_ttl_expiry_rerenders(clock):
+    cache, render = RenderCache(), Renderer()
+    cache.get("page", render, ttl=10)
+    clock[0] += 10
+    cache.get("page", render, ttl=10)
+    assert render.calls == 1
+    clock[0] += 1
+    cache.get("page", render, ttl=10)
+    assert render.calls == 2
+
+
+def test_same_body_keeps_its_etag():
+    cache = RenderCache()
+    first = cache.get("page", lambda: "same", version=1)
+    second = cache.get("page", lambda: "same", version=2)
+    assert second.etag == first.etag
+
+
+def test_clear():
+    cache, render = RenderCache(), Renderer()
+    cache.get("page", render)
+    cache.clear()
+    assert len(cache) == 0
+    cache.get("page", render)
+    assert render.calls == 2
+
+
+def test_question_page_revalidates_with_etag(client):
+    response = client.get("/question/1")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    etag = response.headers["ETag"]
+
+    response = client.get("/question/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    response = client.get("/question/2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_welcome_page_is_revalidated(client):
+    response = client.get("/")
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert client.get("/", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_profile_page(client):
+    response = client.get("/profiles/A-A-A-A")
+    assert response.status_code == 200
+    assert client.get("/profiles/A-A-A-A", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get("/profiles/Z-Z-Z-Z").status_code == 404
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def async_mode(monkeypatch, bedrock):
+    """Async results with precomputed answers off; returns the assessments recorded"""
+    monkeypatch.setattr(app_module, "RESULTS_MODE", "async")
+    monkeypatch.setattr(app_module, "fetch_precomputed_recommendations", lambda *args: None)
+    recorded = []
+    monkeypatch.setattr(app_module, "record_assessment", lambda *args: recorded.append(args))
+    return recorded
+
+
+def poll(client, url, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(url)
+        if response.status_code != 202 or time.monotonic() > deadline:
+            return response
+        assert response.get_json() == {"status": "pending"}
+        time.sleep(0.01)
+
+
+def task_url(client):
+    with client.session_transaction() as session:
+        return f"/results/recommendations/{session['recommendation_task']}"
+
+
+def test_results_enqueue_and_poll(client, answered, bedrock, async_mode):
+    answered()
+    page = client.get("/results").get_data(as_text=True)
+    url = task_url(client)
+    assert url in page
+
+    response = poll(client, url)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "done"
+    assert body["recommendations"][0]["reasoning"] == bedrock.answer
+    assert [args[1] for args in async_mode] == ["A-A-A-A"]
+
+
+def test_task_from_another_worker_is_recomputed_and_recorded(client, answered, bedrock, async_mode, monkeypatch):
+    answered(q1="B", q3="C")
+    client.get("/results")
+    url = task_url(client)
+    poll(client, url)
+    # Another worker process has never seen this task
+    monkeypatch.setattr(app_module, "recommendation_queue", app_module.TaskQueue(max_workers=1))
+
+    response = poll(client, url)
+    assert response.get_json()["status"] == "done"
+    assert [args[1] for args in async_mode] == ["B-A-C-A", "B-A-C-A"]
+    assert async_mode[-1][2] == app_module.profile_store.get("B-A-C-A").analysis_html
+
+
+def test_failed_task_reports_error(client, answered, bedrock, async_mode, monkeypatch):
+    def fail(free_response):
+        raise RuntimeError("upstream failure")
+    monkeypatch.setattr(app_module, "fetch_recommendations", fail)
+    answered()
+    client.get("/results")
+    assert poll(client, task_url(client)).status_code == 500
+
+
+def test_other_sessions_cannot_poll(client, answered, async_mode):
+    answered()
+    assert client.get("/results/recommendations/someone-elses-task").status_code == 404
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import app as app_module
+from circuit_breaker import CircuitOpenError
+
+
+def parse_events(body):
+    """[(event, data)] from a text/event-stream body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def no_precomputed(monkeypatch):
+    monkeypatch.setattr(app_module, "fetch_precomputed_recommendations", lambda *args: None)
+
+
+def test_stream_sends_chunks_then_cards(client, answered, bedrock):
+    answered()
+    response = client.get("/results/stream")
+    assert response.mimetype == "text/event-stream"
+    events = parse_events(response.get_data(as_text=True))
+
+    chunks = [data for event, data in events if event == "chunk"]
+    assert len(chunks) > 1
+    assert events[-1][0] == "done"
+    assert events[-1][1][0]["reasoning"] == "".join(chunks) == bedrock.answer
+
+
+def test_stream_serves_repeat_queries_from_cache(client, answered, bedrock):
+    answered(q5="Somewhere with data work")
+    client.get("/results/stream").get_data()
+    answered(q5="somewhere with DATA work!")
+    events = parse_events(client.get("/results/stream").get_data(as_text=True))
+    assert bedrock.calls == 1
+    assert [event for event, _ in events] == ["chunk", "done"]
+
+
+def test_stream_falls_back_when_circuit_is_open(client, answered, bedrock, monkeypatch):
+    def open_circuit():
+        raise CircuitOpenError("bedrock circuit is open")
+    monkeypatch.setattr(app_module.rag_engine.breaker, "before_call", open_circuit)
+    answered()
+    events = parse_events(client.get("/results/stream").get_data(as_text=True))
+    assert events == [("done", app_module.FALLBACK_RECOMMENDATIONS)]
+    assert bedrock.calls == 0
+
+
+def test_stream_reports_upstream_errors(client, answered, bedrock):
+    def fail(text):
+        raise RuntimeError("upstream failure")
+    bedrock.answer = fail
+    answered()
+    events = parse_events(client.get("/results/stream").get_data(as_text=True))
+    assert events == [("error", {})]
+
+
+def test_fallback_answer_becomes_fallback_card(client, answered, bedrock):
+    bedrock.answer = "I'm sorry, I could not find a matching job."
+    answered()
+    events = parse_events(client.get("/results/stream").get_data(as_text=True))
+    assert events[-1] == ("done", app_module.FALLBACK_RECOMMENDATIONS)
+
+
+def test_results_page_points_at_stream_in_stream_mode(client, answered, bedrock, monkeypatch):
+    monkeypatch.setattr(app_module, "RESULTS_MODE", "stream")
+    answered()
+    page = client.get("/results").get_data(as_text=True)
+    assert "/results/stream" in page
+    assert bedrock.calls == 0
+
+
+def test_stream_without_answers_redirects(client):
+    assert client.get("/results/stream").status_code == 302
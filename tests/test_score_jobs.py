@@ -0,0 +1,121 @@
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+import utils
+from rag_cache import LRUCache
+
+
+class FakeScorer:
+    """Chat completions stand-in: `respond(jobs)` builds the "results" list for each prompt"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.prompts = []
+
+    def create(self, model, messages, response_format):
+        prompt = messages[0]["content"]
+        self.prompts.append(prompt)
+        titles = re.findall(r"Job Title: (.*)", prompt)
+        content = json.dumps({"results": self.respond(titles)})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    monkeypatch.setattr(utils, "_score_cache", LRUCache(maxsize=100))
+
+    def install(respond):
+        fake = FakeScorer(respond)
+        monkeypatch.setattr(utils, "get_openai_client", lambda: SimpleNamespace(
+            chat=SimpleNamespace(completions=fake)))
+        return fake
+    return install
+
+
+JOBS = [{"title": f"Job {n}", "company": "Co", "description": "d", "url": f"/{n}"} for n in range(5)]
+
+
+def scores(results):
+    return [r["match_score"] for r in results]
+
+
+def score_of(title):
+    return 10 * int(title.split()[-1])
+
+
+def test_batches_and_caches(scorer):
+    fake = scorer(lambda titles: [
+        {"index": i, "match_score": score_of(t), "reasoning": t} for i, t in enumerate(titles)
+    ])
+    results = utils.score_jobs(JOBS, "analysis", profile_key="A-A-A-A", batch_size=2)
+    assert scores(results) == [0, 10, 20, 30, 40]
+    assert [r["reasoning"] for r in results] == [j["title"] for j in JOBS]
+    assert len(fake.prompts) == 3
+
+    utils.score_jobs(JOBS, "analysis", profile_key="A-A-A-A", batch_size=2)
+    assert len(fake.prompts) == 3
+
+
+@pytest.mark.parametrize("index", [
+    lambda i: str(i),      # "0", "1", ...
+    lambda i: i + 1,       # 1-based
+    lambda i: None,        # no index at all
+])
+def test_model_indices_are_normalised(scorer, index):
+    scorer(lambda titles: [
+        {"index": index(i), "match_score": score_of(t), "reasoning": t} for i, t in enumerate(titles)
+    ])
+    assert scores(utils.score_jobs(JOBS, "analysis", batch_size=5)) == [0, 10, 20, 30, 40]
+
+
+def test_results_out_of_order(scorer):
+    scorer(lambda titles: [
+        {"index": i, "match_score": score_of(t), "reasoning": t} for i, t in reversed(list(enumerate(titles)))
+    ])
+    assert scores(utils.score_jobs(JOBS, "analysis", batch_size=5)) == [0, 10, 20, 30, 40]
+
+
+def test_malformed_entries_only_fail_their_own_job(scorer):
+    def respond(titles):
+        results = [{"index": i, "match_score": score_of(t), "reasoning": t} for i, t in enumerate(titles)]
+        results[1] = "not an object"
+        results[2]["match_score"] = "high"
+        results[3]["match_score"] = 140
+        return results
+
+    scorer(respond)
+    results = utils.score_jobs(JOBS, "analysis", batch_size=5)
+    assert scores(results) == [0, 0, 0, 0, 40]
+    assert [r["reasoning"] for r in results][1:4] == ["Error analyzing job match"] * 3
+
+
+def test_missing_results_are_not_misattributed(scorer):
+    # Only jobs 0 and 3 come back; the other jobs must not borrow their scores
+    scorer(lambda titles: [
+        {"index": i, "match_score": score_of(titles[i]), "reasoning": "ok"} for i in (0, 3)
+    ])
+    assert scores(utils.score_jobs(JOBS, "analysis", batch_size=5)) == [0, 0, 0, 30, 0]
+    fake = scorer(lambda titles: [])
+    utils.score_jobs(JOBS, "analysis", batch_size=5)
+    # Only the failed jobs are asked about again
+    assert re.findall(r"Job Title: (.*)", fake.prompts[0]) == ["Job 1", "Job 2", "Job 4"]
+
+
+def test_failed_request_fails_its_batch(scorer):
+    def respond(titles):
+        if "Job 0" in titles:
+            raise RuntimeError("rate limited")
+        return [{"index": i, "match_score": 50, "reasoning": "ok"} for i in range(len(titles))]
+
+    scorer(respond)
+    assert scores(utils.score_jobs(JOBS, "analysis", batch_size=2)) == [0, 0, 50, 50, 50]
+
+
+def test_format_job_match_scores_one_job(scorer):
+    scorer(lambda titles: [{"index": 0, "match_score": 85, "reasoning": "Good fit"}])
+    assert utils.format_job_match(JOBS[0], "analysis") == {
+        "title": "Job 0", "company": "Co", "location": None, "match_score": 85, "reasoning": "Good fit", "url": "/0",
+    }
@@ -0,0 +1,128 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import utils
+from rag_cache import LRUCache
+
+LISTING_PAGE = b"""<html><body>
+<div class="header">Careers</div>
+<div class="joblist-wrapper">
+  <h3 class="joblist-title">Data Analyst</h3>
+  <span class="joblist-location">Nashville, TN</span>
+  <div class="joblist-description">Clean and review datasets</div>
+  <a class="joblist-link" href="job/1">Apply</a>
+</div>
+<div class="joblist-wrapper featured">
+  <h3 class="joblist-title">Technical Writer</h3>
+  <span class="joblist-location">Remote</span>
+  <div class="joblist-description">Write documentation</div>
+</div>
+<div class="sidebar"><h3 class="joblist-title">Not a listing</h3></div>
+</body></html>"""
+
+ALTERNATE_PAGE = b"""<html><body>
+<div class="card job-posting">
+  <div class="posting-title">Library Assistant</div>
+  <div class="posting-location">Memphis, TN</div>
+  <div class="posting-description">Shelve and catalogue books</div>
+  <a href="/postings/7">Details</a>
+</div>
+</body></html>"""
+
+ETAG = '"listing-v1"'
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    pages = {"/listing": LISTING_PAGE, "/alternate": ALTERNATE_PAGE}
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        body = self.pages.get(self.path.split("?")[0])
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def page_cache(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=60)
+    monkeypatch.setattr(utils, "_page_cache", cache)
+    return cache
+
+
+def test_parse_keeps_listings_with_extra_classes():
+    jobs = utils.parse_jobs(LISTING_PAGE, "https://example.com/jobs")
+    assert [job["title"] for job in jobs] == ["Data Analyst", "Technical Writer"]
+    assert jobs[0]["url"] == "https://example.com/jobs/job/1"
+    assert jobs[1]["url"] == "https://example.com/jobs"
+    assert jobs[1]["location"] == "Remote"
+
+
+def test_parse_alternate_listings_with_extra_classes():
+    jobs = utils.parse_jobs(ALTERNATE_PAGE, "https://example.com/jobs")
+    assert jobs == [{
+        "title": "Library Assistant",
+        "company": "Oracle",
+        "location": "Memphis, TN",
+        "description": "Shelve and catalogue books",
+        "url": "https://example.com/jobs/postings/7",
+    }]
+
+
+def test_fetch_listing_revalidates_with_etag(server):
+    url = f"{server.url}/listing"
+    first = utils.fetch_listing(url)
+    assert [job["title"] for job in first] == ["Data Analyst", "Technical Writer"]
+
+    second = utils.fetch_listing(url)
+    assert second == first
+    assert server.requests == [("/listing", None), ("/listing", ETAG)]
+
+    # Callers get copies, so editing a result does not change the cached parse
+    second[0]["title"] = "Edited"
+    assert utils.fetch_listing(url)[0]["title"] == "Data Analyst"
+
+
+def test_page_cache_is_bounded(server, page_cache):
+    for page in range(1, 4):
+        utils.fetch_listing(f"{server.url}/listing?page={page}")
+    assert len(page_cache._data) == 2
+    assert page_cache.get(f"{server.url}/listing?page=1") is None
+
+
+def test_iter_jobs_streams_every_page_and_skips_failures(server):
+    urls = utils.listing_urls([f"{server.url}/listing", f"{server.url}/alternate"], pages=2)
+    assert urls[:2] == [f"{server.url}/listing", f"{server.url}/listing?page=2"]
+
+    jobs = list(utils.iter_jobs(urls + [f"{server.url}/missing"], max_workers=4))
+    titles = sorted(job["title"] for job in jobs)
+    assert titles == sorted(["Data Analyst", "Technical Writer"] * 2 + ["Library Assistant"] * 2)
+    assert ("/missing", None) in server.requests
@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+from flask import Flask, session
+
+import session_store
+from session_store import MemoryBackend, SQLiteBackend, ServerSideSessionInterface, build_session_interface
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(maxsize=10, ttl=60)
+    return SQLiteBackend(str(tmp_path / "sessions.db"), ttl=60)
+
+
+def make_app(backend):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.session_interface = ServerSideSessionInterface(backend)
+
+    @app.route("/set/<value>")
+    def set_value(value):
+        session["q1"] = value
+        return "ok"
+
+    @app.route("/get")
+    def get_value():
+        return session.get("q1", "")
+
+    @app.route("/clear")
+    def clear():
+        session.clear()
+        return "ok"
+
+    return app
+
+
+def test_backend_round_trip(backend):
+    assert backend.get("sid") is None
+    backend.set("sid", {"q1": "A"})
+    assert backend.get("sid") == {"q1": "A"}
+    backend.delete("sid")
+    assert backend.get("sid") is None
+
+
+def test_memory_backend_expires_and_evicts(monkeypatch):
+    backend = MemoryBackend(maxsize=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr(session_store.time, "monotonic", lambda: now[0])
+    backend.set("a", {"n": 1})
+    backend.set("b", {"n": 2})
+    backend.get("a")
+    backend.set("c", {"n": 3})
+    # "b" was least recently used
+    assert backend.get("b") is None
+    assert backend.get("a") == {"n": 1}
+
+    now[0] += 11
+    assert backend.get("a") is None
+
+
+def test_sqlite_backend_expires(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "sessions.db"), ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: now[0])
+    backend.set("sid", {"q1": "A"})
+    now[0] += 11
+    assert backend.get("sid") is None
+
+
+def test_sqlite_backend_is_shared_across_instances_and_threads(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteBackend(path).set("sid", {"q1": "B"})
+
+    other = SQLiteBackend(path)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(other.get("sid")))
+    thread.start()
+    thread.join()
+    assert seen == [{"q1": "B"}]
+
+
+def test_cookie_carries_only_the_session_id(backend):
+    client = make_app(backend).test_client()
+    response = client.get("/set/A")
+    cookie = client.get_cookie("session")
+    assert cookie is not None
+    assert "Cookie" in response.headers.get("Vary", "")
+    assert backend.get(cookie.value) == {"q1": "A"}
+    assert client.get("/get").text == "A"
+
+
+def test_unmodified_session_is_not_written(monkeypatch, backend):
+    client = make_app(backend).test_client()
+    client.get("/set/A")
+    writes = []
+    monkeypatch.setattr(backend, "set", lambda sid, data: writes.append(sid))
+    response = client.get("/get")
+    assert response.text == "A"
+    assert writes == []
+    assert "Set-Cookie" not in response.headers
+
+
+def test_cleared_session_is_deleted(backend):
+    client = make_app(backend).test_client()
+    client.get("/set/A")
+    sid = client.get_cookie("session").value
+    client.get("/clear")
+    assert backend.get(sid) is None
+    assert client.get_cookie("session") is None
+    assert client.get("/get").text == ""
+
+
+def test_backend_errors_start_a_new_session(monkeypatch, backend):
+    client = make_app(backend).test_client()
+    client.get("/set/A")
+
+    def broken(sid):
+        raise RuntimeError("store down")
+
+    monkeypatch.setattr(backend, "get", broken)
+    assert client.get("/get").text == ""
+
+
+def test_build_session_interface(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    assert build_session_interface(app, "cookie") is None
+    assert isinstance(build_session_interface(app, "memory").backend, MemoryBackend)
+    sqlite_interface = build_session_interface(app, "sqlite")
+    assert sqlite_interface.backend.path == str(tmp_path / "instance" / "sessions.db")
+    with pytest.raises(ValueError):
+        build_session_interface(app, "memcached")
+
+
+def test_reset_connections_reopens_the_sqlite_backend(tmp_path):
+    interface = build_session_interface(Flask(__name__, instance_path=str(tmp_path)), "sqlite")
+    interface.backend.set("sid", {"q1": "A"})
+    before = interface.backend._connect()
+    interface.reset_connections()
+    assert interface.backend._connect() is not before
+    assert interface.backend.get("sid") == {"q1": "A"}
+    # Backends without connections of their own have nothing to reset
+    build_session_interface(Flask(__name__), "memory").reset_connections()
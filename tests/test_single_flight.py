@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+import rag_engine
+from fake_bedrock import ValidationException
+from single_flight import CallAbandoned, SingleFlight, SingleFlightTimeout
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight(timeout=5)
+    call, leader = flight.begin("q")
+    assert leader
+    results = []
+    followers = []
+    for _ in range(3):
+        follower_call, is_leader = flight.begin("q")
+        assert not is_leader and follower_call is call
+        followers.append(threading.Thread(target=lambda: results.append(flight.wait(call))))
+    for thread in followers:
+        thread.start()
+    assert flight.in_flight() == 1
+
+    flight.finish("q", call, value="answer")
+    for thread in followers:
+        thread.join()
+    assert results == ["answer"] * 3
+    assert flight.coalesced == 3
+    assert flight.in_flight() == 0
+
+
+def test_keys_are_forgotten_once_finished():
+    flight = SingleFlight()
+    call, _ = flight.begin("q")
+    flight.finish("q", call, value=1)
+    second, leader = flight.begin("q")
+    assert leader and second is not call
+    _, other_leader = flight.begin("other")
+    assert other_leader
+
+
+def test_followers_see_the_leaders_error():
+    flight = SingleFlight()
+    call, _ = flight.begin("q")
+    flight.begin("q")
+    flight.finish("q", call, error=CallAbandoned())
+    with pytest.raises(CallAbandoned):
+        flight.wait(call)
+
+
+def test_wait_times_out():
+    flight = SingleFlight(timeout=0.01)
+    call, _ = flight.begin("q")
+    with pytest.raises(SingleFlightTimeout):
+        flight.wait(call)
+
+
+def test_concurrent_queries_share_one_bedrock_call(bedrock, monkeypatch):
+    monkeypatch.setattr(rag_engine, "inflight", SingleFlight(timeout=5))
+    release = threading.Event()
+
+    def slow_answer(text):
+        release.wait(5)
+        return "Shared answer"
+
+    bedrock.answer = slow_answer
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(rag_engine.get_semantic_matches_bedrock("Quiet  work")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while rag_engine.inflight.coalesced < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["Shared answer"] * 4
+    assert bedrock.calls == 1
+
+
+def test_validation_errors_do_not_build_a_client(bedrock, monkeypatch, capsys):
+    def invalid(query):
+        raise ValidationException("Unknown knowledge base")
+
+    monkeypatch.setattr(rag_engine, "client", None)
+    monkeypatch.setattr(rag_engine, "_generate", invalid)
+
+    with pytest.raises(ValidationException):
+        rag_engine.get_semantic_matches_bedrock("anything")
+    assert "Configuration error: Unknown knowledge base" in capsys.readouterr().out
+    assert rag_engine.client is None
+
+
+def test_is_validation_error():
+    assert rag_engine.is_validation_error(ValidationException())
+    assert not rag_engine.is_validation_error(RuntimeError("boom"))
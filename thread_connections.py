@@ -0,0 +1,44 @@
+# thread_connections.py
+"""Per-thread SQLite connections for request-time reads and writes.
+
+A sqlite3 connection must not be shared between threads, nor carried into a
+forked worker. Each thread opens its own on first use, and reset() (called
+from gunicorn's post_fork) makes every thread open a fresh one.
+"""
+
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+
+class ThreadConnections:
+    """One connection to `path` per thread, read-only unless `read_only` is False"""
+
+    def __init__(
+        self,
+        path: str,
+        read_only: bool = True,
+        configure: Optional[Callable[[sqlite3.Connection], None]] = None,
+        timeout: float = 5.0,
+    ):
+        self.path = path
+        self.read_only = read_only
+        self.configure = configure
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=self.timeout)
+            else:
+                conn = sqlite3.connect(self.path, timeout=self.timeout)
+            if self.configure is not None:
+                self.configure(conn)
+            self._local.conn = conn
+        return conn
+
+    def reset(self):
+        """Forget connections opened before a fork; each worker thread reopens its own"""
+        self._local = threading.local()
@@ -1,126 +1,343 @@
-from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 import os
-from openai import OpenAI
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rag_cache import LRUCache
 
-logging.basicConfig(level=logging.DEBUG)
+BASE_URL = "https://ecsr.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1/requisitions"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Listing pages to fetch: comma-separated source URLs, each fetched for SCRAPE_PAGES pages
+SCRAPE_SOURCES = [u for u in os.environ.get("SCRAPE_SOURCES", BASE_URL).split(",") if u]
+SCRAPE_PAGES = int(os.environ.get("SCRAPE_PAGES", "1"))
+SCRAPE_PAGE_PARAM = os.environ.get("SCRAPE_PAGE_PARAM", "page")
+SCRAPE_MAX_WORKERS = int(os.environ.get("SCRAPE_MAX_WORKERS", "8"))
+SCRAPE_TIMEOUT = (float(os.environ.get("SCRAPE_CONNECT_TIMEOUT", "5")), float(os.environ.get("SCRAPE_READ_TIMEOUT", "20")))
+
+# Only build a tree for the listing containers, with lxml when it is installed.
+# bs4 and lxml are imported on the first parse, not when the module loads.
+# Matched against the whole class attribute, so containers with extra classes still count
+LISTING_CLASSES = re.compile(r'(^|\s)(joblist-wrapper|job-posting)(\s|$)')
+_parser = None
+
+def _html_parser():
+    global _parser
+    if _parser is None:
+        try:
+            import lxml  # noqa: F401
+            _parser = 'lxml'
+        except ImportError:
+            _parser = 'html.parser'
+    return _parser
+
+_session = None
+_session_lock = threading.Lock()
+# url -> (etag, last_modified, jobs) from the last successful fetch
+_page_cache = LRUCache(
+    maxsize=int(os.environ.get("SCRAPE_PAGE_CACHE_SIZE", "1000")),
+    ttl=float(os.environ.get("SCRAPE_PAGE_CACHE_TTL", "86400")),
+)
+
+def get_session():
+    """Shared requests session with a connection pool sized for the scraper threads"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(
+                pool_connections=SCRAPE_MAX_WORKERS,
+                pool_maxsize=SCRAPE_MAX_WORKERS,
+                max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+def listing_urls(sources=None, pages=None):
+    """Expand each source into its paginated listing URLs"""
+    urls = []
+    for source in sources or SCRAPE_SOURCES:
+        urls.append(source)
+        for page in range(2, (pages or SCRAPE_PAGES) + 1):
+            separator = '&' if '?' in source else '?'
+            urls.append(f"{source}{separator}{SCRAPE_PAGE_PARAM}={page}")
+    return urls
+
+def parse_jobs(html, base_url):
+    """Extract job dicts from a listing page"""
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(html, _html_parser(), parse_only=SoupStrainer('div', class_=LISTING_CLASSES))
+    jobs = []
+
+    # Find all job listings
+    job_listings = soup.find_all('div', class_='joblist-wrapper')
+    logging.debug(f"Found {len(job_listings)} potential job listings")
+
+    for job in job_listings:
+        try:
+            # Extract job details
+            title_elem = job.find('h3', class_='joblist-title')
+            location_elem = job.find('span', class_='joblist-location')
+            desc_elem = job.find('div', class_='joblist-description')
+            link_elem = job.find('a', class_='joblist-link')
+
+            if title_elem:  # Only process if we found a title
+                job_data = {
+                    'title': title_elem.text.strip(),
+                    'company': 'Oracle',
+                    'location': location_elem.text.strip() if location_elem else 'Location not specified',
+                    'description': desc_elem.text.strip() if desc_elem else 'No description available',
+                    'url': f"{base_url}/{link_elem['href']}" if link_elem and 'href' in link_elem.attrs else base_url
+                }
+                jobs.append(job_data)
+                logging.debug(f"Successfully parsed job: {job_data['title']}")
+        except Exception as e:
+            logging.error(f"Error parsing individual job listing: {str(e)}")
+            continue
+
+    # If no jobs found through primary selectors, try alternate selectors
+    if not jobs:
+        logging.debug("No jobs found with primary selectors, trying alternate selectors")
+        alt_listings = soup.find_all('div', class_='job-posting')
+
+        for job in alt_listings:
+            try:
+                title = job.find('div', class_='posting-title').text.strip()
+                location = job.find('div', class_='posting-location').text.strip()
+                description = job.find('div', class_='posting-description').text.strip()
+                url = job.find('a')['href'] if job.find('a') else base_url
+
+                jobs.append({
+                    'title': title,
+                    'company': 'Oracle',
+                    'location': location,
+                    'description': description,
+                    'url': url if url.startswith('http') else f"{base_url}/{url.lstrip('/')}"
+                })
+            except Exception as e:
+                logging.error(f"Error parsing alternate job listing: {str(e)}")
+                continue
+
+    return jobs
+
+def fetch_listing(url, session=None):
+    """Fetch and parse one listing page, reusing the cached parse on 304 Not Modified"""
+    session = session or get_session()
+    cached = _page_cache.get(url)
+
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = session.get(url, headers=headers, timeout=SCRAPE_TIMEOUT)
+    if response.status_code == 304 and cached:
+        logging.debug(f"Listing not modified: {url}")
+        return [dict(job) for job in cached[2]]
+    response.raise_for_status()
+
+    jobs = parse_jobs(response.content, url.split('?')[0])
+    _page_cache.set(url, (response.headers.get('ETag'), response.headers.get('Last-Modified'), jobs))
+    return jobs
+
+def iter_jobs(urls=None, max_workers=SCRAPE_MAX_WORKERS):
+    """Fetch listing pages concurrently and yield jobs as each page finishes"""
+    urls = urls or listing_urls()
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_listing, url, session): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                jobs = future.result()
+            except Exception as e:
+                logging.error(f"Error scraping {futures[future]}: {e}")
+                continue
+            yield from jobs
 
 def scrape_jobs(preferences):
     """
     Scrape jobs from Oracle Cloud portal based on preferences
     """
-    base_url = "https://ecsr.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1/requisitions"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
-        response = requests.get(base_url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        jobs = []
-        
-        # Find all job listings
-        job_listings = soup.find_all('div', class_='joblist-wrapper')
-        logging.debug(f"Found {len(job_listings)} potential job listings")
-        
-        for job in job_listings:
-            try:
-                # Extract job details
-                title_elem = job.find('h3', class_='joblist-title')
-                location_elem = job.find('span', class_='joblist-location')
-                desc_elem = job.find('div', class_='joblist-description')
-                link_elem = job.find('a', class_='joblist-link')
-                
-                if title_elem:  # Only process if we found a title
-                    job_data = {
-                        'title': title_elem.text.strip(),
-                        'company': 'Oracle',
-                        'location': location_elem.text.strip() if location_elem else 'Location not specified',
-                        'description': desc_elem.text.strip() if desc_elem else 'No description available',
-                        'url': f"{base_url}/{link_elem['href']}" if link_elem and 'href' in link_elem.attrs else base_url
-                    }
-                    jobs.append(job_data)
-                    logging.debug(f"Successfully parsed job: {job_data['title']}")
-            except Exception as e:
-                logging.error(f"Error parsing individual job listing: {str(e)}")
-                continue
-                
-        # If no jobs found through primary selectors, try alternate selectors
-        if not jobs:
-            logging.debug("No jobs found with primary selectors, trying alternate selectors")
-            alt_listings = soup.find_all('div', class_='job-posting')
-            
-            for job in alt_listings:
-                try:
-                    title = job.find('div', class_='posting-title').text.strip()
-                    location = job.find('div', class_='posting-location').text.strip()
-                    description = job.find('div', class_='posting-description').text.strip()
-                    url = job.find('a')['href'] if job.find('a') else base_url
-                    
-                    jobs.append({
-                        'title': title,
-                        'company': 'Oracle',
-                        'location': location,
-                        'description': description,
-                        'url': url if url.startswith('http') else f"{base_url}/{url.lstrip('/')}"
-                    })
-                except Exception as e:
-                    logging.error(f"Error parsing alternate job listing: {str(e)}")
-                    continue
-        
+        jobs = list(iter_jobs())
         logging.info(f"Successfully scraped {len(jobs)} jobs")
         return jobs
-        
+
     except Exception as e:
         logging.error(f"Error scraping jobs: {e}")
         return []
 
-def format_job_match(job, analysis):
+SCORING_MODEL = "gpt-4o"  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
+SCORE_BATCH_SIZE = int(os.environ.get("SCORE_BATCH_SIZE", "10"))
+SCORE_MAX_WORKERS = int(os.environ.get("SCORE_MAX_WORKERS", "4"))
+
+_openai_client = None
+_openai_lock = threading.Lock()
+# (profile key, job hash) -> {"match_score", "reasoning"}
+_score_cache = LRUCache(
+    maxsize=int(os.environ.get("SCORE_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("SCORE_CACHE_TTL", "86400")),
+)
+
+def get_openai_client():
+    """OpenAI client shared by all scoring threads"""
+    global _openai_client
+    with _openai_lock:
+        if _openai_client is None:
+            from openai import OpenAI
+            _openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _openai_client
+
+def _job_hash(job):
+    parts = [str(job.get(k) or '') for k in ('title', 'company', 'location', 'description', 'url')]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def _match_result(job, score):
+    return {
+        "title": job.get("title"),
+        "company": job.get("company"),
+        "location": job.get("location"),
+        "match_score": score.get("match_score", 0),
+        "reasoning": score.get("reasoning", "No analysis available"),
+        "url": job.get("url")
+    }
+
+def _error_result(job):
+    return {
+        "title": job.get("title"),
+        "company": job.get("company"),
+        "match_score": 0,
+        "url": job.get("url"),
+        "reasoning": "Error analyzing job match"
+    }
+
+def _score_batch(jobs, analysis):
+    """Score several jobs with one chat completion; returns one score dict per job"""
+    listings = "\n\n".join(
+        f"Job {i}:\nJob Title: {job.get('title')}\nDescription: {job.get('description')}\nLocation: {job.get('location')}"
+        for i, job in enumerate(jobs)
+    )
+    prompt = f"""
+    Based on the candidate's preferences:
+    {analysis}
+
+    Analyze each of these job postings and provide a match score and reasoning:
+    {listings}
+
+    Return response in JSON format with a single field "results", an array with
+    one object per job in the same order, each with fields:
+    - index (the job number)
+    - match_score (0-100)
+    - reasoning (brief explanation)
     """
-    Use OpenAI to analyze job fit based on user preferences
+
+    response = get_openai_client().chat.completions.create(
+        model=SCORING_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"}
+    )
+    results = json.loads(response.choices[0].message.content).get("results")
+    if not isinstance(results, list):
+        return [None] * len(jobs)
+    return [_valid_score(r) for r in _align_results(results, len(jobs))]
+
+def _result_index(result):
+    if not isinstance(result, dict) or isinstance(result.get("index"), bool):
+        return None
+    try:
+        return int(result.get("index"))
+    except (TypeError, ValueError):
+        return None
+
+def _align_results(results, count):
+    """Order the model's results by job; None where a job has no usable result.
+
+    The model's "index" is trusted only when it numbers every job exactly once
+    (0- or 1-based); otherwise results are taken by position if there is one per job.
     """
+    indices = [_result_index(r) for r in results]
+    if len(results) == count:
+        for start in (0, 1):
+            if sorted(i for i in indices if i is not None) == list(range(start, start + count)):
+                ordered = [None] * count
+                for i, result in zip(indices, results):
+                    ordered[i - start] = result
+                return ordered
+        return list(results)
+    # Some jobs are missing: keep only results whose index is unambiguous
+    ordered = [None] * count
+    seen = [i for i in indices if i is not None]
+    for i, result in zip(indices, results):
+        if i is not None and 0 <= i < count and seen.count(i) == 1:
+            ordered[i] = result
+    return ordered
+
+def _valid_score(result):
+    """{"match_score", "reasoning"} from one model result, or None if it is malformed"""
+    if not isinstance(result, dict) or isinstance(result.get("match_score"), bool):
+        return None
     try:
-        # Create a prompt for job analysis
-        prompt = f"""
-        Based on the candidate's preferences:
-        {analysis}
-        
-        Analyze this job posting and provide a match score and reasoning:
-        Job Title: {job.get('title')}
-        Description: {job.get('description')}
-        Location: {job.get('location')}
-        
-        Return response in JSON format with fields:
-        - match_score (0-100)
-        - reasoning (brief explanation)
-        """
-        
-        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        
-        return {
-            "title": job.get("title"),
-            "company": job.get("company"),
-            "location": job.get("location"),
-            "match_score": result.get("match_score", 0),
-            "reasoning": result.get("reasoning", "No analysis available"),
-            "url": job.get("url")
-        }
-        
-    except Exception as e:
-        logging.error(f"Error analyzing job match: {e}")
-        return {
-            "title": job.get("title"),
-            "company": job.get("company"),
-            "match_score": 0,
-            "url": job.get("url"),
-            "reasoning": "Error analyzing job match"
-        }
+        match_score = float(result.get("match_score"))
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= match_score <= 100:
+        return None
+    reasoning = result.get("reasoning")
+    return {
+        "match_score": int(match_score) if match_score.is_integer() else match_score,
+        "reasoning": reasoning if isinstance(reasoning, str) and reasoning else "No analysis available",
+    }
+
+def score_jobs(jobs, analysis, profile_key=None, batch_size=SCORE_BATCH_SIZE, max_workers=SCORE_MAX_WORKERS):
+    """
+    Use OpenAI to analyze the fit of many jobs, packing several jobs into each
+    request and running requests concurrently. Scores are cached per
+    (profile key, job), so repeat lookups for the same profile are free.
+    """
+    profile_key = profile_key or hashlib.sha256(str(analysis).encode("utf-8")).hexdigest()
+    results = [None] * len(jobs)
+    pending = []
+    for i, job in enumerate(jobs):
+        cached = _score_cache.get((profile_key, _job_hash(job)))
+        if cached is not None:
+            results[i] = _match_result(job, cached)
+        else:
+            pending.append(i)
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_score_batch, [jobs[i] for i in batch], analysis): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                scores = future.result()
+            except Exception as e:
+                logging.error(f"Error analyzing job match: {e}")
+                scores = [None] * len(batch)
+            for i, score in zip(batch, scores):
+                if score is None:
+                    results[i] = _error_result(jobs[i])
+                    continue
+                _score_cache.set((profile_key, _job_hash(jobs[i])), score)
+                results[i] = _match_result(jobs[i], score)
+
+    return results
+
+def format_job_match(job, analysis, profile_key=None):
+    """
+    Use OpenAI to analyze job fit based on user preferences
+    """
+    return score_jobs([job], analysis, profile_key=profile_key)[0]